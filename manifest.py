@@ -0,0 +1,13 @@
+# Freezes the device modules into MicroPython firmware, see README.md
+#   make -C ports/esp32 BOARD=ESP32_GENERIC_C3 FROZEN_MANIFEST=/path/to/this/manifest.py
+# Frozen modules are imported from flash: no compiling and no heap for bytecode or constants
+include("$(PORT_DIR)/boards/manifest.py")
+package(
+    "sen5x",
+    files=(
+        "acquisition.py", "adaptive.py", "aqi.py", "archive.py", "cleaning.py", "climate.py", "clock.py",
+        "coalesce.py", "compat.py", "fanout.py", "filters.py", "health.py", "log.py", "recovery.py", "rounding.py",
+        "sen5x.py", "simulator.py", "trace.py", "transport.py",
+    ),  # not host only exporter.py, ingest.py & linux_i2c.py
+)
+package("tools", files=("tools.py",))
@@ -0,0 +1,153 @@
+from micropython import const, schedule
+from struct import pack, unpack_from
+from sen5x.sen5x import SEN5x
+
+
+class TimerAcquisition:
+    """
+    Timer driven acquisition of SEN5x measured values into preallocated storage
+    See README.md for details
+
+    Timer callback only schedules work, nothing is allocated in IRQ context
+    Each scheduled tick reads the response to the previous tick's command and then issues the next command,
+    so no time is spent sleeping while SEN5x executes the command
+    Samples are stored as raw words in a ring buffer and only scaled when the application pops them
+    Samples are dropped (and counted in overruns) if the application doesn't keep up
+    An optional sample_filter (see sen5x/filters.py) is applied to samples as they are popped,
+    flagged channels of the last popped sample are in flags
+
+    Only the MEASURED_VALUES words the variant provides are read, the others are stored as 'unknown'
+    If SEN5x is in tolerant mode, words failing checksum are stored as 'unknown' instead of dropping the sample
+    SEN5x must be in measurement mode and must not be used directly while acquisition is running
+    Ticks run in the thread they interrupt and never wait for the bus: if it is held the tick is skipped (counted in busy)
+    A bus lock (SEN5x lock) is required when the application or other drivers also use the bus,
+    without one a tick can overwrite the shared transport buffer in the middle of their transaction
+
+    Usage:
+        from machine import Timer
+        acq = TimerAcquisition(sen, Timer(0))
+        acq.start()
+        while True:
+            sample = acq.pop()
+            if sample is not None:
+                timestamp, measured_values_raw = sample
+    """
+    SAMPLE_SIZE = const(16)  # bytes per stored sample, no crc
+
+    def __init__(self, sen: SEN5x, timer, depth: int = 8, sample_filter=None):
+        self.sen = sen
+        self.timer = timer
+        self.depth = depth
+        self.sample_filter = sample_filter
+        self.flags = 0  # filter flags of last popped sample
+        self.valid = 0  # valid word bits of last popped sample, as SEN5x.valid
+        self.overruns = 0  # ticks or samples lost because scheduler or application didn't keep up
+        self.errors = 0  # bus, not ready or checksum errors
+        self.busy = 0  # ticks skipped because bus was held
+        self._words = sen.measured_values_words  # reads product name if not known yet
+        self._words_buffer = bytearray(self._words * 2)  # response without checksums
+        self._samples = bytearray(depth * self.SAMPLE_SIZE)
+        unknown = pack('>4H4h', *SEN5x.UNKNOWN_TICKS)
+        for slot in range(depth):  # words not provided by variant are never overwritten
+            self._samples[slot * self.SAMPLE_SIZE:(slot + 1) * self.SAMPLE_SIZE] = unknown
+        self._timestamps = [0] * depth  # small ints, assignment doesn't allocate
+        self._valid = [0] * depth  # valid word bits per slot
+        self._written = 0  # only changed by scheduled tick
+        self._read = 0  # only changed by application
+        self._pending = False  # command issued, response not read yet
+        self._irq_ticks = 0  # time of timer IRQ
+        self._requested_ticks = 0  # time of IRQ that issued pending command
+        self._tick_ref = self._tick  # bound method allocated once, not in IRQ
+        self._ticks_ms = sen.clock.ticks_ms  # timestamps from the driver's clock, bound once, not in IRQ
+
+    def start(self, period_ms: int = 1000) -> None:
+        """ SEN5x produces a new sample every second """
+        if period_ms <= SEN5x.MIN_EXE_TIME:
+            raise ValueError('Period out of range')
+        self._pending = False
+        self.timer.init(period=period_ms, mode=self.timer.PERIODIC, callback=self._irq)
+
+    def stop(self) -> None:
+        self.timer.deinit()
+        self._pending = False
+
+    @property
+    def available(self) -> int:
+        """ Number of finished samples not yet popped """
+        return self._written - self._read
+
+    def pop(self) -> [tuple[int, tuple[float, float, float, float, float, float, float, float]], None]:
+        """
+        Returns (ticks_ms, measured values raw) for oldest finished sample or None if none available
+        Measured values raw are as returned by SEN5x.measured_values_raw, filtered if a sample_filter is set
+        """
+        if self._written == self._read:
+            return None
+        slot = self._read % self.depth
+        ticks = unpack_from('>4H4h', self._samples, slot * self.SAMPLE_SIZE)
+        timestamp = self._timestamps[slot]
+        self.valid = self._valid[slot]
+        self._read += 1  # release slot after copying
+        if self.sample_filter is not None:
+            self.flags = self.sample_filter.update(ticks)
+            ticks = self.sample_filter.values
+        return timestamp, SEN5x._scale_measured_values(*ticks)
+
+    def _irq(self, _timer) -> None:
+        self._irq_ticks = self._ticks_ms()
+        try:
+            schedule(self._tick_ref, None)
+        except RuntimeError:  # schedule queue full
+            self.overruns += 1
+
+    def _tick(self, _arg) -> None:
+        sen = self.sen
+        transport = sen.transport
+        if not transport.acquire(wait=False):  # waiting could deadlock, lock may be held by the interrupted code
+            self.busy += 1  # pending response stays available, collected next tick
+            return
+        try:
+            if self._pending:
+                self._pending = False
+                self._collect()
+            try:
+                transport._send(sen.address, SEN5x.MEASURED_VALUES, 2)
+                self._pending = True
+                self._requested_ticks = self._irq_ticks
+            except OSError:
+                self.errors += 1
+        finally:
+            transport.release()
+
+    def _collect(self) -> None:
+        """ Reads response into next free slot without allocating, bus must be held """
+        sen = self.sen
+        buffer = self._words_buffer
+        try:
+            valid = sen.transport._collect(sen.address, self._words, buffer, False)  # no exception allocated
+        except OSError:
+            self.errors += 1
+            return
+        if not valid or (not sen.tolerant and valid != (1 << self._words) - 1):  # not available or checksum error
+            self.errors += 1
+            return
+
+        if self._written - self._read >= self.depth:  # full, application owns unread slots
+            self.overruns += 1
+            return
+
+        slot = self._written % self.depth
+        offset = slot * self.SAMPLE_SIZE
+        samples = self._samples
+        for i in range(self._words):
+            if valid & (1 << i):
+                samples[offset + i * 2] = buffer[i * 2]
+                samples[offset + i * 2 + 1] = buffer[i * 2 + 1]
+            else:  # tolerant, only this channel is lost
+                unknown = SEN5x.UNKNOWN_TICKS[i]
+                samples[offset + i * 2] = unknown >> 8
+                samples[offset + i * 2 + 1] = unknown & 0xFF
+                sen.crc_errors += 1
+        self._timestamps[slot] = self._requested_ticks
+        self._valid[slot] = valid
+        self._written += 1  # publish slot after filling
@@ -0,0 +1,98 @@
+from sen5x.sen5x import SEN5x
+
+
+class AdaptiveSampler:
+    """
+    Reads SEN5x measured values less often while they are stable
+    See README.md for details
+
+    The read period doubles after each read with all channels within tolerance of the reading the stable run
+    started with, up to max_period_ms
+    Any channel out of tolerance, or a status change (status is read with each read while slowed down),
+    returns straight to min_period_ms
+    Bus transactions are counted and compared with fixed rate polling at min_period_ms
+
+    Usage:
+        sampler = AdaptiveSampler(sen, min_period_ms=1000, max_period_ms=16000)
+        while True:
+            if sampler.poll():
+                print(sampler.values)
+            print(sampler.transactions_saved)
+    """
+    DEFAULT_TOLERANCES = (  # ticks per channel, as SEN5x.measured_values_ticks
+        5, 5, 5, 5,  # 0.5 µg/m³
+        100,  # 1 %RH
+        40,  # 0.2 °C
+        10, 10,  # 1 index point
+    )
+
+    def __init__(self,
+                 sen: SEN5x,
+                 min_period_ms: int = 1000,
+                 max_period_ms: int = 16000,
+                 tolerances: tuple = DEFAULT_TOLERANCES,
+                 ):
+        if not SEN5x.MIN_EXE_TIME < min_period_ms <= max_period_ms:
+            raise ValueError('Period out of range')
+        self.sen = sen
+        self.min_period_ms = min_period_ms
+        self.max_period_ms = max_period_ms
+        self.tolerances = tolerances
+        self.period_ms = min_period_ms
+        self.ticks = None  # last measured values ticks read
+        self.status = None  # last status read
+        self.reads = 0  # measured values reads
+        self.transactions = 0  # bus transactions, measured values & status reads
+        self._reference = None  # ticks the stable run started with
+        self._first_poll = None  # ticks_ms
+        self._last_poll = None  # ticks_ms
+        self._last_read = None  # ticks_ms
+
+    @property
+    def values(self) -> [tuple[float, float, float, float, float, float, float, float], None]:
+        """ Last read as SEN5x.measured_values_raw """
+        return None if self.ticks is None else SEN5x._scale_measured_values(*self.ticks)
+
+    @property
+    def transactions_saved(self) -> int:
+        """ Transactions fixed rate polling at min_period_ms would have made since first poll, less those made """
+        if self._first_poll is None:
+            return 0
+        fixed = self.sen.clock.ticks_diff(self._last_poll, self._first_poll) // self.min_period_ms + 1
+        return fixed - self.transactions
+
+    def poll(self, now: int = None) -> bool:
+        """
+        Reads measured values if period elapsed, returns True if read
+        now is ticks_ms() of sen.clock, defaults to current time
+        """
+        clock = self.sen.clock
+        now = clock.ticks_ms() if now is None else now
+        if self._first_poll is None:
+            self._first_poll = now
+        self._last_poll = now
+        if self._last_read is not None and clock.ticks_diff(now, self._last_read) < self.period_ms:
+            return False
+        self._last_read = now
+        self.ticks = self.sen.measured_values_ticks
+        self.reads += 1
+        self.transactions += 1
+        changed = self._reference is None or self._out_of_tolerance(self.ticks)
+        if self.period_ms > self.min_period_ms or self.status is None:
+            status = self.sen.status
+            self.transactions += 1
+            changed = changed or status != self.status
+            self.status = status
+        if changed:
+            self._reference = self.ticks
+            self.period_ms = self.min_period_ms
+        else:
+            self.period_ms = min(self.period_ms * 2, self.max_period_ms)
+        return True
+
+    def _out_of_tolerance(self, ticks: tuple) -> bool:
+        for i in range(len(ticks)):
+            deviation = ticks[i] - self._reference[i]
+            if deviation > self.tolerances[i] or -deviation > self.tolerances[i]:
+                return True
+        return False
@@ -0,0 +1,246 @@
+from array import array
+from time import time
+from sen5x.compat import const
+from sen5x.sen5x import SEN5x
+
+
+class AQI:
+    """
+    Incremental US EPA AQI from SEN5x PM2.5 & PM10
+    See README.md for details
+
+    Samples are accumulated into 24 hourly buckets, so memory is fixed and each update costs
+    O(1) for the 24-hour average plus a fixed 12 hour pass for NowCast, regardless of sample rate
+    Concentrations are kept as integers in 0.1 µg/m³ (SEN5x resolution) and NowCast weights in fixed point,
+    so updates allocate nothing beyond their arguments
+    The current (partial) hour counts as the most recent hour
+
+    Sources of information:
+        https://www.airnow.gov/publications/air-quality-index/technical-assistance-document-for-reporting-the-daily-aqi/
+        https://usepa.servicenowservices.com/airnow?id=kb_article_view&sysparm_article=KB0011856
+
+    Usage:
+        aqi = AQI()
+        while True:
+            ppm1_0, ppm2_5, ppm4_0, ppm10_0, rh, t, voc, nox = sen.measured_values_raw
+            value = aqi.update(ppm2_5, ppm10_0)  # NowCast AQI or None
+            # or without floats: aqi.update_ticks(*sen.measured_values_ticks[1:4:2])
+            if value is not None:
+                print(value, AQI.CATEGORIES[aqi.category])
+    """
+    HOURS = const(24)
+    NOWCAST_HOURS = const(12)
+    MIN_DAILY_HOURS = const(18)  # valid hours required for 24-hour average
+    WEIGHT_ONE = const(1024)  # NowCast weight 1.0 in fixed point
+    WEIGHT_MIN = const(512)  # NowCast minimum weight 0.5 for PM
+    UNKNOWN = const(-1)  # hour without samples
+
+    CATEGORIES = (
+        'Good',
+        'Moderate',
+        'Unhealthy for Sensitive Groups',
+        'Unhealthy',
+        'Very Unhealthy',
+        'Hazardous',
+    )
+
+    # (concentration low, concentration high, index low, index high) per category, concentration in 0.1 µg/m³
+    PM2_5_BREAKPOINTS = (  # 2024 revision, truncated to 0.1 µg/m³
+        (0, 90, 0, 50),
+        (91, 354, 51, 100),
+        (355, 554, 101, 150),
+        (555, 1254, 151, 200),
+        (1255, 2254, 201, 300),
+        (2255, 3254, 301, 500),
+    )
+    PM10_BREAKPOINTS = (  # truncated to 1 µg/m³
+        (0, 540, 0, 50),
+        (550, 1540, 51, 100),
+        (1550, 2540, 101, 150),
+        (2550, 3540, 151, 200),
+        (3550, 4240, 201, 300),
+        (4250, 6040, 301, 500),
+    )
+
+    def __init__(self):
+        # per channel (0: PM2.5, 1: PM10), channel * HOURS + hour slot
+        self._sums = array('l', [0] * 2 * self.HOURS)  # current hour only
+        self._counts = array('l', [0] * 2 * self.HOURS)  # current hour only
+        self._averages = array('l', [self.UNKNOWN] * 2 * self.HOURS)  # completed hours
+        self._daily_sums = [0, 0]  # sum of completed hourly averages in last 24 hours
+        self._daily_hours = [0, 0]  # number of completed hours with samples in last 24 hours
+        self._hour = None  # current hour, time() // 3600
+
+        # results of last update, concentrations in 0.1 µg/m³, None if not enough data
+        self.nowcast = None  # NowCast AQI, max of PM2.5 and PM10
+        self.category = None  # index into CATEGORIES
+        self.daily = None  # 24-hour AQI, max of PM2.5 and PM10
+        self.daily_category = None
+        self.nowcast_pm2_5 = None
+        self.nowcast_pm10 = None
+        self.daily_pm2_5 = None
+        self.daily_pm10 = None
+
+    def update(self, pm2_5: [float, None], pm10: [float, None], now: int = None) -> [int, None]:
+        """
+        Adds PM2.5 & PM10 in µg/m³ as returned by SEN5x.measured_values_raw (None if unknown)
+        now is time() in seconds, defaults to current time
+        Returns NowCast AQI or None if not enough data, other results are in attributes
+        """
+        return self._update(
+            None if pm2_5 is None else int(pm2_5 * 10 + 0.5),
+            None if pm10 is None else int(pm10 * 10 + 0.5),
+            time() if now is None else now
+        )
+
+    def update_ticks(self, pm2_5: int, pm10: int, now: int = None) -> [int, None]:
+        """
+        As update() with PM2.5 & PM10 ticks as returned by SEN5x.measured_values_ticks
+        Ticks are already in 0.1 µg/m³, so no float conversion is needed
+        """
+        return self._update(
+            None if pm2_5 in (SEN5x.UNKNOWN_UNSIGNED, SEN5x.UNKNOWN_SIGNED) else pm2_5,
+            None if pm10 in (SEN5x.UNKNOWN_UNSIGNED, SEN5x.UNKNOWN_SIGNED) else pm10,
+            time() if now is None else now
+        )
+
+    def _update(self, pm2_5: [int, None], pm10: [int, None], now: int) -> [int, None]:
+        """ Concentrations in 0.1 µg/m³ """
+        self._roll(now // 3600)
+        slot = self._hour % self.HOURS
+        if pm2_5 is not None:
+            self._sums[slot] += pm2_5
+            self._counts[slot] += 1
+        if pm10 is not None:
+            self._sums[self.HOURS + slot] += pm10
+            self._counts[self.HOURS + slot] += 1
+
+        self.nowcast_pm2_5 = self._nowcast(0)
+        self.nowcast_pm10 = self._nowcast(1)
+        self.daily_pm2_5 = self._daily(0)
+        self.daily_pm10 = self._daily(1)
+        self.nowcast = self._max_index(
+            self._index(self.nowcast_pm2_5, self.PM2_5_BREAKPOINTS),
+            self._index(self._truncate_pm10(self.nowcast_pm10), self.PM10_BREAKPOINTS)
+        )
+        self.daily = self._max_index(
+            self._index(self.daily_pm2_5, self.PM2_5_BREAKPOINTS),
+            self._index(self._truncate_pm10(self.daily_pm10), self.PM10_BREAKPOINTS)
+        )
+        self.category = self._category(self.nowcast)
+        self.daily_category = self._category(self.daily)
+        return self.nowcast
+
+    def _roll(self, hour: int) -> None:
+        """ Completes hours up to (not including) hour """
+        if self._hour is None or hour - self._hour >= self.HOURS:  # start or all buckets stale
+            for i in range(2 * self.HOURS):
+                self._sums[i] = 0
+                self._counts[i] = 0
+                self._averages[i] = self.UNKNOWN
+            for channel in (0, 1):
+                self._daily_sums[channel] = 0
+                self._daily_hours[channel] = 0
+            self._hour = hour
+            return
+
+        while self._hour < hour:
+            for channel in (0, 1):
+                i = channel * self.HOURS + self._hour % self.HOURS
+                average = self._current_average(i)
+                self._averages[i] = average
+                if average != self.UNKNOWN:
+                    self._daily_sums[channel] += average
+                    self._daily_hours[channel] += 1
+            self._hour += 1
+            for channel in (0, 1):
+                i = channel * self.HOURS + self._hour % self.HOURS
+                expired = self._averages[i]  # 24 hours ago
+                if expired != self.UNKNOWN:
+                    self._daily_sums[channel] -= expired
+                    self._daily_hours[channel] -= 1
+                self._averages[i] = self.UNKNOWN
+                self._sums[i] = 0
+                self._counts[i] = 0
+
+    def _current_average(self, i: int) -> int:
+        count = self._counts[i]
+        return self._sums[i] // count if count else self.UNKNOWN
+
+    def _hourly(self, channel: int, hours_ago: int) -> int:
+        i = channel * self.HOURS + (self._hour - hours_ago) % self.HOURS
+        return self._current_average(i) if hours_ago == 0 else self._averages[i]
+
+    def _nowcast(self, channel: int) -> [int, None]:
+        """ Requires 2 of the 3 most recent hours """
+        low = high = self.UNKNOWN
+        recent = 0
+        for hours_ago in range(self.NOWCAST_HOURS):
+            c = self._hourly(channel, hours_ago)
+            if c == self.UNKNOWN:
+                continue
+            if hours_ago < 3:
+                recent += 1
+            if low == self.UNKNOWN or c < low:
+                low = c
+            if c > high:
+                high = c
+        if recent < 2:
+            return None
+
+        weight_factor = low * self.WEIGHT_ONE // high if high else self.WEIGHT_ONE
+        if weight_factor < self.WEIGHT_MIN:
+            weight_factor = self.WEIGHT_MIN
+        weight = self.WEIGHT_ONE
+        weighted_sum = weight_sum = 0
+        for hours_ago in range(self.NOWCAST_HOURS):
+            c = self._hourly(channel, hours_ago)
+            if c != self.UNKNOWN:
+                weighted_sum += weight * c
+                weight_sum += weight
+            weight = weight * weight_factor // self.WEIGHT_ONE
+        return weighted_sum // weight_sum
+
+    def _daily(self, channel: int) -> [int, None]:
+        total = self._daily_sums[channel]
+        hours = self._daily_hours[channel]
+        current = self._hourly(channel, 0)
+        if current != self.UNKNOWN:
+            total += current
+            hours += 1
+        return total // hours if hours >= self.MIN_DAILY_HOURS else None
+
+    @staticmethod
+    def _truncate_pm10(pm10: [int, None]) -> [int, None]:
+        return None if pm10 is None else pm10 // 10 * 10
+
+    @staticmethod
+    def _index(concentration: [int, None], breakpoints: tuple) -> [int, None]:
+        """ Linear interpolation between breakpoints, rounded to nearest integer """
+        if concentration is None:
+            return None
+        for c_low, c_high, i_low, i_high in breakpoints:
+            if concentration <= c_high:
+                break
+        else:  # beyond AQI
+            return 500
+        if concentration < c_low:  # between truncated breakpoints
+            concentration = c_low
+        return i_low + ((i_high - i_low) * (concentration - c_low) * 2 + c_high - c_low) // (2 * (c_high - c_low))
+
+    @staticmethod
+    def _max_index(a: [int, None], b: [int, None]) -> [int, None]:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a if a > b else b
+
+    @staticmethod
+    def _category(index: [int, None]) -> [int, None]:
+        if index is None:
+            return None
+        for category in range(len(AQI.PM2_5_BREAKPOINTS)):
+            if index <= AQI.PM2_5_BREAKPOINTS[category][3]:
+                return category
+        return len(AQI.CATEGORIES) - 1
@@ -0,0 +1,259 @@
+from array import array
+from struct import pack_into, unpack_from
+from time import time
+from sen5x.compat import const
+from sen5x.sen5x import SEN5x
+
+
+class Archive:
+    """
+    Multi-resolution round-robin archive of SEN5x measured values ticks on flash
+    See README.md for details
+
+    Each tier is a file of fixed size, preallocated when created, used as a ring of records
+    Each record holds mean, min & max per channel over the tier's step
+    Samples are consolidated into the first tier, and each tier's records into the next tier when its step completes
+    Records are buffered and written sequentially a page at a time, files never grow
+    Range queries binary search the ring for the start time, then read sequentially,
+    so they cost time proportional to the records returned
+    Position in each ring is recovered by binary search when reopened, partially consolidated steps are lost
+
+    Usage:
+        archive = Archive()  # 1 hour of seconds, 1 day of minutes, 90 days of hours
+        while True:
+            archive.append(sen.measured_values_ticks)
+        for timestamp, count, means, mins, maxs in archive.query(1, start, end):  # tier 1: minutes
+            ...
+    """
+    DEFAULT_TIERS = (  # (step in seconds, records)
+        (1, 3600),
+        (60, 1440),
+        (3600, 2160),
+    )
+
+    def __init__(self,
+                 tiers: tuple = DEFAULT_TIERS,
+                 directory: str = SEN5x.DATA_DIR,
+                 name: str = 'archive',
+                 page_records: int = 16,
+                 ):
+        from tools import tools  # external library required
+        tools.create_dir(directory)
+        self.tiers = [_Tier(f'{directory}/{name}_{step}.bin', step, records, page_records)
+                      for step, records in tiers]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, ticks: tuple, now: int = None) -> None:
+        """
+        Adds one sample of ticks as returned by SEN5x.measured_values_ticks
+        now is time() in seconds, defaults to current time
+        """
+        now = time() if now is None else now
+        tier = self.tiers[0]
+        tier.add(now, ticks, ticks, ticks, 1, _Tier.ONES)
+        for next_tier in self.tiers[1:]:
+            if not tier.completed:
+                break
+            next_tier.add(tier.completed_timestamp, tier.means, tier.mins, tier.maxs,
+                          tier.completed_count, tier.counts)
+            tier = next_tier
+
+    def query(self, tier: int, start: int, end: int):
+        """
+        Yields (timestamp, count, means, mins, maxs) for records in tier with start <= timestamp <= end
+        means, mins & maxs are ticks as SEN5x.measured_values_ticks, count is number of samples consolidated
+        """
+        return self.tiers[tier].query(start, end)
+
+    def flush(self) -> None:
+        """ Writes buffered records, partial pages are rewritten when complete """
+        for tier in self.tiers:
+            tier.flush()
+
+    def close(self) -> None:
+        for tier in self.tiers:
+            tier.close()
+
+
+class _Tier:
+    """ One ring file of records, plus the step being consolidated into it """
+    MAGIC = b'S5XA'
+    HEADER_FORMAT = '>4sII'  # magic, step, records
+    HEADER_SIZE = const(12)
+    RECORD_FORMAT = '>IH4H4h4H4h4H4h'  # timestamp, count, means, mins, maxs
+    RECORD_SIZE = const(54)
+    CHANNELS = const(8)
+    UNKNOWN = SEN5x.UNKNOWN_TICKS
+    ONES = (1,) * CHANNELS  # counts of a single sample, 'unknown' channels are skipped by value
+
+    def __init__(self, path: str, step: int, records: int, page_records: int):
+        self.path = path
+        self.step = step
+        self.records = records
+        self._page = bytearray(page_records * self.RECORD_SIZE)
+        self._page_records = page_records
+        self._pending = 0  # records in page buffer
+        self._file = self._open()
+        self._head = self._find_head()  # next record to write
+        self._page_start = self._head
+
+        # step being consolidated
+        self._step_start = None
+        self._sums = [0] * self.CHANNELS  # may exceed 32 bits for long steps
+        self._counts = array('l', [0] * self.CHANNELS)
+        self._mins = array('l', [0] * self.CHANNELS)
+        self._maxs = array('l', [0] * self.CHANNELS)
+        self._samples = 0
+
+        # last completed step, input to next tier
+        self.completed = False
+        self.completed_timestamp = 0
+        self.completed_count = 0  # samples, stored clipped to 16 bits
+        self.counts = array('l', [0] * self.CHANNELS)  # samples per channel in which it was known, weights of means
+        self.means = array('l', [0] * self.CHANNELS)
+        self.mins = array('l', [0] * self.CHANNELS)
+        self.maxs = array('l', [0] * self.CHANNELS)
+
+    def add(self, timestamp: int, means, mins, maxs, count: int, counts) -> None:
+        """
+        Consolidates into current step, completing it first if timestamp is in a later step
+        count is the number of samples, counts the number per channel in which that channel was known
+        """
+        step_start = timestamp - timestamp % self.step
+        self.completed = False
+        if self._step_start is not None and step_start != self._step_start:
+            self._complete()
+        self._step_start = step_start
+        self._samples += count
+        for i in range(self.CHANNELS):
+            weight = counts[i]
+            if weight == 0 or means[i] == self.UNKNOWN[i]:
+                continue
+            if self._counts[i] == 0 or mins[i] < self._mins[i]:
+                self._mins[i] = mins[i]
+            if self._counts[i] == 0 or maxs[i] > self._maxs[i]:
+                self._maxs[i] = maxs[i]
+            self._sums[i] += means[i] * weight
+            self._counts[i] += weight
+
+    def query(self, start: int, end: int):
+        self.flush()
+        oldest, count = self._extent()
+        low, high = 0, count  # binary search for first record >= start
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamp((oldest + middle) % self.records) < start:
+                low = middle + 1
+            else:
+                high = middle
+        buffer = bytearray(self._page_records * self.RECORD_SIZE)
+        i = low
+        while i < count:
+            index = (oldest + i) % self.records
+            n = min(self._page_records, count - i, self.records - index)
+            self._file.seek(self.HEADER_SIZE + index * self.RECORD_SIZE)
+            self._file.readinto(buffer)
+            for j in range(n):
+                record = unpack_from(self.RECORD_FORMAT, buffer, j * self.RECORD_SIZE)
+                if record[0] > end:
+                    return
+                yield record[0], record[1], record[2:10], record[10:18], record[18:26]
+            i += n
+
+    def flush(self) -> None:
+        if self._pending:
+            self._write(self._page_start, self._pending)
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def _complete(self) -> None:
+        """ Writes record for current step and makes it available to next tier """
+        for i in range(self.CHANNELS):
+            self.counts[i] = self._counts[i]
+            if self._counts[i]:
+                self.means[i] = self._sums[i] // self._counts[i]
+                self.mins[i] = self._mins[i]
+                self.maxs[i] = self._maxs[i]
+            else:
+                self.means[i] = self.mins[i] = self.maxs[i] = self.UNKNOWN[i]
+            self._sums[i] = 0
+            self._counts[i] = 0
+        self.completed = True
+        self.completed_timestamp = self._step_start
+        self.completed_count = self._samples
+        self._samples = 0
+
+        pack_into(self.RECORD_FORMAT, self._page, self._pending * self.RECORD_SIZE,
+                  self.completed_timestamp, min(self.completed_count, 0xFFFF), *self.means, *self.mins, *self.maxs)
+        self._pending += 1
+        self._head = (self._head + 1) % self.records
+        if self._pending == self._page_records:
+            self._write(self._page_start, self._pending)
+            self._pending = 0
+            self._page_start = self._head
+
+    def _write(self, index: int, n: int) -> None:
+        """ Writes n records from page buffer starting at ring index, splitting at end of ring """
+        first = min(n, self.records - index)
+        page = memoryview(self._page)
+        self._file.seek(self.HEADER_SIZE + index * self.RECORD_SIZE)
+        self._file.write(page[:first * self.RECORD_SIZE])
+        if first < n:
+            self._file.seek(self.HEADER_SIZE)
+            self._file.write(page[first * self.RECORD_SIZE:n * self.RECORD_SIZE])
+        self._file.flush()
+
+    def _open(self):
+        """ Opens ring file, creating & preallocating it if missing or of a different layout """
+        header = bytearray(self.HEADER_SIZE)
+        pack_into(self.HEADER_FORMAT, header, 0, self.MAGIC, self.step, self.records)
+        try:
+            f = open(self.path, 'r+b')
+            if f.read(self.HEADER_SIZE) == header:
+                return f
+            f.close()
+        except OSError:  # not found
+            pass
+        f = open(self.path, 'w+b')
+        f.write(header)
+        blank = bytes(len(self._page))
+        remaining = self.records * self.RECORD_SIZE
+        while remaining > 0:
+            f.write(blank[:min(remaining, len(blank))])
+            remaining -= len(blank)
+        f.flush()
+        return f
+
+    def _timestamp(self, index: int) -> int:
+        self._file.seek(self.HEADER_SIZE + index * self.RECORD_SIZE)
+        return unpack_from('>I', self._file.read(4))[0]
+
+    def _find_head(self) -> int:
+        """
+        Ring holds ascending timestamps rotated at head, unwritten records are 0
+        Binary search for first record older than record 0
+        """
+        first = self._timestamp(0)
+        if first == 0:  # empty
+            return 0
+        low, high = 1, self.records
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamp(middle) < first:
+                high = middle
+            else:
+                low = middle + 1
+        return low % self.records
+
+    def _extent(self) -> tuple[int, int]:
+        """ Returns (oldest index, number of records) """
+        if self._timestamp(self._head) == 0:  # not wrapped yet
+            return 0, self._head
+        return self._head, self.records
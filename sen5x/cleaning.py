@@ -0,0 +1,116 @@
+from sen5x.clock import Clock
+from sen5x.sen5x import SEN5x
+
+
+class CleaningScheduler:
+    """
+    Coordinates fan cleaning across a group of SEN5x so they don't all clean at once
+    See README.md for details
+
+    SEN5x auto cleaning is disabled (auto_cleaning_interval = 0) and cleaning is started by the scheduler instead
+    Units without a known last cleaning are staggered evenly over the interval
+    At most max_concurrent units clean at a time, so at least len(sensors) - max_concurrent give valid PM values
+    A cleaning unit is only polled (status) once its expected duration has passed
+    Times are clock.time() in seconds, last_cleaned can be saved and restored across restarts
+
+    Usage:
+        scheduler = CleaningScheduler([sen1, sen2, sen3], interval=604800, max_concurrent=1)
+        scheduler.attach()
+        while True:
+            scheduler.poll()
+            for sen, cleaning in zip(scheduler.sensors, scheduler.cleaning):
+                if not cleaning:
+                    values = sen.measured_values
+    """
+    DEFAULT_INTERVAL = 604800  # s, as SEN5x default auto cleaning interval (1 week)
+    CLEANING_DURATION = 10  # s, per datasheet
+
+    def __init__(self,
+                 sensors: list[SEN5x],
+                 interval: int = DEFAULT_INTERVAL,
+                 max_concurrent: int = 1,
+                 duration: int = CLEANING_DURATION,
+                 last_cleaned: list = None,
+                 clock=None,
+                 ):
+        if not 1 <= max_concurrent <= len(sensors):
+            raise ValueError('Max concurrent out of range')
+        self.sensors = sensors
+        self.clock = Clock() if clock is None else clock
+        self.interval = interval
+        self.max_concurrent = max_concurrent
+        self.duration = duration
+        self.last_cleaned = list(last_cleaned) if last_cleaned is not None else [None] * len(sensors)
+        self.cleaning = [False] * len(sensors)  # cleaning started by scheduler and not seen finished
+        self.started = [None] * len(sensors)  # time current cleaning started
+        self.due = [None] * len(sensors)  # time next cleaning is due
+        self.cleanings = 0  # cleanings started
+        self.errors = 0  # failed to start cleaning or read status
+        self._stagger(self.clock.time())
+
+    @property
+    def active(self) -> int:
+        """ Number of units cleaning """
+        return sum(self.cleaning)
+
+    def attach(self) -> None:
+        """
+        Disables SEN5x auto cleaning on all units
+        Repeat after a SEN5x reset, auto cleaning interval reverts to default
+        """
+        for sen in self.sensors:
+            sen.auto_cleaning_interval = 0
+
+    def poll(self, now: int = None) -> list[int]:
+        """
+        Finishes completed cleanings and starts due ones up to max_concurrent
+        Returns indexes of units started
+        now is clock.time() in seconds, defaults to current time
+        """
+        now = self.clock.time() if now is None else now
+        for i, sen in enumerate(self.sensors):
+            if self.cleaning[i] and now - self.started[i] >= self.duration:
+                try:
+                    active = sen.fan_cleaning_active
+                except (OSError, SEN5x.CRCError, SEN5x.ReadError):
+                    self.errors += 1
+                    continue
+                if not active:
+                    self.cleaning[i] = False
+                    self.last_cleaned[i] = self.started[i]
+                    self.due[i] = self.started[i] + self.interval
+
+        started = []
+        while self.active < self.max_concurrent:
+            i = self._most_overdue(now, exclude=started)
+            if i is None:
+                break
+            started.append(i)
+            try:
+                self.sensors[i].start_fan_cleaning()
+            except (OSError, SEN5x.CRCError, SEN5x.ReadError, SEN5x.InvalidMode):
+                self.errors += 1
+                continue
+            self.cleaning[i] = True
+            self.started[i] = now
+            self.cleanings += 1
+        return [i for i in started if self.cleaning[i]]
+
+    def _most_overdue(self, now: int, exclude: list[int]) -> [int, None]:
+        """ Index of unit due earliest with due time <= now, not cleaning and not tried this poll """
+        best = None
+        for i in range(len(self.sensors)):
+            if self.cleaning[i] or i in exclude or self.due[i] > now:
+                continue
+            if best is None or self.due[i] < self.due[best]:
+                best = i
+        return best
+
+    def _stagger(self, now: int) -> None:
+        """ Due times from last cleaned, units never cleaned are spread evenly over the next interval """
+        unknown = [i for i in range(len(self.sensors)) if self.last_cleaned[i] is None]
+        for i in range(len(self.sensors)):
+            if self.last_cleaned[i] is not None:
+                self.due[i] = self.last_cleaned[i] + self.interval
+        for n, i in enumerate(unknown):
+            self.due[i] = now + self.interval * (n + 1) // len(unknown)
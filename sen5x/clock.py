@@ -0,0 +1,70 @@
+from time import time
+from sen5x.compat import sleep_ms, sleep_us, ticks_ms, ticks_us, ticks_diff
+
+
+class Clock:
+    """
+    Time source for SEN5x and helpers: ticks, sleeps and time() in seconds
+    See README.md for details
+
+    Methods are the system functions stored on the instance, so calls cost no more than calling them directly
+
+    Usage:
+        sen = SEN5x(i2c, clock=Clock())  # default
+    """
+    def __init__(self):
+        self.ticks_ms = ticks_ms
+        self.ticks_us = ticks_us
+        self.ticks_diff = ticks_diff
+        self.sleep_ms = sleep_ms
+        self.sleep_us = sleep_us
+        self.time = time
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}()'
+
+
+class VirtualClock:
+    """
+    Clock that only moves when slept or advanced, for tests & simulation without waiting
+    Share one instance between SEN5x and SimulatedSEN5x
+
+    Usage:
+        clock = VirtualClock()
+        sen = SEN5x(SimulatedSEN5x(clock=clock), clock=clock)
+        sen.start_measurement()  # returns immediately, clock advanced ~1 s
+        clock.advance(7 * 24 * 3600 * 1000)  # a week
+    """
+    def __init__(self, start_ms: int = 0, epoch: int = 0):
+        """ epoch is time() in seconds at start_ms """
+        self._us = start_ms * 1000
+        self._epoch_us = epoch * 1000000 - self._us
+        self.slept_us = 0  # total virtual time slept
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}(start_ms={self.ticks_ms()})'
+
+    def ticks_ms(self) -> int:
+        return self._us // 1000
+
+    def ticks_us(self) -> int:
+        return self._us
+
+    @staticmethod
+    def ticks_diff(ticks1: int, ticks2: int) -> int:
+        return ticks1 - ticks2  # doesn't wrap
+
+    def sleep_ms(self, ms: int) -> None:
+        self.slept_us += ms * 1000
+        self._us += ms * 1000
+
+    def sleep_us(self, us: int) -> None:
+        self.slept_us += us
+        self._us += us
+
+    def advance(self, ms: int) -> None:
+        """ Moves time forward without counting it as slept """
+        self._us += ms * 1000
+
+    def time(self) -> int:
+        return (self._epoch_us + self._us) // 1000000
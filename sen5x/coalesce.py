@@ -0,0 +1,151 @@
+from _thread import allocate_lock
+from sen5x.compat import const
+from sen5x.sen5x import SEN5x
+
+
+class CoalescingSEN5x:
+    """
+    Shares SEN5x reads between threads and coroutines reading on their own schedules
+    See README.md for details
+
+    Measured values (all forms share one MEASURED_VALUES read) are cached until ttl_ms after their frame was first seen,
+    SEN5x produces a new sample every second so by default a read is served from cache until the next one can exist
+    Re-reading the same frame (e.g. after invalidation) keeps that cadence instead of restarting ttl_ms,
+    identical consecutive samples can't be told apart and are timed as one frame per ttl_ms
+    Status is cached for ttl_ms from its read
+    One transaction is in flight at a time (SEN5x buffers are shared), callers arriving meanwhile wait for it
+    and get its result instead of starting another
+    Mode changes & other commands go through this class (or call()) and invalidate the cache
+    avoided counts reads served without a transaction, coalesced those of them that waited for one in flight
+
+    Usage:
+        shared = CoalescingSEN5x(sen)
+        shared.start()
+        values = shared.measured_values  # from any thread, at most one MEASURED_VALUES read per ttl_ms
+        status = shared.status
+        serial_number = shared.call(lambda: sen.serial_number)
+    """
+    SAMPLE_INTERVAL = const(1000)  # ms, SEN5x measurement period
+    MEASURED, STATUS = 0, 1
+
+    def __init__(self, sen: SEN5x, ttl_ms: int = SAMPLE_INTERVAL):
+        self.sen = sen
+        self.ttl_ms = ttl_ms
+        self.transactions = 0  # reads made
+        self.avoided = 0  # reads served from cache
+        self.coalesced = 0  # of avoided, waited for a read in flight
+        self._lock = allocate_lock()
+        self._values = [None, None]  # per key
+        self._times = [0, 0]  # ticks_ms when read per key
+        self._ttls = [0, 0]  # ms from read until expired per key
+        self._frame = None  # measured values ticks last read
+        self._frame_seen = 0  # ticks_ms when _frame was first seen
+
+    @property
+    def measured_values(self) -> tuple[int, int, int, int, int, float, int, int]:
+        return SEN5x._round_measured_values(*self._get(self.MEASURED)[1])
+
+    @property
+    def measured_values_imperial(self) -> tuple[int, int, int, int, int, int, int, int]:
+        return SEN5x._round_measured_values(*self._get(self.MEASURED)[1], metric=False)
+
+    @property
+    def measured_values_raw(self) -> tuple[float, float, float, float, float, float, float, float]:
+        return self._get(self.MEASURED)[1]
+
+    @property
+    def measured_values_ticks(self) -> tuple[int, int, int, int, int, int, int, int]:
+        return self._get(self.MEASURED)[0]
+
+    @property
+    def status(self) -> int:
+        return self._get(self.STATUS)
+
+    @property
+    def fan_cleaning_active(self) -> bool:
+        return bool(self.status & SEN5x.FAN_CLEANING_ACTIVE_MASK)
+
+    def invalidate(self) -> None:
+        self._values[self.MEASURED] = None
+        self._values[self.STATUS] = None
+
+    def call(self, func, *args):
+        """ Returns func(*args) run with no read in flight, then invalidates the cache """
+        with self._lock:
+            try:
+                return func(*args)
+            finally:
+                self.invalidate()
+
+    def start(self) -> None:
+        self.call(self.sen.start)
+
+    def stop(self) -> None:
+        self.call(self.sen.stop)
+
+    def start_measurement(self, num_checks: int = 100) -> bool:
+        return self.call(self.sen.start_measurement, num_checks)
+
+    def start_measurement_rht_gas_only_mode(self, num_checks: int = 100) -> bool:
+        return self.call(self.sen.start_measurement_rht_gas_only_mode, num_checks)
+
+    def stop_measurement(self) -> None:
+        self.call(self.sen.stop_measurement)
+
+    def start_fan_cleaning(self) -> None:
+        self.call(self.sen.start_fan_cleaning)
+
+    def clear_status(self) -> None:
+        self.call(self.sen.clear_status)
+
+    def reset(self) -> None:
+        self.call(self.sen.reset)
+
+    def _get(self, key: int):
+        value = self._cached(key)
+        if value is not None:
+            self.avoided += 1
+            return value
+        waited = not self._lock.acquire(0)
+        if waited:
+            self._lock.acquire()
+        try:
+            value = self._cached(key)
+            if value is not None:  # read by the caller waited for
+                self.avoided += 1
+                if waited:
+                    self.coalesced += 1
+                return value
+            now = self.sen.clock.ticks_ms()
+            value = self._read(key)
+            self.transactions += 1
+            self._ttls[key] = self.ttl_ms if key == self.STATUS else self._frame_ttl(value[0], now)
+            self._values[key] = value
+            self._times[key] = now  # fresh once set
+            return value
+        finally:
+            self._lock.release()
+
+    def _cached(self, key: int):
+        """ Cached value if within ttl_ms, otherwise None """
+        value = self._values[key]
+        clock = self.sen.clock
+        if value is None or clock.ticks_diff(clock.ticks_ms(), self._times[key]) >= self._ttls[key]:
+            return None
+        return value
+
+    def _frame_ttl(self, ticks: tuple, now: int) -> int:
+        """ ms from now until ttl_ms after ticks were first seen, modulo ttl_ms for a frame seen for longer """
+        if ticks != self._frame:  # new frame
+            self._frame = ticks
+            self._frame_seen = now
+            return self.ttl_ms
+        if self.ttl_ms <= 0:
+            return 0
+        return self.ttl_ms - self.sen.clock.ticks_diff(now, self._frame_seen) % self.ttl_ms
+
+    def _read(self, key: int):
+        if key == self.STATUS:
+            return self.sen.status
+        ticks = self.sen.measured_values_ticks
+        return ticks, SEN5x._scale_measured_values(*ticks)
@@ -0,0 +1,29 @@
+"""
+MicroPython builtins with CPython fallbacks
+Allows the driver to run on a host, e.g. replaying traces or behind a Linux I2C bus
+"""
+try:
+    from micropython import const
+except ImportError:  # CPython
+    def const(value: int) -> int:
+        return value
+
+try:
+    from time import sleep_ms, sleep_us, ticks_ms, ticks_us, ticks_diff
+except ImportError:  # CPython, ticks don't wrap
+    from time import sleep, perf_counter_ns
+
+    def sleep_ms(ms: int) -> None:
+        sleep(ms / 1000)
+
+    def sleep_us(us: int) -> None:
+        sleep(us / 1000000)
+
+    def ticks_ms() -> int:
+        return perf_counter_ns() // 1000000
+
+    def ticks_us() -> int:
+        return perf_counter_ns() // 1000
+
+    def ticks_diff(ticks1: int, ticks2: int) -> int:
+        return ticks1 - ticks2
@@ -0,0 +1,257 @@
+"""
+Prometheus exporter for SEN5x on Linux hosts (CPython)
+See README.md for details
+
+One acquisition thread per sensor is the only user of that sensor and replaces an in-memory snapshot after each read
+Scrapes render the latest snapshots, so any number of scrapers cost no extra bus transactions
+and scrape latency doesn't depend on bus timing
+
+Usage:
+    python -m sen5x.exporter --sensor 1:0x69 --sensor 1:0x6A --port 9105
+    python -m sen5x.exporter --simulate
+"""
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, time
+from sen5x.sen5x import SEN5x
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+MEASURED_VALUE_METRICS = (  # (index in measured_values_raw, name, help)
+    (0, 'sen5x_pm1_0_micrograms_per_cubic_meter', 'PM1.0 mass concentration'),
+    (1, 'sen5x_pm2_5_micrograms_per_cubic_meter', 'PM2.5 mass concentration'),
+    (2, 'sen5x_pm4_0_micrograms_per_cubic_meter', 'PM4.0 mass concentration'),
+    (3, 'sen5x_pm10_0_micrograms_per_cubic_meter', 'PM10.0 mass concentration'),
+    (4, 'sen5x_relative_humidity_percent', 'Relative humidity'),
+    (5, 'sen5x_temperature_celsius', 'Temperature'),
+    (6, 'sen5x_voc_index', 'VOC index'),
+    (7, 'sen5x_nox_index', 'NOx index'),
+)
+STATUS_BITS = SEN5x.STATUS_ERRORS + ((SEN5x.FAN_CLEANING_ACTIVE_MASK, 'Fan Cleaning Active'),)
+
+
+class Collector(threading.Thread):
+    """
+    Acquisition loop for one SEN5x
+    snapshot is replaced as a whole after every read and never modified, so readers need no lock
+    Any error ends only the read, the loop keeps running and the snapshot reports up False without values
+    """
+    def __init__(self,
+                 sen: SEN5x,
+                 bus: str = '',
+                 interval: float = 1.0,
+                 status_interval: float = 10.0,
+                 start_measurement: bool = True,
+                 ):
+        super().__init__(daemon=True)
+        self.sen = sen
+        self.bus = bus
+        self.interval = interval
+        self.status_interval = status_interval
+        self.start_measurement = start_measurement
+        self.info = None  # dict of product, serial & firmware once attached
+        self.snapshot = None  # dict, see collect()
+        self._values = None
+        self._status = None
+        self._status_time = None
+        self._reads = 0
+        self._errors = 0
+        self._read_seconds = 0.0
+        self._stop_event = threading.Event()
+
+    def attach(self) -> None:
+        """ Reads product info and starts measurement """
+        if self.start_measurement:
+            self.sen.start()
+        self.info = {
+            'product': self.sen.product_name,
+            'serial': self.sen.serial_number,
+            'firmware': str(self.sen.firmware_version),
+        }
+
+    def collect(self) -> dict:
+        """ One acquisition, returns new snapshot """
+        start = perf_counter()
+        up = True
+        try:
+            if self.info is None:
+                self.attach()
+            self._values = self.sen.measured_values_raw
+            now = time()
+            if self._status_time is None or now - self._status_time >= self.status_interval:
+                self._status = self.sen.status
+                self._status_time = now
+        except (OSError, SEN5x.NotFoundError, SEN5x.CRCError, SEN5x.ReadError, SEN5x.StatusError):
+            self._errors += 1
+            up = False
+        return self._publish(up, perf_counter() - start)
+
+    def _publish(self, up: bool, duration: float) -> dict:
+        """ Replaces snapshot, values & status of an earlier read aren't current when down """
+        self._reads += 1
+        self._read_seconds += duration
+        self.snapshot = {
+            'up': up,
+            'info': self.info,
+            'values': self._values if up else None,
+            'status': self._status if up else None,
+            'timestamp': time(),
+            'reads': self._reads,
+            'errors': self._errors,
+            'read_seconds': self._read_seconds,
+            'last_read_seconds': duration,
+            'lock_contentions': self.sen.lock_contentions,
+            'lock_wait_seconds': self.sen.lock_wait_us / 1000000,
+        }
+        return self.snapshot
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            start = perf_counter()
+            try:
+                self.collect()
+            except Exception:  # e.g. ValueError or SEN5x.NotSupportedError, must not end the thread silently
+                self._errors += 1
+                self._publish(False, perf_counter() - start)
+            self._stop_event.wait(max(0.0, self.interval - (perf_counter() - start)))
+        try:
+            self.sen.stop()
+        except OSError:
+            pass
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def render(collectors: list[Collector]) -> str:
+    """ Prometheus text format for the latest snapshot of each collector """
+    snapshots = [(collector, collector.snapshot) for collector in collectors if collector.snapshot is not None]
+    lines = []
+
+    def metric(name: str, metric_type: str, description: str, samples) -> None:
+        samples = list(samples)
+        if not samples:
+            return
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for sample_labels, value in samples:
+            lines.append(f'{name}{{{sample_labels}}} {value}')
+
+    def labels(collector: Collector, snapshot: dict, **extra) -> str:
+        info = snapshot['info'] or {}
+        pairs = {'bus': collector.bus, 'address': hex(collector.sen.address), 'serial': info.get('serial', '')}
+        pairs.update(extra)
+        return ','.join(f'{key}="{_escape(value)}"' for key, value in pairs.items())
+
+    metric('sen5x_up', 'gauge', 'Last read succeeded',
+           ((labels(c, s), int(s['up'])) for c, s in snapshots))
+    metric('sen5x_info', 'gauge', 'Product information',
+           ((labels(c, s, product=s['info']['product'], firmware=s['info']['firmware']), 1)
+            for c, s in snapshots if s['info'] is not None))
+    for index, name, description in MEASURED_VALUE_METRICS:
+        metric(name, 'gauge', description,
+               ((labels(c, s), s['values'][index]) for c, s in snapshots
+                if s['values'] is not None and s['values'][index] is not None))
+    metric('sen5x_status', 'gauge', 'Device status register',
+           ((labels(c, s), s['status']) for c, s in snapshots if s['status'] is not None))
+    metric('sen5x_status_bit', 'gauge', 'Device status bits',
+           ((labels(c, s, bit=description.lower().replace(' ', '_')), int(bool(s['status'] & mask)))
+            for c, s in snapshots if s['status'] is not None for mask, description in STATUS_BITS))
+    metric('sen5x_last_read_timestamp_seconds', 'gauge', 'Time of last read',
+           ((labels(c, s), s['timestamp']) for c, s in snapshots))
+    metric('sen5x_read_errors_total', 'counter', 'Failed reads',
+           ((labels(c, s), s['errors']) for c, s in snapshots))
+    if snapshots:
+        lines.append('# HELP sen5x_read_duration_seconds Time to read measured values (and status when due)')
+        lines.append('# TYPE sen5x_read_duration_seconds summary')
+        for c, s in snapshots:
+            lines.append(f'sen5x_read_duration_seconds_sum{{{labels(c, s)}}} {s["read_seconds"]}')
+            lines.append(f'sen5x_read_duration_seconds_count{{{labels(c, s)}}} {s["reads"]}')
+    metric('sen5x_last_read_duration_seconds', 'gauge', 'Time to read measured values in last acquisition',
+           ((labels(c, s), s['last_read_seconds']) for c, s in snapshots))
+    metric('sen5x_bus_lock_contentions_total', 'counter', 'Times the shared bus was busy when needed',
+           ((labels(c, s), s['lock_contentions']) for c, s in snapshots))
+    metric('sen5x_bus_lock_wait_seconds_total', 'counter', 'Time spent waiting for the shared bus',
+           ((labels(c, s), s['lock_wait_seconds']) for c, s in snapshots))
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """ Serves GET /metrics from collector snapshots """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], collectors: list[Collector]):
+        super().__init__(address, _MetricsHandler)
+        self.collectors = collectors
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render(self.server.collectors).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # scrapes are too frequent to log
+        pass
+
+
+def main(args: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m sen5x.exporter', description=__doc__.split('\n')[1])
+    parser.add_argument('--sensor', action='append', default=[], metavar='BUS:ADDRESS',
+                        help=f'I2C bus number and address, e.g. 1:{hex(SEN5x.DEFAULT_I2C_ADDR)} (repeatable)')
+    parser.add_argument('--host', default='', help='address to listen on (default all)')
+    parser.add_argument('--port', type=int, default=9105, help='port to listen on (default 9105)')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between reads (default 1)')
+    parser.add_argument('--status-interval', type=float, default=10.0,
+                        help='seconds between status reads (default 10)')
+    parser.add_argument('--no-start', action='store_true', help='attach to sensors already measuring')
+    parser.add_argument('--simulate', action='store_true', help='use simulated sensors instead of I2C buses')
+    options = parser.parse_args(args)
+
+    collectors = []
+    buses = {}  # bus number: (I2C, lock shared by sensors on the bus)
+    for spec in options.sensor or [f'1:{hex(SEN5x.DEFAULT_I2C_ADDR)}']:
+        bus, _, address = spec.partition(':')
+        address = int(address, 0) if address else SEN5x.DEFAULT_I2C_ADDR
+        if options.simulate:
+            from sen5x.simulator import SimulatedSEN5x
+            i2c, lock = SimulatedSEN5x(address=address), None
+        else:
+            if bus not in buses:
+                from sen5x.linux_i2c import LinuxI2C
+                buses[bus] = (LinuxI2C(int(bus)), threading.Lock())
+            i2c, lock = buses[bus]
+        collectors.append(Collector(SEN5x(i2c, address=address, lock=lock),
+                                    bus=bus,
+                                    interval=options.interval,
+                                    status_interval=options.status_interval,
+                                    start_measurement=not options.no_start))
+
+    server = MetricsServer((options.host, options.port), collectors)
+    for collector in collectors:
+        collector.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for collector in collectors:
+            collector.stop()
+        for collector in collectors:
+            collector.join()
+
+
+if __name__ == '__main__':
+    main()
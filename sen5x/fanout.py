@@ -0,0 +1,106 @@
+class FanOut:
+    """
+    Publishes each sample once into preallocated slots for any number of subscribers
+    See README.md for details
+
+    Slots hold a reference to the published sample (e.g. the tuple returned by SEN5x.measured_values),
+    every subscriber gets that same object, nothing is copied per subscriber
+    Each subscriber has its own cursor and policy for when it falls behind:
+        LATEST  only the newest sample is returned, older ones are skipped
+        QUEUE   up to limit samples are kept, older ones are dropped
+        BLOCK   nothing is dropped, publish() refuses new samples while this subscriber is depth - 1 behind
+    publish() costs O(BLOCK subscribers) and allocates nothing, subscribers catch up when they pop
+    Samples may be published from a micropython.schedule() callback while subscribers pop in the main loop
+
+    Usage:
+        fan = FanOut(depth=8)
+        display = fan.subscribe(FanOut.LATEST)
+        logger = fan.subscribe(FanOut.BLOCK)
+        uplink = fan.subscribe(FanOut.QUEUE, limit=4)
+        fan.publish(sen.measured_values, timestamp=ticks_ms())
+        values = uplink.pop()  # None if nothing new, uplink.timestamp is its timestamp
+    """
+    LATEST, QUEUE, BLOCK = 0, 1, 2
+
+    def __init__(self, depth: int = 8):
+        if depth < 2:
+            raise ValueError('Depth out of range')
+        self.depth = depth
+        self.subscribers = []
+        self.blocked = 0  # samples refused because a BLOCK subscriber was full
+        self._samples = [None] * depth
+        self._timestamps = [0] * depth  # small ints, assignment doesn't allocate
+        self._written = 0  # samples published, only changed by publish()
+
+    @property
+    def published(self) -> int:
+        return self._written
+
+    def subscribe(self, policy: int = QUEUE, limit: int = None) -> 'Subscriber':
+        """ Subscriber receiving samples published from now on, limit (QUEUE) defaults to depth - 1 """
+        subscriber = Subscriber(self, policy, self.depth - 1 if limit is None else limit)
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: 'Subscriber') -> None:
+        self.subscribers.remove(subscriber)
+
+    def publish(self, sample, timestamp: int = 0) -> bool:
+        """ Returns False (sample not published) if a BLOCK subscriber hasn't made room """
+        written = self._written
+        for subscriber in self.subscribers:
+            if subscriber.policy == self.BLOCK and written - subscriber._cursor >= self.depth - 1:
+                self.blocked += 1
+                return False
+        slot = written % self.depth
+        self._samples[slot] = sample
+        self._timestamps[slot] = timestamp
+        self._written = written + 1  # publish slot after filling
+        return True
+
+
+class Subscriber:
+    """
+    Cursor of one consumer of a FanOut, see FanOut.subscribe()
+    dropped counts samples skipped (LATEST) or dropped (QUEUE) because this subscriber fell behind
+    """
+    def __init__(self, fanout: FanOut, policy: int, limit: int):
+        if policy not in (FanOut.LATEST, FanOut.QUEUE, FanOut.BLOCK):
+            raise ValueError('Policy out of range')
+        if not 1 <= limit < fanout.depth:
+            raise ValueError('Limit out of range')
+        self.fanout = fanout
+        self.policy = policy
+        self.limit = 1 if policy == FanOut.LATEST else limit if policy == FanOut.QUEUE else fanout.depth - 1
+        self.received = 0  # samples returned by pop()
+        self.dropped = 0
+        self.timestamp = 0  # of sample last returned by pop()
+        self._cursor = fanout._written  # next sample to return
+
+    @property
+    def available(self) -> int:
+        """ Samples pop() would return before running out, after dropping """
+        return min(self.fanout._written - self._cursor, self.limit)
+
+    def pop(self):
+        """ Returns next sample as published (not a copy), or None if none available """
+        fanout = self.fanout
+        while True:
+            written = fanout._written
+            cursor = self._cursor
+            if written - cursor > self.limit:
+                self.dropped += written - cursor - self.limit
+                cursor = written - self.limit
+            if cursor == written:
+                self._cursor = cursor
+                return None
+            slot = cursor % fanout.depth
+            sample = fanout._samples[slot]
+            timestamp = fanout._timestamps[slot]
+            if fanout._written - cursor < fanout.depth:  # slot wasn't reused while reading
+                break
+            self._cursor = cursor  # publisher lapped us, drop and retry
+        self._cursor = cursor + 1
+        self.timestamp = timestamp
+        self.received += 1
+        return sample
@@ -0,0 +1,151 @@
+from array import array
+from sen5x.compat import const
+from sen5x.sen5x import SEN5x
+
+
+class RunningMedian:
+    """
+    Running median over a small window per channel of SEN5x measured values ticks
+    See README.md for details
+
+    Windows are kept sorted in preallocated arrays, each update costs O(window) per channel and allocates nothing
+    update() returns a bitmask of flagged channels (bit i for channel i) and fills values:
+        values holds the median per channel
+        a channel is flagged if it deviates from the median by more than its threshold (ticks, None to never flag)
+    'unknown' ticks are passed through, not added to the window and not flagged
+
+    Usage:
+        f = RunningMedian(window=5, thresholds=(50, 50, 50, 50, 500, 200, 50, 50))
+        flags = f.update(sen.measured_values_ticks)
+        clean = f.values
+    """
+    CHANNELS = const(8)
+    UNKNOWN = SEN5x.UNKNOWN_TICKS
+
+    def __init__(self, window: int = 5, thresholds: tuple = None):
+        if window < 3:
+            raise ValueError('Window out of range')
+        self.window = window
+        self.thresholds = thresholds
+        self.values = array('l', [0] * self.CHANNELS)  # output of last update
+        self.flagged = 0  # samples with at least one channel flagged
+        self._history = array('l', [0] * self.CHANNELS * window)  # ring per channel, oldest at _next
+        self._sorted = array('l', [0] * self.CHANNELS * window)  # sorted window per channel
+        self._counts = array('l', [0] * self.CHANNELS)  # samples in window per channel
+        self._next = array('l', [0] * self.CHANNELS)  # next slot in history ring per channel
+
+    def update(self, ticks: tuple) -> int:
+        """ Adds ticks as returned by SEN5x.measured_values_ticks, returns bitmask of flagged channels """
+        flags = 0
+        for channel in range(self.CHANNELS):
+            tick = ticks[channel]
+            if tick == self.UNKNOWN[channel]:
+                self.values[channel] = tick
+                continue
+            self._insert(channel, tick)
+            median = self._median(channel)
+            if self._is_outlier(channel, tick, median):
+                flags |= 1 << channel
+            self._output(channel, tick, median, flags & (1 << channel))
+        if flags:
+            self.flagged += 1
+        return flags
+
+    def _output(self, channel: int, tick: int, median: int, flagged: int) -> None:
+        self.values[channel] = median
+
+    def _is_outlier(self, channel: int, tick: int, median: int) -> bool:
+        if self.thresholds is None or self.thresholds[channel] is None:
+            return False
+        deviation = tick - median
+        return deviation > self.thresholds[channel] or -deviation > self.thresholds[channel]
+
+    def _insert(self, channel: int, tick: int) -> None:
+        """ Replaces oldest tick in window with tick, keeping window sorted """
+        window = self.window
+        base = channel * window
+        history = self._history
+        s = self._sorted
+        count = self._counts[channel]
+        slot = self._next[channel]
+        if count < window:  # filling, append at end then insertion sort into place
+            i = base + count
+            self._counts[channel] = count + 1
+            count += 1
+        else:  # find oldest in sorted window and overwrite it
+            oldest = history[base + slot]
+            i = base
+            while s[i] != oldest:
+                i += 1
+        history[base + slot] = tick
+        self._next[channel] = (slot + 1) % window
+        end = base + count
+        while i > base and s[i - 1] > tick:  # shift larger values right
+            s[i] = s[i - 1]
+            i -= 1
+        while i < end - 1 and s[i + 1] < tick:  # shift smaller values left
+            s[i] = s[i + 1]
+            i += 1
+        s[i] = tick
+
+    def _median(self, channel: int) -> int:
+        """ Middle (lower middle if even) of sorted window """
+        return self._sorted[channel * self.window + (self._counts[channel] - 1) // 2]
+
+
+class Hampel(RunningMedian):
+    """
+    Hampel filter: flags a channel if it deviates from the running median by more than
+    k scaled median absolute deviations (k * 1.4826 * MAD)
+    values holds the median for flagged channels and the input tick otherwise
+    MAD is found in O(window) by walking outwards from the median of the sorted window
+    min_mad (ticks) avoids flagging every change of a steady signal whose MAD is 0
+
+    Usage:
+        f = Hampel(window=7, k=3)
+        flags = f.update(sen.measured_values_ticks)
+        clean = f.values
+    """
+    MAD_SCALE = const(1483)  # 1.4826 in thousandths, MAD to standard deviation for normal distribution
+
+    def __init__(self, window: int = 7, k: float = 3, min_mad: int = 1):
+        super().__init__(window=window)
+        self.min_mad = min_mad
+        self._k_scale = int(k * self.MAD_SCALE + 0.5)  # thousandths
+
+    def _output(self, channel: int, tick: int, median: int, flagged: int) -> None:
+        self.values[channel] = median if flagged else tick
+
+    def _is_outlier(self, channel: int, tick: int, median: int) -> bool:
+        count = self._counts[channel]
+        if count < 3:
+            return False
+        mad = self._mad(channel, median)
+        if mad < self.min_mad:
+            mad = self.min_mad
+        deviation = tick - median
+        if deviation < 0:
+            deviation = -deviation
+        return deviation * 1000 > self._k_scale * mad
+
+    def _mad(self, channel: int, median: int) -> int:
+        """
+        Median of absolute deviations from median
+        Deviations grow walking left and right from the median in the sorted window, so merge both walks
+        """
+        s = self._sorted
+        base = channel * self.window
+        count = self._counts[channel]
+        middle = base + (count - 1) // 2
+        left = middle - 1
+        right = middle + 1
+        end = base + count
+        deviation = 0  # of median itself
+        for _ in range((count - 1) // 2):
+            if right >= end or (left >= base and median - s[left] <= s[right] - median):
+                deviation = median - s[left]
+                left -= 1
+            else:
+                deviation = s[right] - median
+                right += 1
+        return deviation
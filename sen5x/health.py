@@ -0,0 +1,95 @@
+from sen5x.sen5x import SEN5x
+
+
+class HealthMonitor:
+    """
+    Monitors SEN5x health with one DEVICE_STATUS read per interval instead of one per sample
+    See README.md for details
+
+    All error bits in SEN5x.STATUS_ERRORS are latched with the time (sen.clock.time()) first and last seen
+    Measured values are paused (None) while fan cleaning is active
+    Status is polled faster while cleaning so sampling resumes promptly
+
+    Usage:
+        health = HealthMonitor(sen, interval_ms=60000)
+        while True:
+            values = health.measured_values  # None while fan cleaning
+            if health.latched:
+                print(health.errors)
+    """
+    def __init__(self, sen: SEN5x, interval_ms: int = 60000, cleaning_interval_ms: int = 1000):
+        self.sen = sen
+        self.interval_ms = interval_ms
+        self.cleaning_interval_ms = cleaning_interval_ms
+        self.status = 0  # last status read
+        self.latched = 0  # error bits seen since clear()
+        self.first_seen = [None] * len(SEN5x.STATUS_ERRORS)  # time error bit first seen
+        self.last_seen = [None] * len(SEN5x.STATUS_ERRORS)  # time error bit last seen
+        self.polls = 0  # status reads
+        self._last_poll = None  # ticks_ms
+
+    @property
+    def cleaning(self) -> bool:
+        """ Fan cleaning active as of last status read, sampling is paused """
+        return bool(self.status & SEN5x.FAN_CLEANING_ACTIVE_MASK)
+
+    @property
+    def errors(self) -> list[str]:
+        """ Descriptions of latched error bits """
+        return [description for mask, description in SEN5x.STATUS_ERRORS if self.latched & mask]
+
+    @property
+    def measured_values(self) -> [tuple[int, int, int, int, int, float, int, int], None]:
+        """ As SEN5x.measured_values, or None while fan cleaning is active """
+        return None if self._paused() else self.sen.measured_values
+
+    @property
+    def measured_values_raw(self) -> [tuple[float, float, float, float, float, float, float, float], None]:
+        """ As SEN5x.measured_values_raw, or None while fan cleaning is active """
+        return None if self._paused() else self.sen.measured_values_raw
+
+    def poll(self, force: bool = False) -> bool:
+        """
+        Reads status if interval elapsed (or force=True)
+        Returns True if status was read
+        """
+        clock = self.sen.clock
+        now = clock.ticks_ms()
+        interval = self.cleaning_interval_ms if self.cleaning else self.interval_ms
+        if not force and self._last_poll is not None and clock.ticks_diff(now, self._last_poll) < interval:
+            return False
+        self._last_poll = now
+        self.polls += 1
+        self._update(self.sen.status)
+        return True
+
+    def start_fan_cleaning(self) -> None:
+        """ Starts fan cleaning and pauses sampling without waiting for next status read """
+        self.sen.start_fan_cleaning()
+        self.status |= SEN5x.FAN_CLEANING_ACTIVE_MASK
+        self._last_poll = self.sen.clock.ticks_ms()
+
+    def clear(self) -> None:
+        """ Clears SEN5x status and latched errors, then re-reads status """
+        self.sen.clear_status()
+        self.latched = 0
+        for i in range(len(SEN5x.STATUS_ERRORS)):
+            self.first_seen[i] = None
+            self.last_seen[i] = None
+        self.poll(force=True)  # errors still present are latched again, cleaning as the SEN5x reports
+
+    def _paused(self) -> bool:
+        self.poll()
+        return self.cleaning
+
+    def _update(self, status: int) -> None:
+        self.status = status
+        now = None
+        for i, (mask, _) in enumerate(SEN5x.STATUS_ERRORS):
+            if status & mask:
+                if now is None:
+                    now = self.sen.clock.time()
+                if self.first_seen[i] is None:
+                    self.first_seen[i] = now
+                self.last_seen[i] = now
+                self.latched |= mask
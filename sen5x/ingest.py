@@ -0,0 +1,201 @@
+"""
+Parallel ingestion of SEN5x traces (see sen5x/trace.py) into columnar files per serial number (CPython)
+See README.md for details
+
+Files are sharded across a process pool, each worker memory-maps its file and walks the records,
+pairing reads with the command last written to the same address
+Measured values frames are gathered into one array per file and validated, checksummed & decoded with NumPy
+Output per serial number is one .npy file per column:
+    <output>/<serial>/file.npy      index of source file in <output>/files.txt
+    <output>/<serial>/time_us.npy   µs since start of source trace when the frame was read
+    <output>/<serial>/<field>.npy   ticks, as SEN5x.measured_values_ticks (FIELDS)
+Frames from an address whose serial number wasn't read in the same trace go to unknown_<address>
+
+Usage:
+    python -m sen5x.ingest --output fleet/ logs/*.trace
+"""
+import argparse
+import mmap
+import os
+import sys
+from multiprocessing import Pool
+from struct import Struct
+from time import perf_counter
+import numpy as np  # external library required, host only
+from sen5x import trace
+from sen5x.sen5x import SEN5x
+from sen5x.transport import CRC_TABLE as _CRC_TABLE, crc8
+
+FIELDS = ('pm1_0', 'pm2_5', 'pm4_0', 'pm10_0', 'rh', 't', 'voc', 'nox')  # as measured_values_ticks
+FRAME_SIZE = 24  # MEASURED_VALUES response, 8 words with checksums
+MIN_FRAME_SIZE = 12  # SEN50 provides 4 words
+CRC_TABLE = np.frombuffer(_CRC_TABLE, dtype=np.uint8)
+UNKNOWN_TICKS = np.array(SEN5x.UNKNOWN_TICKS, dtype=np.uint16)
+_RECORD = Struct(trace.RECORD_FORMAT)
+
+
+def decode_file(path: str) -> dict:
+    """
+    Returns {'frames', 'unavailable', 'crc_errors', 'bytes', 'sensors'} for one trace
+    sensors maps serial number (or unknown_<address>) to (time_us, ticks) arrays
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < len(trace.MAGIC):
+            raise ValueError('Not a trace')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            if m[:len(trace.MAGIC)] != trace.MAGIC:
+                raise ValueError('Not a trace')
+            offsets, lengths, times, addresses, serials = _scan(m, size)
+            present = np.arange(FRAME_SIZE) < lengths[:, None]  # bytes read, variants provide 4, 7 or 8 words
+            data = np.frombuffer(m, dtype=np.uint8)
+            frames = data[np.where(present, offsets[:, None] + np.arange(FRAME_SIZE), 0)]  # copy, mmap can be closed
+            del data
+
+    frames[~present] = 0xFF
+    words = frames.reshape(-1, 8, 3)
+    word_present = present[:, ::3]
+    unavailable = (frames == 0xFF).all(axis=1)
+    crc = CRC_TABLE[CRC_TABLE[0xFF ^ words[:, :, 0]] ^ words[:, :, 1]]  # transport.crc8 vectorized over all words
+    crc_ok = ((crc == words[:, :, 2]) | ~word_present).all(axis=1)
+    valid = ~unavailable & crc_ok
+    ticks = (words[valid, :, 0].astype(np.uint16) << 8) | words[valid, :, 1]
+    ticks = np.where(word_present[valid], ticks, UNKNOWN_TICKS)  # words not provided are 'unknown'
+    times = times[valid]
+    addresses = addresses[valid]
+
+    sensors = {}
+    for address in np.unique(addresses):
+        selected = addresses == address
+        key = serials.get(int(address), f'unknown_{hex(address)}')
+        sensors[key] = (times[selected], ticks[selected])
+    return {
+        'frames': int(valid.sum()),
+        'unavailable': int(unavailable.sum()),
+        'crc_errors': int((~unavailable & ~crc_ok).sum()),
+        'bytes': size,
+        'sensors': sensors,
+    }
+
+
+def _scan(m: mmap.mmap, size: int) -> tuple:
+    """
+    Walks records, returns (frame offsets, frame lengths, frame times, frame addresses, {address: serial number})
+    Only record headers are unpacked here, payloads are left in the mmap
+    """
+    unpack_record = _RECORD.unpack_from
+    offsets = []
+    lengths = []
+    times = []
+    addresses = []
+    serials = {}
+    commands = {}  # address: last command written
+    now_us = 0
+    offset = len(trace.MAGIC)
+    while offset + trace.RECORD_SIZE <= size:
+        op, address, _memaddr, length, delta_us = unpack_record(m, offset)
+        offset += trace.RECORD_SIZE
+        if offset + length > size:  # truncated record
+            break
+        now_us += delta_us
+        if op == trace.WRITE and length >= 2:
+            commands[address] = (m[offset] << 8) | m[offset + 1]
+        elif op == trace.READ:
+            command = commands.pop(address, None)
+            if command == SEN5x.MEASURED_VALUES and length >= MIN_FRAME_SIZE:
+                offsets.append(offset)
+                lengths.append(min(length, FRAME_SIZE) // 3 * 3)
+                times.append(now_us)
+                addresses.append(address)
+            elif command == SEN5x.SERIAL_NUMBER:
+                serial = _serial_number(m, offset, length)
+                if serial:
+                    serials[address] = serial
+        offset += length
+    return (np.array(offsets, dtype=np.int64), np.array(lengths, dtype=np.int64), np.array(times, dtype=np.int64),
+            np.array(addresses, dtype=np.uint8), serials)
+
+
+def _serial_number(m: mmap.mmap, offset: int, length: int) -> [str, None]:
+    """ As SEN5x.serial_number, None if any checksum fails """
+    chars = []
+    for i in range(offset, offset + min(length, 48) - 2, 3):
+        msb, lsb = m[i], m[i + 1]
+        if crc8(msb, lsb) != m[i + 2]:
+            return None
+        for c in (msb, lsb):
+            if c == 0:
+                return ''.join(chars)
+            chars.append(chr(c))
+    return ''.join(chars)
+
+
+def ingest(paths: list[str], output: str, workers: int = None, chunksize: int = 4) -> dict:
+    """
+    Decodes traces in parallel and writes columns per serial number to output directory
+    Returns totals: files, bytes, frames, unavailable, crc_errors, errors (unreadable files), seconds, sensors
+    """
+    start = perf_counter()
+    collected = {}  # serial: list of (file index, time_us, ticks)
+    totals = {'files': len(paths), 'bytes': 0, 'frames': 0, 'unavailable': 0, 'crc_errors': 0, 'errors': 0}
+    with Pool(workers) as pool:
+        for index, result in pool.imap_unordered(_decode_indexed, enumerate(paths), chunksize):
+            if result is None:
+                totals['errors'] += 1
+                continue
+            for key in ('bytes', 'frames', 'unavailable', 'crc_errors'):
+                totals[key] += result[key]
+            for serial, (times, ticks) in result['sensors'].items():
+                collected.setdefault(serial, []).append((index, times, ticks))
+
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, 'files.txt'), 'w') as f:
+        f.writelines(path + '\n' for path in paths)
+    for serial, parts in collected.items():
+        parts.sort(key=lambda part: part[0])  # source file order, independent of worker scheduling
+        directory = os.path.join(output, _safe_name(serial))
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'file.npy'),
+                np.concatenate([np.full(len(times), index, dtype=np.uint32) for index, times, _ in parts]))
+        np.save(os.path.join(directory, 'time_us.npy'), np.concatenate([times for _, times, _ in parts]))
+        ticks = np.concatenate([ticks for _, _, ticks in parts])
+        for i, field in enumerate(FIELDS):
+            column = ticks[:, i] if i < 4 else ticks[:, i].view(np.int16)  # rh, t, voc & nox are signed
+            np.save(os.path.join(directory, f'{field}.npy'), np.ascontiguousarray(column))
+    totals['sensors'] = len(collected)
+    totals['seconds'] = perf_counter() - start
+    return totals
+
+
+def _decode_indexed(item: tuple[int, str]) -> tuple[int, [dict, None]]:
+    index, path = item
+    try:
+        return index, decode_file(path)
+    except (OSError, ValueError) as e:
+        print(f'{path}: {e}', file=sys.stderr)
+        return index, None
+
+
+def _safe_name(serial: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in serial) or 'unnamed'
+
+
+def main(args: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m sen5x.ingest', description=__doc__.split('\n')[1])
+    parser.add_argument('paths', nargs='+', metavar='TRACE', help='trace files recorded by RecordingI2C')
+    parser.add_argument('--output', required=True, help='directory for columns per serial number')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default CPU count)')
+    parser.add_argument('--chunksize', type=int, default=4, help='files handed to a worker at a time (default 4)')
+    options = parser.parse_args(args)
+
+    totals = ingest(options.paths, options.output, workers=options.workers, chunksize=options.chunksize)
+    seconds = totals['seconds']
+    print(f"{totals['files']} files ({totals['errors']} unreadable), {totals['bytes'] / 1e6:.1f} MB, "
+          f"{totals['sensors']} sensors")
+    print(f"{totals['frames']} frames ({totals['unavailable']} not ready, {totals['crc_errors']} checksum errors) "
+          f"in {seconds:.2f} s")
+    print(f"{totals['frames'] / seconds:.0f} frames/s, {totals['bytes'] / 1e6 / seconds:.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
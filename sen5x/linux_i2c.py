@@ -0,0 +1,53 @@
+import os
+from fcntl import ioctl
+
+
+class LinuxI2C:
+    """
+    Linux /dev/i2c-<bus> with the subset of machine.I2C used by SEN5x, for running the driver on a host (CPython)
+    See README.md for details
+
+    Usage:
+        sen = SEN5x(LinuxI2C(1))
+    """
+    I2C_SLAVE = 0x0703  # ioctl, see linux/i2c-dev.h
+
+    def __init__(self, bus: int):
+        self.bus = bus
+        self._fd = os.open(f'/dev/i2c-{bus}', os.O_RDWR)
+        self._addr = None
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.bus})'
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def scan(self) -> list[int]:
+        found = []
+        for addr in range(0x08, 0x78):
+            try:
+                self._select(addr)
+                os.read(self._fd, 1)
+            except OSError:
+                continue
+            found.append(addr)
+        return found
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        self._select(addr)
+        return os.write(self._fd, bytes(buf))
+
+    def readfrom_into(self, addr: int, buf, stop: bool = True) -> None:
+        self._select(addr)
+        data = os.read(self._fd, len(buf))
+        buf[:len(data)] = data
+
+    def writeto_mem(self, addr: int, memaddr: int, buf, *, addrsize: int = 8) -> None:
+        self._select(addr)
+        os.write(self._fd, memaddr.to_bytes(addrsize // 8, 'big') + bytes(buf))
+
+    def _select(self, addr: int) -> None:
+        if addr != self._addr:
+            ioctl(self._fd, self.I2C_SLAVE, addr)
+            self._addr = addr
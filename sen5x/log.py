@@ -0,0 +1,135 @@
+from struct import pack, pack_into, unpack_from
+from time import time
+from sen5x.compat import const
+from sen5x.sen5x import SEN5x
+
+
+class SampleLog:
+    """
+    Append-only log of SEN5x measured values ticks with a sparse time index
+    See README.md for details
+
+    Records are fixed size and appended to <name>.bin
+    The timestamp & offset of every <block_records>th record is appended to side file <name>.idx
+    Range queries binary search the index and seek straight to the first block that can match,
+    then stream records until past the end time, instead of scanning the log from the start
+    Timestamps must not go backwards (set the RTC before logging)
+
+    Usage:
+        log = SampleLog()
+        while True:
+            log.append(sen.measured_values_ticks)
+        for timestamp, (pm2_5,) in log.query(start, end, fields=('pm2_5',)):
+            ...
+    """
+    FIELDS = ('pm1_0', 'pm2_5', 'pm4_0', 'pm10_0', 'rh', 't', 'voc', 'nox')  # as measured_values_ticks
+    RECORD_FORMAT = '>I4H4h'  # timestamp, ticks
+    RECORD_SIZE = const(20)
+    INDEX_FORMAT = '>II'  # timestamp, offset of first record in block
+    INDEX_SIZE = const(8)
+
+    def __init__(self, directory: str = SEN5x.DATA_DIR, name: str = 'samples', block_records: int = 64):
+        from tools import tools  # external library required
+        tools.create_dir(directory)
+        self.path = f'{directory}/{name}.bin'
+        self.index_path = f'{directory}/{name}.idx'
+        self.block_records = block_records
+        self._record = bytearray(self.RECORD_SIZE)
+        self._log = self._open(self.path)
+        self._index = self._open(self.index_path)
+        self.records = self._size(self._log) // self.RECORD_SIZE  # partial record from power loss is overwritten
+        self._index_entries = self._size(self._index) // self.INDEX_SIZE
+        self._repair_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, ticks: tuple, now: int = None) -> None:
+        """
+        Adds one sample of ticks as returned by SEN5x.measured_values_ticks
+        now is time() in seconds, defaults to current time
+        """
+        now = time() if now is None else now
+        offset = self.records * self.RECORD_SIZE
+        if self.records % self.block_records == 0:
+            self._add_index_entry(now, offset)
+        pack_into(self.RECORD_FORMAT, self._record, 0, now, *ticks)
+        self._log.seek(offset)
+        self._log.write(self._record)
+        self.records += 1
+
+    def query(self, start: int, end: int, fields: tuple = None):
+        """
+        Yields (timestamp, values) for records with start <= timestamp <= end
+        values are ticks of fields (names in FIELDS, default all) in the order given
+        """
+        self.flush()
+        indexes = tuple(range(len(self.FIELDS))) if fields is None else tuple(self.FIELDS.index(f) for f in fields)
+        buffer = bytearray(self.block_records * self.RECORD_SIZE)
+        offset = self._block_offset(start)
+        end_offset = self.records * self.RECORD_SIZE
+        while offset < end_offset:
+            self._log.seek(offset)
+            n = min(len(buffer), end_offset - offset) // self.RECORD_SIZE
+            self._log.readinto(buffer)
+            for i in range(n):
+                record = unpack_from(self.RECORD_FORMAT, buffer, i * self.RECORD_SIZE)
+                timestamp = record[0]
+                if timestamp > end:
+                    return
+                if timestamp >= start:
+                    yield timestamp, tuple(record[1 + j] for j in indexes)
+            offset += n * self.RECORD_SIZE
+
+    def flush(self) -> None:
+        self._log.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        self._log.close()
+        self._index.close()
+
+    def _block_offset(self, start: int) -> int:
+        """ Offset of last block starting before start, first block if none (binary search of index) """
+        low, high = 0, self._index_entries
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_entry(middle)[0] < start:  # equal timestamps may continue from previous block
+                low = middle + 1
+            else:
+                high = middle
+        return 0 if low == 0 else self._index_entry(low - 1)[1]
+
+    def _index_entry(self, i: int) -> tuple[int, int]:
+        self._index.seek(i * self.INDEX_SIZE)
+        return unpack_from(self.INDEX_FORMAT, self._index.read(self.INDEX_SIZE))
+
+    def _add_index_entry(self, timestamp: int, offset: int) -> None:
+        self._index.seek(self._index_entries * self.INDEX_SIZE)
+        self._index.write(pack(self.INDEX_FORMAT, timestamp, offset))
+        self._index_entries += 1
+
+    def _repair_index(self) -> None:
+        """ Adds index entries for blocks logged but not indexed, e.g. after power loss """
+        blocks = (self.records + self.block_records - 1) // self.block_records
+        if self._index_entries > blocks:  # log lost records the index points to
+            self._index_entries = blocks
+        while self._index_entries < blocks:
+            offset = self._index_entries * self.block_records * self.RECORD_SIZE
+            self._log.seek(offset)
+            timestamp = unpack_from('>I', self._log.read(4))[0]
+            self._add_index_entry(timestamp, offset)
+
+    @staticmethod
+    def _open(path: str):
+        try:
+            return open(path, 'r+b')
+        except OSError:  # not found
+            return open(path, 'w+b')
+
+    @staticmethod
+    def _size(f) -> int:
+        return f.seek(0, 2)
@@ -0,0 +1,169 @@
+from sen5x.compat import const
+from sen5x.sen5x import SEN5x
+
+try:
+    from machine import Pin
+except ImportError:  # host, bus is re-created without clocking SCL
+    Pin = None
+
+
+class BusRecovery:
+    """
+    Recovers SEN5x from a hung I2C bus without a reboot, keeping measurement (and VOC learning) running
+    See README.md for details
+
+    call() runs a bus operation, on OSError or SEN5x.NotFoundError the bus is recovered and the operation retried once
+    Recovery:
+        SCL is clocked (up to 9 pulses) until a slave holding SDA low releases it, then a STOP is sent
+        the bus is re-created by bus_factory() and given to every sensor (sen.i2c)
+        each sensor is warm attached: if it still produces samples measurement simply continues,
+        otherwise (sensor was reset) the VOC algorithm state backup is restored and measurement started
+    Failed attempts are repeated until budget_ms has passed, then RecoveryError is raised,
+    waits are cut to the time left and commands (with their execution time) are not started past the budget
+    scl & sda are pin ids of the bus, None to skip clocking SCL
+    The bus lock and clock of the first sensor are used, sensors on one bus share both
+
+    Usage:
+        def bus_factory():
+            return I2C(0, scl=Pin(SCL_PIN), sda=Pin(SDA_PIN), freq=100000)
+        recovery = BusRecovery(bus_factory, [sen], scl=SCL_PIN, sda=SDA_PIN, budget_ms=5000)
+        while True:
+            values = recovery.call(lambda: sen.measured_values)
+    """
+    class RecoveryError(Exception):
+        pass
+
+    CLEAR_PULSES = const(9)  # a slave releases SDA after at most 8 data bits & ACK
+    HALF_PERIOD_US = const(5)  # 100 kHz
+    SAMPLE_WAIT_MS = const(1100)  # a measuring SEN5x has data ready within a sample interval
+    POLL_MS = const(100)
+    RETRY_DELAY_MS = const(100)
+    RESTART_MS = const(70)  # execution time of restoring VOC algorithm state (20 ms) & starting measurement (50 ms)
+
+    def __init__(self,
+                 bus_factory,
+                 sensors: list[SEN5x],
+                 scl: int = None,
+                 sda: int = None,
+                 budget_ms: int = 5000,
+                 ):
+        if (scl is None) != (sda is None):
+            raise ValueError('Both or neither of scl and sda required')
+        self.bus_factory = bus_factory
+        self.sensors = sensors
+        self.scl = scl
+        self.sda = sda
+        self.budget_ms = budget_ms
+        self.clock = sensors[0].clock
+        self.errors = 0  # bus errors seen by call()
+        self.recoveries = 0  # successful recoveries
+        self.failures = 0  # recoveries not done within budget
+        self.bus_clears = 0  # times SDA was found held low
+        self.warm = 0  # sensors found still measuring after recovery
+        self.cold = 0  # sensors measurement restarted after recovery
+        self.last_recovery_ms = None  # time to resume measurement of last recovery
+        self.max_recovery_ms = 0
+
+    def call(self, func, *args):
+        """ Returns func(*args), recovering the bus and retrying once on a bus error """
+        try:
+            return func(*args)
+        except (OSError, SEN5x.NotFoundError):
+            self.errors += 1
+        self.recover()
+        return func(*args)
+
+    def recover(self) -> None:
+        """ Recovers bus and resumes measurement of all sensors or raises RecoveryError when budget is spent """
+        clock = self.clock
+        start = clock.ticks_ms()
+        while True:
+            try:
+                self._recover_once(start)
+                break
+            except (OSError, SEN5x.NotFoundError, SEN5x.CRCError, SEN5x.ReadError) as e:
+                error = e
+            if self._elapsed(start) + self.RETRY_DELAY_MS >= self.budget_ms:
+                self.failures += 1
+                raise self.RecoveryError(f'Not recovered within {self.budget_ms} ms: {error}')
+            clock.sleep_ms(self.RETRY_DELAY_MS)
+        elapsed = self._elapsed(start)
+        self.recoveries += 1
+        self.last_recovery_ms = elapsed
+        self.max_recovery_ms = max(self.max_recovery_ms, elapsed)
+
+    def _recover_once(self, start: int) -> None:
+        sen = self.sensors[0]
+        sen.transport.acquire()
+        try:
+            if self._clear_bus():
+                self.bus_clears += 1
+            i2c = self.bus_factory()
+        finally:
+            sen.transport.release()
+        for sen in self.sensors:
+            sen.i2c = i2c
+        warm = 0
+        for sen in self.sensors:
+            warm += self._attach(sen, start)
+        self.warm += warm  # counted once all sensors are attached, a failed attempt is retried from the first
+        self.cold += len(self.sensors) - warm
+
+    def _clear_bus(self) -> bool:
+        """ Clocks SCL until SDA is released then sends STOP, returns True if SDA was held low """
+        if self.scl is None or Pin is None:
+            return False
+        sleep_us = self.clock.sleep_us
+        scl = Pin(self.scl, Pin.OPEN_DRAIN, Pin.PULL_UP, value=1)
+        sda = Pin(self.sda, Pin.OPEN_DRAIN, Pin.PULL_UP, value=1)  # released, reads the line
+        stuck = not sda.value()
+        for _ in range(self.CLEAR_PULSES):
+            if sda.value():
+                break
+            scl.value(0)
+            sleep_us(self.HALF_PERIOD_US)
+            scl.value(1)
+            sleep_us(self.HALF_PERIOD_US)
+        scl.value(0)  # STOP: SDA rises while SCL is high
+        sleep_us(self.HALF_PERIOD_US)
+        sda.value(0)
+        sleep_us(self.HALF_PERIOD_US)
+        scl.value(1)
+        sleep_us(self.HALF_PERIOD_US)
+        sda.value(1)
+        sleep_us(self.HALF_PERIOD_US)
+        return stuck
+
+    def _attach(self, sen: SEN5x, start: int) -> bool:
+        """
+        Continues if sen still measures, otherwise restores VOC algorithm state and restarts measurement
+        Returns True if sen was still measuring (warm)
+        """
+        sen.check_i2c()
+        if self._wait_ready(sen, start, self.SAMPLE_WAIT_MS):
+            return True
+        if self._elapsed(start) + self.RESTART_MS + SEN5x.MIN_EXE_TIME > self.budget_ms:
+            raise SEN5x.ReadError('Measurement not resumed')
+        try:
+            sen.restore_voc_algorithm_state()
+        except (OSError, SEN5x.NotSupportedError):  # no backup or no VOC
+            pass
+        sen.start_measurement(num_checks=0)
+        if not self._wait_ready(sen, start, self.budget_ms):
+            raise SEN5x.ReadError('Measurement not resumed')
+        return False
+
+    def _wait_ready(self, sen: SEN5x, start: int, wait_ms: int) -> bool:
+        """ Polls data ready for up to wait_ms, ending before a poll (and its execution time) would pass the budget """
+        clock = self.clock
+        deadline = min(self._elapsed(start) + wait_ms, self.budget_ms) - SEN5x.MIN_EXE_TIME
+        while self._elapsed(start) <= deadline:
+            if sen.data_ready:
+                return True
+            if self._elapsed(start) + self.POLL_MS > deadline:
+                break
+            clock.sleep_ms(self.POLL_MS)
+        return False
+
+    def _elapsed(self, start: int) -> int:
+        return self.clock.ticks_diff(self.clock.ticks_ms(), start)
@@ -0,0 +1,30 @@
+"""
+Rounding & unit helpers of measured values, imported with the driver
+tools/tools.py re-exports them
+"""
+
+
+def round_to_int(value: float, round_to: int = 1) -> [int]:
+    """
+    Rounds float value to nearest <round_to> integer
+    For example:
+        value = 12.4 and round_to = 5 will return 10
+        value = 12.6 and round_to = 5 will return 15
+    :param value: value to round
+    :param round_to: integer to round to
+    :type round_to:
+    :return: rounded value
+    """
+    return int(round_to * round(value / round_to))
+
+
+def round_to_half(value: float) -> [float]:
+    """ Rounds value to nearest 0.5 or ignores if None """
+    return round(value * 2) / 2
+
+
+def c_to_f(c: float) -> float:
+    """
+    Converts °Celsius to °Fahrenheit
+    """
+    return (c * 9 / 5) + 32
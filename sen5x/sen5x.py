@@ -1,8 +1,8 @@
-from micropython import const
-from os import remove, rmdir
-from time import sleep_ms
-from struct import pack, unpack
-from tools import tools  # external library required
+from struct import pack, unpack_from
+from sen5x.clock import Clock
+from sen5x.compat import const
+from sen5x.rounding import c_to_f, round_to_half, round_to_int
+from sen5x.transport import SensirionI2C
 
 
 class SEN5x:
@@ -27,9 +27,7 @@ class SEN5x:
         """ SEN5x not found on I2C bus """
         pass
 
-    class CRCError(Exception):
-        """ Checksum error with SEN5x read/write per datasheet """
-        pass
+    CRCError = SensirionI2C.CRCError  # checksum error with SEN5x read/write per datasheet, raised by transport
 
     class StatusError(Exception):
         """ Status error on SEN5x per datasheet"""
@@ -43,6 +41,10 @@ class SEN5x:
         """ SEN5x in measurement mode when idle mode required or vice versa """
         pass
 
+    class NotSupportedError(Exception):
+        """ Command not supported by SEN5x product variant """
+        pass
+
     # SEN5x I2C addresses
     DEFAULT_I2C_ADDR = const(0x69)
     START_MEASUREMENT = const(0x0021)
@@ -72,42 +74,75 @@ class SEN5x:
     RHT_ERROR_MASK = const(1 << 6)
     LASER_ERROR_MASK = const(1 << 5)
     FAN_FAIL_ERROR_MASK = const(1 << 4)
+    STATUS_ERRORS = (  # (mask, description) in order checked
+        (FAN_SPEED_ERROR_MASK, 'Fan Speed Error'),
+        (GAS_SENSOR_ERROR_MASK, 'Gas Sensor Error'),
+        (RHT_ERROR_MASK, 'RHT Error'),
+        (LASER_ERROR_MASK, 'Laser Error'),
+        (FAN_FAIL_ERROR_MASK, 'Fan Fail Error'),
+    )
 
     I2C_BUFFER_SIZE = const(48)  # bytes, max used by product_line (must be divisible by 3)
     MIN_EXE_TIME = const(20)  # minimum time to execute I2C command in ms per datasheet
     TEMP_COMP_OFFSET_SCALE_FACTOR = const(200)  # for TEMP_COMPENSATION_PARAMS
     TEMP_COMP_SLOPE_SCALE_FACTOR = const(10000)  # for TEMP_COMPENSATION_PARAMS
 
+    # MEASURED_VALUES scaling, value = tick / scale factor
+    PM_SCALE_FACTOR = const(10)  # PM 1.0, 2.5, 4.0 & 10.0 µg/m³
+    RH_SCALE_FACTOR = const(100)  # relative humidity %
+    T_SCALE_FACTOR = const(200)  # temperature °C
+    INDEX_SCALE_FACTOR = const(10)  # VOC & NOx index
+    MEASURED_VALUES_SCALE_FACTORS = (  # per tick in measured_values_ticks
+        PM_SCALE_FACTOR, PM_SCALE_FACTOR, PM_SCALE_FACTOR, PM_SCALE_FACTOR,
+        RH_SCALE_FACTOR, T_SCALE_FACTOR, INDEX_SCALE_FACTOR, INDEX_SCALE_FACTOR
+    )
+    UNKNOWN_UNSIGNED = const(0xFFFF)  # 'unknown' tick per datasheet
+    UNKNOWN_SIGNED = const(0x7FFF)  # 'unknown' tick used by Sensirion drivers, seen in testing
+    UNKNOWN_TICKS = (  # per tick in measured_values_ticks
+        UNKNOWN_UNSIGNED, UNKNOWN_UNSIGNED, UNKNOWN_UNSIGNED, UNKNOWN_UNSIGNED,
+        UNKNOWN_SIGNED, UNKNOWN_SIGNED, UNKNOWN_SIGNED, UNKNOWN_SIGNED
+    )
+
+    # product variants, MEASURED_VALUES words provided by each
+    VARIANT_WORDS = {
+        'SEN50': 4,  # PM
+        'SEN54': 7,  # PM, RH, T & VOC
+        'SEN55': 8,  # PM, RH, T, VOC & NOx
+    }
+    MEASURED_VALUES_FORMATS = ('>4H', '>4H1h', '>4H2h', '>4H3h', '>4H4h')  # by words - 4
+    RHT_WORDS = const(6)  # MEASURED_VALUES words of variants with RH/T & VOC commands
+    VOC_WORDS = const(7)
+    NOX_WORDS = const(8)
+
     # backup VOC_ALGORITHM_STATE
     DATA_DIR = 'data'  # directory for saved files
     VOC_ALGORITHM_STATE_FILE_NAME = 'voc_algorithm_state.bin'  # save file
-    VOC_ALGORITHM_STATE_FILE_PATH = f'{DATA_DIR}/{VOC_ALGORITHM_STATE_FILE_NAME}'
-
-    CRC_TABLE = [  # see datasheet for checksum calculation
-        0, 49, 98, 83, 196, 245, 166, 151, 185, 136, 219, 234, 125, 76, 31, 46,
-        67, 114, 33, 16, 135, 182, 229, 212, 250, 203, 152, 169, 62, 15, 92, 109,
-        134, 183, 228, 213, 66, 115, 32, 17, 63, 14, 93, 108, 251, 202, 153, 168,
-        197, 244, 167, 150, 1, 48, 99, 82, 124, 77, 30, 47, 184, 137, 218, 235,
-        61, 12, 95, 110, 249, 200, 155, 170, 132, 181, 230, 215, 64, 113, 34, 19,
-        126, 79, 28, 45, 186, 139, 216, 233, 199, 246, 165, 148, 3, 50, 97, 80,
-        187, 138, 217, 232, 127, 78, 29, 44, 2, 51, 96, 81, 198, 247, 164, 149,
-        248, 201, 154, 171, 60, 13, 94, 111, 65, 112, 35, 18, 133, 180, 231, 214,
-        122, 75, 24, 41, 190, 143, 220, 237, 195, 242, 161, 144, 7, 54, 101, 84,
-        57, 8, 91, 106, 253, 204, 159, 174, 128, 177, 226, 211, 68, 117, 38, 23,
-        252, 205, 158, 175, 56, 9, 90, 107, 69, 116, 39, 22, 129, 176, 227, 210,
-        191, 142, 221, 236, 123, 74, 25, 40, 6, 55, 100, 85, 194, 243, 160, 145,
-        71, 118, 37, 20, 131, 178, 225, 208, 254, 207, 156, 173, 58, 11, 88, 105,
-        4, 53, 102, 87, 192, 241, 162, 147, 189, 140, 223, 238, 121, 72, 27, 42,
-        193, 240, 163, 146, 5, 52, 103, 86, 120, 73, 26, 43, 188, 141, 222, 239,
-        130, 179, 224, 209, 70, 119, 36, 21, 59, 10, 89, 104, 255, 206, 157, 172
-    ]
-
-    def __init__(self, i2c, address: int = DEFAULT_I2C_ADDR):
-        self.i2c = i2c
+    VOC_ALGORITHM_STATE_FILE_PATH = 'data/voc_algorithm_state.bin'  # DATA_DIR/VOC_ALGORITHM_STATE_FILE_NAME
+
+    def __init__(self, i2c, address: int = DEFAULT_I2C_ADDR, lock=None, clock=None):
+        """
+        i2c is an I2C bus, or a SensirionI2C transport shared with other Sensirion drivers on the bus
+        lock is optional and shared by all users of the I2C bus, e.g. _thread.allocate_lock()
+        It is held for each bus operation and released while SEN5x executes a command
+        clock is the time source for all waits and timing, see sen5x/clock.py (default system time)
+        lock and clock of a shared transport are set on the transport
+        """
+        if isinstance(i2c, SensirionI2C):
+            if lock is not None or clock is not None:
+                raise ValueError('Set lock and clock on transport')
+            self.transport = i2c
+        else:
+            self.transport = SensirionI2C(i2c, lock=lock, clock=Clock() if clock is None else clock)
         self.address = address
-        # reuse buffers in effort to reduce heap fragmentation
-        self._i2c_buffer = bytearray(self.I2C_BUFFER_SIZE)
+        self.clock = self.transport.clock
+        # reuse buffers in effort to reduce heap fragmentation, framing buffer is shared on transport
         self._read_buffer = bytearray(self.I2C_BUFFER_SIZE * 2 // 3)  # no crc
+        self._last_frame = bytearray(16)  # MEASURED_VALUES last returned by read_if_ready()
+        self._variant = None  # product name, read once
+        self._words = 8  # MEASURED_VALUES words provided by variant
+        self.tolerant = False  # True: measured values words failing checksum are 'unknown' instead of CRCError
+        self.valid = 0  # bit per measured values word of last read, set if read and checksum valid
+        self.crc_errors = 0  # measured values words discarded in tolerant mode
 
     def __repr__(self) -> str:
         return f'{__class__.__name__}({self.i2c}, address={hex(self.address)})'
@@ -127,6 +162,29 @@ class SEN5x:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.stop()
 
+    @property
+    def i2c(self):
+        """ I2C bus of transport, setting it (e.g. after bus recovery) changes it for all drivers on the transport """
+        return self.transport.i2c
+
+    @i2c.setter
+    def i2c(self, i2c) -> None:
+        self.transport.i2c = i2c
+
+    @property
+    def lock(self):
+        return self.transport.lock
+
+    @property
+    def lock_contentions(self) -> int:
+        """ Number of times bus was busy when needed, by all drivers on transport """
+        return self.transport.lock_contentions
+
+    @property
+    def lock_wait_us(self) -> int:
+        """ Total time spent waiting for bus, by all drivers on transport """
+        return self.transport.lock_wait_us
+
     @property
     def product_name(self) -> str:
         self._cmd_read(self.PRODUCT_NAME, num_words=16)
@@ -142,6 +200,25 @@ class SEN5x:
         self._cmd_read(self.FIRMWARE_VERSION, num_words=1)
         return int(self._read_buffer[0])
 
+    @property
+    def variant(self) -> str:
+        """
+        Product name, read from SEN5x once and cached
+        Unrecognized product names are treated as SEN55
+        """
+        if self._variant is None:
+            variant = self.product_name
+            self._words = self.VARIANT_WORDS.get(variant, 8)
+            self._variant = variant
+        return self._variant
+
+    @property
+    def measured_values_words(self) -> int:
+        """ MEASURED_VALUES words provided by variant, only these are read and decoded """
+        if self._variant is None:
+            _ = self.variant
+        return self._words
+
     @property
     def data_ready(self) -> bool:
         """ Also used as a proxy for SEN5x idle|measurement mode """
@@ -186,23 +263,58 @@ class SEN5x:
 
     @property
     def measured_values_raw(self) -> tuple[float, float, float, float, float, float, float, float]:
-        self._cmd_read(self.MEASURED_VALUES, num_words=8)
-        ppm1_0, ppm2_5, ppm4_0, ppm10_0, rh, t, voc, nox = unpack('>4H4h', self._read_buffer)
-        return (
-            self._check_and_scale(ppm1_0, scale_factor=10),
-            self._check_and_scale(ppm2_5, scale_factor=10),
-            self._check_and_scale(ppm4_0, scale_factor=10),
-            self._check_and_scale(ppm10_0, scale_factor=10),
-            self._check_and_scale(rh, scale_factor=100),
-            self._check_and_scale(t, scale_factor=200),
-            self._check_and_scale(voc, scale_factor=10),
-            self._check_and_scale(nox, scale_factor=10)
-        )
+        return self._scale_measured_values(*self._read_measured_values())
+
+    def read_if_ready(self) -> [tuple[float, float, float, float, float, float, float, float], None]:
+        """
+        Single transaction alternative to checking data_ready before reading measured_values_raw
+        Returns measured values as measured_values_raw, or None if not available or same as last returned
+        A new sample identical to the last one is indistinguishable from a repeat and also returns None
+        """
+        ticks = self._read_measured_values(required=False)
+        if ticks is None:
+            return None
+        size = len(ticks) * 2
+        last_frame = self._last_frame
+        for i in range(size):
+            if last_frame[i] != self._read_buffer[i]:
+                break
+        else:
+            return None
+        last_frame[:size] = self._read_buffer[:size]
+        return self._scale_measured_values(*ticks)
+
+    @property
+    def measured_values_ticks(self) -> tuple[int, int, int, int, int, int, int, int]:
+        """
+        Returns measured values as unpacked from SEN5x with no scaling or conversion
+        Divide by MEASURED_VALUES_SCALE_FACTORS to scale
+        UNKNOWN_UNSIGNED & UNKNOWN_SIGNED are 'unknown', as are channels the variant doesn't provide
+        """
+        ticks = self._read_measured_values()
+        # noinspection PyTypeChecker
+        return ticks if len(ticks) == 8 else ticks + self.UNKNOWN_TICKS[len(ticks):]
+
+    def _read_measured_values(self, required: bool = True) -> [tuple, None]:
+        """
+        Reads the MEASURED_VALUES words the variant provides, returns them unpacked
+        If not available raises ReadError, or returns None if not required
+        In tolerant mode words failing checksum are 'unknown', see valid
+        """
+        words = self.measured_values_words
+        if not self._try_cmd_read(self.MEASURED_VALUES, num_words=words, tolerant=self.tolerant):
+            if required:
+                raise self.ReadError('Response not available')
+            return None
+        if not self.tolerant:
+            self.valid = (1 << words) - 1
+        return unpack_from(self.MEASURED_VALUES_FORMATS[words - 4], self._read_buffer)
 
     @property
     def temperature_compensation_params(self) -> tuple[float, float, int]:
+        self._check_supported(self.RHT_WORDS)
         self._cmd_read(self.TEMP_COMPENSATION_PARAMS, num_words=3)
-        offset, slope, time_const = unpack('>2hH', self._read_buffer)
+        offset, slope, time_const = unpack_from('>2hH', self._read_buffer)
         return (
             round(offset / self.TEMP_COMP_OFFSET_SCALE_FACTOR, 2),
             round(slope / self.TEMP_COMP_SLOPE_SCALE_FACTOR, 4),
@@ -212,6 +324,7 @@ class SEN5x:
     @temperature_compensation_params.setter
     def temperature_compensation_params(self, params: tuple[float, float, int]) -> None:
         offset, slope, time_const = params
+        self._check_supported(self.RHT_WORDS)
         offset = round(offset * self.TEMP_COMP_OFFSET_SCALE_FACTOR)
         slope = round(slope * self.TEMP_COMP_SLOPE_SCALE_FACTOR)
         # valid ranges are not clear from datasheets, these at least don't overflow buffers
@@ -226,7 +339,7 @@ class SEN5x:
     @property
     def warm_start_param(self) -> int:
         self._cmd_read(self.WARM_START_PARAM, num_words=1)
-        return unpack('>H', self._read_buffer)[0]
+        return unpack_from('>H', self._read_buffer)[0]
 
     @warm_start_param.setter
     def warm_start_param(self, param: int) -> None:
@@ -236,15 +349,17 @@ class SEN5x:
 
     @property
     def voc_algorithm_tuning_params(self) -> tuple[int, int, int, int, int, int]:
+        self._check_supported(self.VOC_WORDS)
         if self.data_ready:
             raise self.InvalidMode('Must be in idle mode')
         self._cmd_read(self.VOC_ALGORITHM_TUNING_PARAMS, num_words=6)
         # noinspection PyTypeChecker
-        return unpack('>6h', self._read_buffer)
+        return unpack_from('>6h', self._read_buffer)
 
     @voc_algorithm_tuning_params.setter
     def voc_algorithm_tuning_params(self, params: tuple[int, int, int, int, int, int]) -> None:
         index_offset, time_offset, time_gain, max_duration, std_initial, gain_factor = params
+        self._check_supported(self.VOC_WORDS)
         if self.data_ready:
             raise self.InvalidMode('Must be in idle mode')
         if not 1 <= index_offset <= 250:
@@ -265,15 +380,17 @@ class SEN5x:
 
     @property
     def nox_algorithm_tuning_params(self) -> tuple[int, int, int, int, int, int]:
+        self._check_supported(self.NOX_WORDS)
         if self.data_ready:
             raise self.InvalidMode('Must be in idle mode')
         self._cmd_read(self.NOX_ALGORITHM_TUNING_PARAMS, num_words=6)
         # noinspection PyTypeChecker
-        return unpack('>6h', self._read_buffer)
+        return unpack_from('>6h', self._read_buffer)
 
     @nox_algorithm_tuning_params.setter
     def nox_algorithm_tuning_params(self, params: tuple[int, int, int, int, int, int]) -> None:
         index_offset, time_offset, time_gain, max_duration, std_initial, gain_factor = params
+        self._check_supported(self.NOX_WORDS)
         if self.data_ready:
             raise self.InvalidMode('Must be in idle mode')
         if not 1 <= index_offset <= 250:
@@ -294,22 +411,26 @@ class SEN5x:
 
     @property
     def rht_acceleration_mode(self) -> int:
+        self._check_supported(self.RHT_WORDS)
         self._cmd_read(self.RHT_ACCELERATION_MODE, num_words=1)
-        return unpack('>H', self._read_buffer)[0]
+        return unpack_from('>H', self._read_buffer)[0]
 
     @rht_acceleration_mode.setter
     def rht_acceleration_mode(self, mode: int) -> None:
+        self._check_supported(self.RHT_WORDS)
         if mode not in (0, 1, 2):
             raise ValueError('Mode out of range')
         self._cmd_write(self.RHT_ACCELERATION_MODE, pack('>H', mode))
 
     @property
     def voc_algorithm_state(self) -> bytes:
+        self._check_supported(self.VOC_WORDS)
         self._cmd_read(self.VOC_ALGORITHM_STATE, num_words=4)
         return bytes(self._read_buffer[:8])  # bytes to make it immutable
 
     @voc_algorithm_state.setter
     def voc_algorithm_state(self, state: bytes) -> None:
+        self._check_supported(self.VOC_WORDS)
         if len(state) != 8:
             raise ValueError('State out of range')
         self._cmd_write(self.VOC_ALGORITHM_STATE, state)
@@ -317,7 +438,7 @@ class SEN5x:
     @property
     def auto_cleaning_interval(self) -> int:
         self._cmd_read(self.AUTO_CLEANING_INTERVAL, num_words=2)
-        return unpack('>L', self._read_buffer)[0]
+        return unpack_from('>L', self._read_buffer)[0]
 
     @auto_cleaning_interval.setter
     def auto_cleaning_interval(self, interval) -> None:
@@ -328,7 +449,7 @@ class SEN5x:
     @property
     def status(self) -> int:
         self._cmd_read(self.DEVICE_STATUS, num_words=2)
-        return unpack('>I', self._read_buffer)[0]
+        return unpack_from('>I', self._read_buffer)[0]
 
     @property
     def fan_cleaning_active(self) -> bool:
@@ -340,7 +461,7 @@ class SEN5x:
         self.reset()  # in case running
         try:
             self.restore_voc_algorithm_state()
-        except OSError:  # no backup
+        except (OSError, self.NotSupportedError):  # no backup or no VOC
             pass
         self.start_measurement()
         self.check_for_errors()
@@ -353,17 +474,19 @@ class SEN5x:
         return self._start_measurement(self.START_MEASUREMENT, num_checks=num_checks)
 
     def start_measurement_rht_gas_only_mode(self, num_checks: int = 100) -> bool:
+        self._check_supported(self.RHT_WORDS)
         return self._start_measurement(self.START_MEASUREMENT_RHTGAS_ONLY, num_checks=num_checks)
 
     def _start_measurement(self, cmd: int, num_checks: int = 100) -> bool:
         """ Starts measurement and waits until ready (num_checks = 0 to not wait) """
         self._cmd_exe(cmd, cmd_exe_time=50)
+        self._last_frame[:] = bytes(len(self._last_frame))  # first sample isn't a repeat
         for _ in range(num_checks):  # takes ~800 ms for data to be ready
             if self.data_ready:
                 ready = True
                 break
             else:
-                sleep_ms(100)
+                self.clock.sleep_ms(100)
         else:
             ready = False
 
@@ -377,22 +500,26 @@ class SEN5x:
         Per datasheet VOC algorithm state tunes over time. Tuning is lost after reset
         Us this to save state to restore after reset
         """
+        from tools import tools  # external library required, only loaded to save
+        state = self.voc_algorithm_state
         tools.create_dir(self.DATA_DIR)
         with open(self.VOC_ALGORITHM_STATE_FILE_PATH, 'wb') as f:
-            f.write(self.voc_algorithm_state)
+            f.write(state)
 
     def restore_voc_algorithm_state(self) -> None:
         """
         Restore previously saved state
         Raises OSError with errno == 2 if saved file not found
         """
-        with open(f'{self.VOC_ALGORITHM_STATE_FILE_PATH}', 'rb') as f:
+        self._check_supported(self.VOC_WORDS)
+        with open(self.VOC_ALGORITHM_STATE_FILE_PATH, 'rb') as f:
             self.voc_algorithm_state = f.read()
 
     def purge_backup_voc_algorithm_state(self):
+        from os import remove, rmdir  # only loaded to purge
         # noinspection PyBroadException
         try:
-            remove(f'{self.VOC_ALGORITHM_STATE_FILE_PATH}')
+            remove(self.VOC_ALGORITHM_STATE_FILE_PATH)
             rmdir(self.DATA_DIR)
         except Exception:
             pass
@@ -404,23 +531,17 @@ class SEN5x:
 
     def check_i2c(self) -> None:
         try:
-            if self.address not in self.i2c.scan():
+            found = self.address in self.transport.scan()
+            if not found:
                 raise self.NotFoundError('I2C address not found')
         except Exception as e:
             raise self.NotFoundError(e)
 
     def check_for_errors(self) -> None:
         status = self.status
-        if status & self.FAN_SPEED_ERROR_MASK:
-            raise self.StatusError('Fan Speed Error')
-        if status & self.GAS_SENSOR_ERROR_MASK:
-            raise self.StatusError('Gas Sensor Error')
-        if status & self.RHT_ERROR_MASK:
-            raise self.StatusError('RHT Error')
-        if status & self.LASER_ERROR_MASK:
-            raise self.StatusError('Laser Error')
-        if status & self.FAN_FAIL_ERROR_MASK:
-            raise self.StatusError('Fan Fail Error')
+        for mask, description in self.STATUS_ERRORS:
+            if status & mask:
+                raise self.StatusError(description)
 
     def clear_status(self) -> None:
         self._cmd_exe(self.CLEAR_DEVICE_STATUS)
@@ -428,15 +549,20 @@ class SEN5x:
     def reset(self) -> None:
         self._cmd_exe(self.RESET_DEVICE, cmd_exe_time=100)
 
+    def _check_supported(self, words: int) -> None:
+        """ Raises NotSupportedError without bus traffic (once variant is known) unless variant provides words """
+        if self.measured_values_words < words:
+            raise self.NotSupportedError(f'Not supported by {self.variant}')
+
     def _cmd_exe(self,
                  cmd: int,
                  cmd_exe_time: int = MIN_EXE_TIME,
                  ) -> None:
         """
         Executes I2C command to SEN5x with no response or data
+        Bus is released while command executes
         """
-        self.i2c.writeto(self.address, pack('>H', cmd))
-        sleep_ms(cmd_exe_time)  # time to execute before reading
+        self.transport.execute(self.address, cmd, cmd_exe_time)
 
     def _cmd_read(self,
                   cmd: int,
@@ -449,18 +575,37 @@ class SEN5x:
         Each word is 2 bytes of data plus a checksum byte
         Validates and discards checksum
         """
-        self._cmd_exe(cmd, cmd_exe_time=cmd_exe_time)
-        self.i2c.readfrom_into(self.address, self._i2c_buffer)
-        if tools.all_ones(self._i2c_buffer):  # seems to return 0xFF words if data not available
+        if not self._try_cmd_read(cmd, num_words, cmd_exe_time=cmd_exe_time):
             raise self.ReadError('Response not available')
 
+    def _try_cmd_read(self,
+                      cmd: int,
+                      num_words: int,
+                      cmd_exe_time: int = MIN_EXE_TIME,
+                      tolerant: bool = False,
+                      ) -> bool:
+        """
+        As _cmd_read, but returns False instead of raising if response is not available
+        (seems to return 0xFF words if data not available)
+        tolerant=True (MEASURED_VALUES only) checks each word on its own:
+        words failing checksum are replaced by UNKNOWN_TICKS and cleared in self.valid instead of raising CRCError
+        """
+        valid = self.transport.read(self.address, cmd, num_words, self._read_buffer, cmd_exe_time, strict=not tolerant)
+        if valid is None:
+            return False
+        if tolerant:
+            self._mark_unknown(num_words, valid)
+        return True
+
+    def _mark_unknown(self, num_words: int, valid: int) -> None:
+        """ Replaces MEASURED_VALUES words in self._read_buffer that failed checksum with 'unknown' """
         for i in range(num_words):
-            msb = self._i2c_buffer[i * 3]
-            lsb = self._i2c_buffer[i * 3 + 1]
-            crc = self._i2c_buffer[i * 3 + 2]
-            self._validate_crc(msb, lsb, crc)
-            self._read_buffer[i * 2] = msb
-            self._read_buffer[i * 2 + 1] = lsb
+            if not valid & (1 << i):
+                unknown = self.UNKNOWN_TICKS[i]
+                self._read_buffer[i * 2] = unknown >> 8
+                self._read_buffer[i * 2 + 1] = unknown & 0xFF
+                self.crc_errors += 1
+        self.valid = valid
 
     def _cmd_write(self,
                    cmd: int,
@@ -470,18 +615,9 @@ class SEN5x:
         """
         Executes I2C command and writes data to SEN5x
         Each word is 2 bytes of data
-        Generates checksum and writes data & checksum
-        """
-        for i in range(len(words) // 2):  # 2 bytes per word
-            msb = words[i * 2]
-            lsb = words[i * 2 + 1]
-            crc = self._lookup_crc(msb, lsb)
-            self._i2c_buffer[i * 3] = msb
-            self._i2c_buffer[i * 3 + 1] = lsb
-            self._i2c_buffer[i * 3 + 2] = crc
-        # noinspection PyUnboundLocalVariable
-        self.i2c.writeto_mem(self.address, cmd, self._i2c_buffer[:(i + 1) * 3], addrsize=16)
-        sleep_ms(cmd_exe_time)
+        Transport generates checksum and writes data & checksum
+        """
+        self.transport.write(self.address, cmd, words, cmd_exe_time)
 
     @staticmethod
     def _round_measured_values(
@@ -501,32 +637,41 @@ class SEN5x:
         Set metric=False for °F int with tolerance roughly at 1
         """
         return (
-            None if ppm1_0 is None else tools.round_to_int(ppm1_0, round_to=5 if ppm1_0 < 100 else 10),
-            None if ppm2_5 is None else tools.round_to_int(ppm2_5, round_to=5 if ppm2_5 < 100 else 10),
-            None if ppm4_0 is None else tools.round_to_int(ppm4_0, round_to=25),
-            None if ppm10_0 is None else tools.round_to_int(ppm10_0, round_to=25),
-            None if rh is None else tools.round_to_int(rh, round_to=5),
-            None if t is None else tools.round_to_half(t) if metric else round(tools.c_to_f(t)),
+            None if ppm1_0 is None else round_to_int(ppm1_0, round_to=5 if ppm1_0 < 100 else 10),
+            None if ppm2_5 is None else round_to_int(ppm2_5, round_to=5 if ppm2_5 < 100 else 10),
+            None if ppm4_0 is None else round_to_int(ppm4_0, round_to=25),
+            None if ppm10_0 is None else round_to_int(ppm10_0, round_to=25),
+            None if rh is None else round_to_int(rh, round_to=5),
+            None if t is None else round_to_half(t) if metric else round(c_to_f(t)),
             None if voc is None else round(voc),
             None if nox is None else round(nox)
         )
 
     @staticmethod
-    def _validate_crc(msb: int, lsb: int, crc: int) -> None:
-        if SEN5x._lookup_crc(msb, lsb) != crc:
-            raise SEN5x.CRCError('Checksum error')
-
-    @staticmethod
-    def _lookup_crc(msb: int, lsb: int) -> int:
+    def _scale_measured_values(
+                               ppm1_0: int,
+                               ppm2_5: int,
+                               ppm4_0: int,
+                               ppm10_0: int,
+                               rh: int = None,
+                               t: int = None,
+                               voc: int = None,
+                               nox: int = None,
+                               ) -> tuple[float, float, float, float, float, float, float, float]:
         """
-        Returns SEN5x checksum based on 2 sequential bytes
-        See datasheet for details
+        Scales words unpacked from MEASURED_VALUES response per datasheet
+        Words not provided by variant are omitted (None) and not decoded
         """
-        crc = 0xFF ^ msb
-        crc = SEN5x.CRC_TABLE[crc] ^ lsb
-        crc = SEN5x.CRC_TABLE[crc]
-
-        return crc
+        return (
+            SEN5x._check_and_scale(ppm1_0, scale_factor=SEN5x.PM_SCALE_FACTOR),
+            SEN5x._check_and_scale(ppm2_5, scale_factor=SEN5x.PM_SCALE_FACTOR),
+            SEN5x._check_and_scale(ppm4_0, scale_factor=SEN5x.PM_SCALE_FACTOR),
+            SEN5x._check_and_scale(ppm10_0, scale_factor=SEN5x.PM_SCALE_FACTOR),
+            None if rh is None else SEN5x._check_and_scale(rh, scale_factor=SEN5x.RH_SCALE_FACTOR),
+            None if t is None else SEN5x._check_and_scale(t, scale_factor=SEN5x.T_SCALE_FACTOR),
+            None if voc is None else SEN5x._check_and_scale(voc, scale_factor=SEN5x.INDEX_SCALE_FACTOR),
+            None if nox is None else SEN5x._check_and_scale(nox, scale_factor=SEN5x.INDEX_SCALE_FACTOR)
+        )
 
     @staticmethod
     def _words_to_string(words: bytearray) -> str:
@@ -545,4 +690,4 @@ class SEN5x:
         Sensirion drivers use 0x7FFF for 'unknown', which was seen in testing
         Returns None if 'unknown'
         """
-        return int16 / scale_factor if int16 not in (0x7FFF, 0xFFFF) else None
+        return int16 / scale_factor if int16 not in (SEN5x.UNKNOWN_SIGNED, SEN5x.UNKNOWN_UNSIGNED) else None
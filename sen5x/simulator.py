@@ -0,0 +1,191 @@
+from struct import pack, unpack
+from sen5x.clock import Clock
+from sen5x.compat import const
+from sen5x.sen5x import SEN5x
+from sen5x.transport import crc8
+
+
+class SimulatedSEN5x:
+    """
+    Stand-in for an I2C bus with one SEN5x attached, for tests and host tools
+    See README.md for details
+
+    Implements the I2C methods used by SEN5x (writeto, readfrom_into, writeto_mem, scan) and answers
+    every SEN5x command with checksummed words the way the device does:
+        idle mode returns 'unknown' measured values, measurement mode produces a sample every second
+        responses are all 0xFF until the first sample is ready
+        fan cleaning sets FAN_CLEANING_ACTIVE_MASK for 10 seconds
+        channels the product variant doesn't have are 'unknown'
+    Measured values are taken from ticks (as SEN5x.measured_values_ticks), change them to simulate the environment
+    Set status_errors to simulate SEN5x status errors
+    Set corrupt_words to a bit per response word to send those words with a bad checksum (noisy bus)
+    Set hung to make every bus operation time out (OSError ETIMEDOUT), as a bus with SDA held low
+    Time is taken from clock, share a VirtualClock with SEN5x to simulate without waiting
+
+    Usage:
+        sen = SEN5x(SimulatedSEN5x(product_name='SEN54'))
+        clock = VirtualClock()  # from sen5x.clock, no waiting
+        sen = SEN5x(SimulatedSEN5x(clock=clock), clock=clock)
+    """
+    SAMPLE_INTERVAL = const(1000)  # ms
+    FIRST_SAMPLE_DELAY = const(1000)  # ms after start measurement, ~800 ms per datasheet
+    FAN_CLEANING_DURATION = const(10000)  # ms per datasheet
+    IDLE, MEASUREMENT, RHT_GAS_ONLY = 0, 1, 2
+
+    def __init__(self,
+                 address: int = SEN5x.DEFAULT_I2C_ADDR,
+                 product_name: str = 'SEN55',
+                 serial_number: str = '0123456789ABCDEF',
+                 firmware_version: int = 1,
+                 clock=None,
+                 ):
+        if product_name not in SEN5x.VARIANT_WORDS:
+            raise ValueError('Product name out of range')
+        self.address = address
+        self.product_name = product_name
+        self.serial_number = serial_number
+        self.firmware_version = firmware_version
+        self.clock = Clock() if clock is None else clock
+        self.ticks = (52, 85, 102, 110, 4550, 4700, 1000, 10)  # 5.2 µg/m³ ... 45.5 %, 23.5 °C, VOC 100, NOx 1
+        self.status_errors = 0  # SEN5x status error bits to report
+        self.corrupt_words = 0  # bit per response word sent with bad checksum
+        self.hung = False  # every bus operation times out
+        self.commands = 0  # commands received
+        self._response = None
+        self._reset()
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}(address={hex(self.address)}, product_name={self.product_name!r})'
+
+    @property
+    def mode(self) -> int:
+        return self._mode
+
+    @property
+    def fan_cleaning_active(self) -> bool:
+        return self._cleaning_start is not None and \
+            self.clock.ticks_diff(self.clock.ticks_ms(), self._cleaning_start) < self.FAN_CLEANING_DURATION
+
+    def scan(self) -> list[int]:
+        if self.hung:
+            raise OSError(116)  # ETIMEDOUT
+        return [self.address]
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        self._check_address(addr)
+        cmd, = unpack('>H', bytes(buf[:2]))
+        self.commands += 1
+        self._response = self._execute(cmd)
+        return len(buf)
+
+    def readfrom_into(self, addr: int, buf, stop: bool = True) -> None:
+        self._check_address(addr)
+        response = self._response if self._response is not None else b''
+        frame = bytearray(b'\xFF' * len(buf))  # idle bus reads high
+        for i in range(min(len(response) // 2, len(buf) // 3)):
+            msb = response[i * 2]
+            lsb = response[i * 2 + 1]
+            frame[i * 3] = msb
+            frame[i * 3 + 1] = lsb
+            frame[i * 3 + 2] = crc8(msb, lsb) ^ (0xFF if self.corrupt_words & (1 << i) else 0)
+        buf[:] = frame
+
+    def writeto_mem(self, addr: int, memaddr: int, buf, *, addrsize: int = 8) -> None:
+        self._check_address(addr)
+        self.commands += 1
+        words = bytearray()
+        for i in range(len(buf) // 3):
+            msb, lsb, crc = buf[i * 3], buf[i * 3 + 1], buf[i * 3 + 2]
+            if crc8(msb, lsb) != crc:
+                raise OSError(5)  # EIO, SEN5x NACKs bad checksum
+            words.append(msb)
+            words.append(lsb)
+        self._params[memaddr] = bytes(words)
+        self._response = None
+
+    def _check_address(self, addr: int) -> None:
+        if self.hung:
+            raise OSError(116)  # ETIMEDOUT
+        if addr != self.address:
+            raise OSError(19)  # ENODEV
+
+    def _reset(self) -> None:
+        self._mode = self.IDLE
+        self._measurement_start = None
+        self._last_sample_read = -1
+        self._cleaning_start = None
+        self._params = {
+            SEN5x.TEMP_COMPENSATION_PARAMS: pack('>2hH', 0, 0, 0),
+            SEN5x.WARM_START_PARAM: pack('>H', 0),
+            SEN5x.VOC_ALGORITHM_TUNING_PARAMS: pack('>6h', 100, 12, 12, 180, 50, 230),
+            SEN5x.NOX_ALGORITHM_TUNING_PARAMS: pack('>6h', 1, 12, 12, 720, 50, 230),
+            SEN5x.RHT_ACCELERATION_MODE: pack('>H', 0),
+            SEN5x.VOC_ALGORITHM_STATE: bytes(8),
+            SEN5x.AUTO_CLEANING_INTERVAL: pack('>L', 604800),
+        }
+
+    def _sample_number(self) -> int:
+        """ Samples produced since measurement started, -1 if none """
+        if self._mode == self.IDLE:
+            return -1
+        elapsed = self.clock.ticks_diff(self.clock.ticks_ms(), self._measurement_start) - self.FIRST_SAMPLE_DELAY
+        return -1 if elapsed < 0 else elapsed // self.SAMPLE_INTERVAL
+
+    def _execute(self, cmd: int) -> [bytes, None]:
+        """ Executes command, returns response words (no checksum) or None if no response """
+        if cmd in (SEN5x.START_MEASUREMENT, SEN5x.START_MEASUREMENT_RHTGAS_ONLY):
+            if self._mode == self.IDLE:
+                self._measurement_start = self.clock.ticks_ms()
+                self._last_sample_read = -1
+            self._mode = self.MEASUREMENT if cmd == SEN5x.START_MEASUREMENT else self.RHT_GAS_ONLY
+            return None
+        if cmd == SEN5x.STOP_MEASUREMENT:
+            self._mode = self.IDLE
+            self._cleaning_start = None
+            return None
+        if cmd == SEN5x.DATA_READY_FLAG:
+            return pack('>H', self._sample_number() > self._last_sample_read)
+        if cmd == SEN5x.MEASURED_VALUES:
+            return self._measured_values()
+        if cmd == SEN5x.START_FAN_CLEANING:
+            if self._mode == self.MEASUREMENT:
+                self._cleaning_start = self.clock.ticks_ms()
+            return None
+        if cmd == SEN5x.PRODUCT_NAME:
+            return self._string(self.product_name)
+        if cmd == SEN5x.SERIAL_NUMBER:
+            return self._string(self.serial_number)
+        if cmd == SEN5x.FIRMWARE_VERSION:
+            return pack('>BB', self.firmware_version, 0)
+        if cmd == SEN5x.DEVICE_STATUS:
+            status = self.status_errors
+            if self.fan_cleaning_active:
+                status |= SEN5x.FAN_CLEANING_ACTIVE_MASK
+            return pack('>I', status)
+        if cmd == SEN5x.CLEAR_DEVICE_STATUS:
+            self.status_errors = 0
+            return None
+        if cmd == SEN5x.RESET_DEVICE:
+            self._reset()
+            return None
+        if cmd in self._params:  # read back parameter
+            return self._params[cmd]
+        raise OSError(5)  # EIO, unknown command
+
+    def _measured_values(self) -> bytes:
+        if self._mode == self.IDLE:
+            ticks = SEN5x.UNKNOWN_TICKS
+        else:
+            sample = self._sample_number()
+            if sample < 0:
+                return b''  # not available, reads all 0xFF
+            self._last_sample_read = sample
+            num_ticks = SEN5x.VARIANT_WORDS[self.product_name]
+            ticks = tuple(self.ticks[:num_ticks]) + SEN5x.UNKNOWN_TICKS[num_ticks:]
+            if self._mode == self.RHT_GAS_ONLY:
+                ticks = SEN5x.UNKNOWN_TICKS[:4] + ticks[4:]
+        return pack('>8H', *[tick & 0xFFFF for tick in ticks])
+
+    @staticmethod
+    def _string(value: str) -> bytes:
+        return (value.encode('ascii') + bytes(32))[:32]
@@ -0,0 +1,191 @@
+"""
+Record & replay of raw I2C traffic
+See README.md for details
+
+Trace format:
+    header: MAGIC
+    records: RECORD_FORMAT (op, address, memaddr, payload length, µs since previous record) followed by payload
+        WRITE      payload written by writeto()
+        READ       payload read by readfrom_into()
+        WRITE_MEM  payload written by writeto_mem(), memaddr is the SEN5x command
+        SCAN       payload is addresses found by scan()
+        ERROR      memaddr is op that raised, payload is OSError errno and memaddr of that op (2 bytes each)
+"""
+from struct import pack, unpack
+from sen5x.clock import Clock
+from sen5x.compat import const
+
+MAGIC = b'S5XT\x02'  # version 2: ERROR payload holds memaddr
+RECORD_FORMAT = '>BBHHI'
+RECORD_SIZE = const(10)
+MAX_DELTA_US = 0xFFFFFFFF  # not a small int on 32-bit ports
+
+WRITE = const(1)
+READ = const(2)
+WRITE_MEM = const(3)
+SCAN = const(4)
+ERROR = const(5)
+
+
+def records(stream):
+    """
+    Yields (op, address, memaddr, payload, delta_us) for each record in trace
+    Raises ValueError if stream isn't a trace
+    """
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a trace')
+    while True:
+        header = stream.read(RECORD_SIZE)
+        if len(header) < RECORD_SIZE:  # end of trace (or truncated record)
+            return
+        op, address, memaddr, length, delta_us = unpack(RECORD_FORMAT, header)
+        yield op, address, memaddr, stream.read(length), delta_us
+
+
+class RecordingI2C:
+    """
+    Wraps an I2C object and records all traffic to stream (opened 'wb')
+    Pass to SEN5x in place of the I2C object, other I2C methods are passed through unrecorded
+
+    Usage:
+        with open('sen5x.trace', 'wb') as f:
+            sen = SEN5x(RecordingI2C(i2c, f))
+    """
+    def __init__(self, i2c, stream, clock=None):
+        self.i2c = i2c
+        self.stream = stream
+        self.clock = Clock() if clock is None else clock
+        self.stream.write(MAGIC)
+        self._last_ticks = self.clock.ticks_us()
+
+    def __getattr__(self, name):
+        return getattr(self.i2c, name)
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.i2c})'
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        try:
+            acks = self.i2c.writeto(addr, buf, stop)
+        except OSError as e:
+            self._record_error(WRITE, addr, 0, e)
+            raise
+        self._record(WRITE, addr, 0, buf)
+        return acks
+
+    def readfrom_into(self, addr: int, buf, stop: bool = True) -> None:
+        try:
+            self.i2c.readfrom_into(addr, buf, stop)
+        except OSError as e:
+            self._record_error(READ, addr, 0, e)
+            raise
+        self._record(READ, addr, 0, buf)
+
+    def writeto_mem(self, addr: int, memaddr: int, buf, *, addrsize: int = 8) -> None:
+        try:
+            self.i2c.writeto_mem(addr, memaddr, buf, addrsize=addrsize)
+        except OSError as e:
+            self._record_error(WRITE_MEM, addr, memaddr, e)
+            raise
+        self._record(WRITE_MEM, addr, memaddr, buf)
+
+    def scan(self) -> list[int]:
+        try:
+            found = self.i2c.scan()
+        except OSError as e:
+            self._record_error(SCAN, 0, 0, e)
+            raise
+        self._record(SCAN, 0, 0, bytes(found))
+        return found
+
+    def _record(self, op: int, addr: int, memaddr: int, payload) -> None:
+        now = self.clock.ticks_us()
+        delta_us = min(self.clock.ticks_diff(now, self._last_ticks), MAX_DELTA_US)
+        self._last_ticks = now
+        self.stream.write(pack(RECORD_FORMAT, op, addr, memaddr, len(payload), delta_us))
+        self.stream.write(payload)
+
+    def _record_error(self, op: int, addr: int, memaddr: int, e: OSError) -> None:
+        """ Records errno, 0 if not an errno (e.g. a message) so recording never hides the error being raised """
+        errno = e.args[0] if e.args else 0
+        if not isinstance(errno, int) or not 0 <= errno <= 0xFFFF:
+            errno = 0
+        self._record(ERROR, addr, op, pack('>HH', errno, memaddr))
+
+
+class ReplayI2C:
+    """
+    Serves a trace recorded by RecordingI2C back to an unchanged SEN5x
+    realtime=False replays at full speed, realtime=True waits for the recorded time between operations
+    strict=True raises MismatchError if the driver writes something other than what was recorded
+
+    Usage:
+        with open('sen5x.trace', 'rb') as f:
+            sen = SEN5x(ReplayI2C(f))
+    """
+    class MismatchError(Exception):
+        """ Driver traffic differs from trace """
+        pass
+
+    class EndOfTrace(Exception):
+        """ No more records in trace """
+        pass
+
+    def __init__(self, stream, realtime: bool = False, strict: bool = True, clock=None):
+        self.realtime = realtime
+        self.strict = strict
+        self.clock = Clock() if clock is None else clock
+        self.replayed = 0  # records replayed
+        self._records = records(stream)
+        self._last_ticks = self.clock.ticks_us()
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}(realtime={self.realtime}, strict={self.strict})'
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        payload = self._next(WRITE, addr)
+        self._check_written(payload, buf)
+        return len(buf)
+
+    def readfrom_into(self, addr: int, buf, stop: bool = True) -> None:
+        payload = self._next(READ, addr)
+        n = min(len(buf), len(payload))
+        buf[:n] = payload[:n]
+
+    def writeto_mem(self, addr: int, memaddr: int, buf, *, addrsize: int = 8) -> None:
+        payload = self._next(WRITE_MEM, addr, memaddr)
+        self._check_written(payload, buf)
+
+    def scan(self) -> list[int]:
+        return list(self._next(SCAN, 0))
+
+    def _next(self, op: int, addr: int, memaddr: int = 0) -> bytes:
+        """ Returns payload of next record, raises recorded OSError """
+        try:
+            record_op, record_addr, record_memaddr, payload, delta_us = next(self._records)
+        except StopIteration:
+            raise self.EndOfTrace('End of trace')
+        self.replayed += 1
+        if self.realtime:
+            clock = self.clock
+            wait_us = delta_us - clock.ticks_diff(clock.ticks_us(), self._last_ticks)
+            if wait_us > 0:
+                clock.sleep_us(wait_us)
+            self._last_ticks = clock.ticks_us()
+
+        if record_op == ERROR:
+            record_op = record_memaddr
+            errno, record_memaddr = unpack('>HH', payload)
+            error = OSError(errno)
+        else:
+            error = None
+        if self.strict and (record_op != op or record_addr != addr or record_memaddr != memaddr):
+            raise self.MismatchError(f'Expected op {record_op} {hex(record_memaddr)} at {hex(record_addr)}, '
+                                     f'got op {op} {hex(memaddr)} at {hex(addr)}')
+        if error is not None:
+            raise error
+        return payload
+
+    def _check_written(self, payload: bytes, buf) -> None:
+        if self.strict and bytes(buf) != payload:
+            raise self.MismatchError(f'Expected write {payload}, got {bytes(buf)}')
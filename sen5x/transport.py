@@ -0,0 +1,196 @@
+from sen5x.clock import Clock
+from sen5x.compat import const
+
+CRC_TABLE = (  # CRC-8 0x31 init 0xFF, see Sensirion datasheets for checksum calculation
+    b'\x00\x31\x62\x53\xc4\xf5\xa6\x97\xb9\x88\xdb\xea\x7d\x4c\x1f\x2e'
+    b'\x43\x72\x21\x10\x87\xb6\xe5\xd4\xfa\xcb\x98\xa9\x3e\x0f\x5c\x6d'
+    b'\x86\xb7\xe4\xd5\x42\x73\x20\x11\x3f\x0e\x5d\x6c\xfb\xca\x99\xa8'
+    b'\xc5\xf4\xa7\x96\x01\x30\x63\x52\x7c\x4d\x1e\x2f\xb8\x89\xda\xeb'
+    b'\x3d\x0c\x5f\x6e\xf9\xc8\x9b\xaa\x84\xb5\xe6\xd7\x40\x71\x22\x13'
+    b'\x7e\x4f\x1c\x2d\xba\x8b\xd8\xe9\xc7\xf6\xa5\x94\x03\x32\x61\x50'
+    b'\xbb\x8a\xd9\xe8\x7f\x4e\x1d\x2c\x02\x33\x60\x51\xc6\xf7\xa4\x95'
+    b'\xf8\xc9\x9a\xab\x3c\x0d\x5e\x6f\x41\x70\x23\x12\x85\xb4\xe7\xd6'
+    b'\x7a\x4b\x18\x29\xbe\x8f\xdc\xed\xc3\xf2\xa1\x90\x07\x36\x65\x54'
+    b'\x39\x08\x5b\x6a\xfd\xcc\x9f\xae\x80\xb1\xe2\xd3\x44\x75\x26\x17'
+    b'\xfc\xcd\x9e\xaf\x38\x09\x5a\x6b\x45\x74\x27\x16\x81\xb0\xe3\xd2'
+    b'\xbf\x8e\xdd\xec\x7b\x4a\x19\x28\x06\x37\x64\x55\xc2\xf3\xa0\x91'
+    b'\x47\x76\x25\x14\x83\xb2\xe1\xd0\xfe\xcf\x9c\xad\x3a\x0b\x58\x69'
+    b'\x04\x35\x66\x57\xc0\xf1\xa2\x93\xbd\x8c\xdf\xee\x79\x48\x1b\x2a'
+    b'\xc1\xf0\xa3\x92\x05\x34\x67\x56\x78\x49\x1a\x2b\xbc\x8d\xde\xef'
+    b'\x82\xb3\xe0\xd1\x46\x77\x24\x15\x3b\x0a\x59\x68\xff\xce\x9d\xac'
+)
+
+
+def crc8(msb: int, lsb: int) -> int:
+    """ Sensirion checksum of one word """
+    return CRC_TABLE[CRC_TABLE[0xFF ^ msb] ^ lsb]
+
+
+class SensirionI2C:
+    """
+    Sensirion word + checksum framing over an I2C bus, shared by the Sensirion drivers on that bus
+    See README.md for details
+
+    One instance per bus holds the bus, optional lock, clock, lock metrics and one framing buffer used by all drivers
+    Commands are 16 bit (SEN5x, SCD30, SCD4x, ...) or 8 bit (cmd_size=1, SHT4x)
+    Responses are checked and copied into a buffer of the calling driver while the bus is held,
+    so drivers on other threads can't overwrite the shared buffer before it is decoded
+    The bus is released while the device executes a command, so other devices can use it in between
+
+    Usage:
+        bus = SensirionI2C(i2c, lock=_thread.allocate_lock())
+        sen = SEN5x(bus)
+        valid = bus.read(ADDRESS, CMD, num_words=2, into=buffer, exe_time_ms=20)  # None if not available
+        bus.send(ADDRESS, CMD)  # or send now and collect the response later, without waiting
+        valid = bus.collect(ADDRESS, num_words=2, into=buffer)
+    """
+    class CRCError(Exception):
+        """ Checksum error """
+        pass
+
+    BUFFER_SIZE = const(48)  # bytes, 16 words with checksums (longest SEN5x response)
+
+    def __init__(self, i2c, lock=None, clock=None, buffer_size: int = BUFFER_SIZE):
+        """
+        lock is optional and shared by all users of the I2C bus, e.g. _thread.allocate_lock()
+        clock is the time source for command execution waits, see sen5x/clock.py (default system time)
+        """
+        if buffer_size % 3:
+            raise ValueError('Buffer size must be divisible by 3')
+        self.i2c = i2c
+        self.lock = lock
+        self.clock = Clock() if clock is None else clock
+        self.lock_contentions = 0  # number of times bus was busy when needed
+        self.lock_wait_us = 0  # total time spent waiting for bus
+        self.transactions = 0  # bus operations
+        self.buffer = bytearray(buffer_size)  # words with checksums, only valid while bus is held
+        view = memoryview(self.buffer)
+        self._views = tuple(view[:n * 3] for n in range(buffer_size // 3 + 1))  # per word count, sliced once
+        self._cmd16 = bytearray(2)
+        self._cmd8 = bytearray(1)
+
+    def __repr__(self) -> str:
+        return f'{__class__.__name__}({self.i2c})'
+
+    def scan(self) -> list[int]:
+        self.acquire()
+        try:
+            return self.i2c.scan()
+        finally:
+            self.release()
+
+    def send(self, address: int, cmd: int, cmd_size: int = 2) -> None:
+        """ Sends command without waiting, for callers reading the response later with collect() """
+        self.acquire()
+        try:
+            self._send(address, cmd, cmd_size)
+        finally:
+            self.release()
+
+    def execute(self, address: int, cmd: int, exe_time_ms: int, cmd_size: int = 2) -> None:
+        """ Sends command and waits exe_time_ms for device to execute it, with bus released """
+        self.send(address, cmd, cmd_size=cmd_size)
+        self.clock.sleep_ms(exe_time_ms)
+
+    def read(self,
+             address: int,
+             cmd: int,
+             num_words: int,
+             into: bytearray,
+             exe_time_ms: int,
+             strict: bool = True,
+             cmd_size: int = 2,
+             ) -> [int, None]:
+        """ Executes command then returns collect() of response """
+        self.execute(address, cmd, exe_time_ms, cmd_size=cmd_size)
+        return self.collect(address, num_words, into, strict=strict)
+
+    def collect(self, address: int, num_words: int, into: bytearray, strict: bool = True) -> [int, None]:
+        """
+        Reads num_words words of the response to the command sent, copied into into without checksums (2 bytes per word)
+        Returns a bit per word (bit i for word i) set if its checksum is valid, or None if response not available
+        strict=True raises CRCError on the first checksum error instead
+        """
+        self.acquire()
+        try:
+            return self._collect(address, num_words, into, strict)
+        finally:
+            self.release()
+
+    def write(self, address: int, cmd: int, words, exe_time_ms: int, cmd_size: int = 2) -> None:
+        """ Executes command with data, words are 2 bytes each, checksums are added """
+        num_words = len(words) // 2
+        if num_words == 0 or num_words * 3 > len(self.buffer):
+            raise ValueError('Words out of range')
+        buffer = self.buffer
+        crc = crc8  # one checksum implementation, bound locally for the loop
+        self.acquire()
+        try:
+            for i in range(num_words):
+                msb = words[i * 2]
+                lsb = words[i * 2 + 1]
+                buffer[i * 3] = msb
+                buffer[i * 3 + 1] = lsb
+                buffer[i * 3 + 2] = crc(msb, lsb)
+            self.i2c.writeto_mem(address, cmd, self._views[num_words], addrsize=cmd_size * 8)
+            self.transactions += 1
+        finally:
+            self.release()
+        self.clock.sleep_ms(exe_time_ms)
+
+    def acquire(self, wait: bool = True) -> bool:
+        """
+        Acquires optional bus lock, returns False if wait is False and bus is busy
+        Tries without waiting first so uncontended access costs no timing overhead
+        """
+        if self.lock is None:
+            return True
+        if not self.lock.acquire(0):
+            if not wait:  # e.g. scheduled callback, would deadlock on a lock held by the thread it interrupted
+                self.lock_contentions += 1
+                return False
+            clock = self.clock
+            start = clock.ticks_us()
+            self.lock.acquire()
+            self.lock_wait_us += clock.ticks_diff(clock.ticks_us(), start)
+            self.lock_contentions += 1
+        return True
+
+    def release(self) -> None:
+        if self.lock is not None:
+            self.lock.release()
+
+    def _collect(self, address: int, num_words: int, into: bytearray, strict: bool) -> [int, None]:
+        """ collect() without allocating, bus must be held """
+        buffer = self.buffer
+        self.i2c.readfrom_into(address, self._views[num_words])  # only the words needed are clocked out
+        self.transactions += 1
+        for i in range(num_words * 3):  # all 0xFF if data not available
+            if buffer[i] != 0xFF:
+                break
+        else:
+            return None
+        valid = 0
+        crc = crc8  # one checksum implementation, bound locally for the loop
+        for i in range(num_words):
+            msb = buffer[i * 3]
+            lsb = buffer[i * 3 + 1]
+            if crc(msb, lsb) == buffer[i * 3 + 2]:
+                valid |= 1 << i
+            elif strict:
+                raise self.CRCError('Checksum error')
+            into[i * 2] = msb
+            into[i * 2 + 1] = lsb
+        return valid
+
+    def _send(self, address: int, cmd: int, cmd_size: int) -> None:
+        """ Writes command without allocating, bus must be held """
+        if cmd_size == 2:
+            buffer = self._cmd16
+            buffer[0] = cmd >> 8
+            buffer[1] = cmd & 0xFF
+        else:
+            buffer = self._cmd8
+            buffer[0] = cmd
+        self.i2c.writeto(address, buffer)
+        self.transactions += 1
@@ -0,0 +1,67 @@
+"""
+Adaptive sampler tests, run on a host (CPython) or device without sensors attached
+    python -c "import runpy; runpy.run_path('test/adaptive.py')['run_all_tests']()"
+"""
+from sen5x.adaptive import AdaptiveSampler
+from sen5x.clock import VirtualClock
+
+TICKS = (52, 85, 102, 110, 4550, 4700, 1000, 10)
+
+
+class FakeSEN5x:
+    def __init__(self):
+        self.measured_values_ticks = TICKS
+        self.status = 0
+        self.clock = VirtualClock()
+
+
+def _run(sampler: AdaptiveSampler, start: int, end: int) -> list[int]:
+    """ Polls every 100 ms, returns times read """
+    return [now for now in range(start, end, 100) if sampler.poll(now=now)]
+
+
+def test_slows_down():
+    sampler = AdaptiveSampler(FakeSEN5x(), min_period_ms=1000, max_period_ms=8000)
+    assert _run(sampler, 0, 40000) == [0, 1000, 3000, 7000, 15000, 23000, 31000, 39000]
+    assert sampler.period_ms == 8000
+    assert sampler.reads == 8
+    assert sampler.transactions == 8 + 7  # status with each read while slowed down, and first
+    assert sampler.transactions_saved == 399 // 10 + 1 - 15
+    assert sampler.values == (5.2, 8.5, 10.2, 11.0, 45.5, 23.5, 100.0, 1.0)
+
+
+def test_change_resets():
+    sen = FakeSEN5x()
+    sampler = AdaptiveSampler(sen, min_period_ms=1000, max_period_ms=8000)
+    _run(sampler, 0, 8000)  # reads at 0, 1000, 3000, 7000
+    sen.measured_values_ticks = TICKS[:1] + (TICKS[1] + 5,) + TICKS[2:]  # within tolerance
+    assert _run(sampler, 8000, 16000) == [15000]
+    sen.measured_values_ticks = TICKS[:1] + (TICKS[1] + 6,) + TICKS[2:]
+    assert _run(sampler, 16000, 24000) == [23000]
+    assert sampler.period_ms == 1000
+    assert _run(sampler, 24000, 31000) == [24000, 26000, 30000]
+
+
+def test_status_resets():
+    sen = FakeSEN5x()
+    sampler = AdaptiveSampler(sen, min_period_ms=1000, max_period_ms=8000)
+    _run(sampler, 0, 8000)
+    sen.status = 1 << 21
+    _run(sampler, 8000, 16000)
+    assert sampler.status == 1 << 21
+    assert sampler.period_ms == 1000
+
+
+def test_range():
+    try:
+        AdaptiveSampler(FakeSEN5x(), min_period_ms=2000, max_period_ms=1000)
+        assert False, 'ValueError expected'
+    except ValueError:
+        pass
+
+
+def run_all_tests():
+    test_slows_down()
+    test_change_resets()
+    test_status_resets()
+    test_range()
@@ -0,0 +1,101 @@
+from sen5x.aqi import AQI
+from sen5x.sen5x import SEN5x
+
+START = 7000 * 3600  # arbitrary hour boundary in seconds
+
+
+def _feed(aqi: AQI, hours: int, pm2_5: float, pm10: float, start_hour: int = 0):
+    """ one sample per minute """
+    value = None
+    for hour in range(start_hour, start_hour + hours):
+        for minute in range(60):
+            value = aqi.update(pm2_5, pm10, now=START + hour * 3600 + minute * 60)
+    return value
+
+
+def test_not_enough_data():
+    aqi = AQI()
+    assert aqi.update(12.0, 40.0, now=START) is None  # needs 2 of 3 recent hours
+    assert aqi.category is None
+    assert aqi.daily is None
+
+
+def test_nowcast_steady():
+    aqi = AQI()
+    value = _feed(aqi, hours=2, pm2_5=12.0, pm10=40.0)
+    print('nowcast:', value, AQI.CATEGORIES[aqi.category])
+    assert value == 56  # PM2.5 12.0 µg/m³
+    assert aqi.category == 1
+    assert aqi.nowcast_pm2_5 == 120
+    assert aqi.daily is None  # needs 18 hours
+
+
+def test_nowcast_step():
+    aqi = AQI()
+    _feed(aqi, hours=20, pm2_5=12.0, pm10=40.0)
+    value = _feed(aqi, hours=1, pm2_5=60.0, pm10=40.0, start_hour=20)
+    # weight factor 12 / 60 is below 0.5, so 0.5 is used
+    assert aqi.nowcast_pm2_5 == 360
+    assert value == 102
+    assert aqi.daily_pm2_5 == (20 * 120 + 600) // 21
+
+
+def test_daily():
+    aqi = AQI()
+    _feed(aqi, hours=24, pm2_5=12.0, pm10=40.0)
+    assert aqi.daily_pm2_5 == 120
+    assert aqi.daily_pm10 == 400
+    assert aqi.daily == 56
+    assert aqi.daily_category == 1
+
+
+def test_pm10_dominates():
+    aqi = AQI()
+    value = _feed(aqi, hours=2, pm2_5=5.0, pm10=200.0)
+    assert aqi.nowcast_pm10 == 2000
+    assert value == 123  # PM10 200 µg/m³
+
+
+def test_unknown_values():
+    aqi = AQI()
+    value = _feed(aqi, hours=2, pm2_5=12.0, pm10=None)
+    assert value == 56
+    assert aqi.nowcast_pm10 is None
+
+
+def test_update_ticks():
+    aqi = AQI()
+    for hour in range(2):
+        value = aqi.update_ticks(120, SEN5x.UNKNOWN_UNSIGNED, now=START + hour * 3600)
+    assert value == 56
+    assert aqi.nowcast_pm10 is None
+
+
+def test_gap():
+    aqi = AQI()
+    _feed(aqi, hours=2, pm2_5=12.0, pm10=40.0)
+    assert aqi.update(12.0, 40.0, now=START + 5 * 3600) is None  # 3 hours missing
+    assert aqi.update(12.0, 40.0, now=START + 100 * 3600) is None  # all buckets stale
+
+
+def test_breakpoints():
+    assert AQI._index(0, AQI.PM2_5_BREAKPOINTS) == 0
+    assert AQI._index(90, AQI.PM2_5_BREAKPOINTS) == 50
+    assert AQI._index(91, AQI.PM2_5_BREAKPOINTS) == 51
+    assert AQI._index(3254, AQI.PM2_5_BREAKPOINTS) == 500
+    assert AQI._index(9999, AQI.PM2_5_BREAKPOINTS) == 500
+    assert AQI._index(AQI._truncate_pm10(545), AQI.PM10_BREAKPOINTS) == 50
+    assert AQI._category(50) == 0
+    assert AQI._category(301) == 5
+
+
+def run_all_tests():
+    test_not_enough_data()
+    test_nowcast_steady()
+    test_nowcast_step()
+    test_daily()
+    test_pm10_dominates()
+    test_unknown_values()
+    test_update_ticks()
+    test_gap()
+    test_breakpoints()
@@ -0,0 +1,112 @@
+from os import remove
+from sen5x.archive import Archive
+from sen5x.sen5x import SEN5x
+
+DIRECTORY = SEN5x.DATA_DIR
+TIERS = ((1, 100), (10, 30), (100, 5))
+START = 800000000
+
+
+def _archive() -> Archive:
+    return Archive(tiers=TIERS, directory=DIRECTORY, name='test', page_records=4)
+
+
+def _purge():
+    for step, _ in TIERS:
+        try:
+            remove(f'{DIRECTORY}/test_{step}.bin')
+        except OSError:
+            pass
+
+
+def _ticks(i: int) -> tuple:
+    return i % 50, 10, 10, 10, 4500, 4000 + i, 1000, SEN5x.UNKNOWN_SIGNED
+
+
+def test_consolidation():
+    _purge()
+    with _archive() as archive:
+        for i in range(1000):
+            archive.append(_ticks(i), now=START + i)
+
+        seconds = list(archive.query(0, 0, 0xFFFFFFFF))
+        assert len(seconds) == 100  # ring holds last 100
+        assert seconds[0][0] == START + 899
+        assert seconds[-1][0] == START + 998  # 999 not completed yet
+
+        timestamp, count, means, mins, maxs = list(archive.query(1, 0, 0xFFFFFFFF))[-1]
+        assert timestamp == START + 980
+        assert count == 10
+        assert means[0] == 34 and mins[0] == 30 and maxs[0] == 39
+        assert means[5] == 4984
+        assert means[7] == SEN5x.UNKNOWN_SIGNED
+
+        hours = list(archive.query(2, 0, 0xFFFFFFFF))
+        assert [record[0] - START for record in hours] == [400, 500, 600, 700, 800]
+        assert hours[-1][1] == 100
+
+
+def test_partly_unknown():
+    """ Means in coarser tiers are weighted by the samples each channel was known in, not all samples """
+    _purge()
+    with _archive() as archive:
+        for i in range(201):
+            nox = 100 if i == 0 else 0 if i >= 10 else SEN5x.UNKNOWN_SIGNED  # known once in first 10 s
+            archive.append((10, 10, 10, 10, 4500, 4000, 1000, nox), now=START + i)
+        timestamp, count, means, mins, maxs = list(archive.query(2, 0, 0xFFFFFFFF))[-1]
+        assert count == 100
+        assert means[7] == 100 // 91 and mins[7] == 0 and maxs[7] == 100
+
+
+def test_long_steps():
+    """ Steps over 65535 samples are stored clipped but weighted in full """
+    tiers = ((1, 10), (70000, 2), (140000, 2))
+    for step, _ in tiers:
+        try:
+            remove(f'{DIRECTORY}/test_{step}.bin')
+        except OSError:
+            pass
+    with Archive(tiers=tiers, directory=DIRECTORY, name='test', page_records=1) as archive:
+        tier = archive.tiers[2]
+        tier.add(0, (10,) * 8, (10,) * 8, (10,) * 8, 70000, (70000,) * 8)
+        tier.add(70000, (40,) * 8, (40,) * 8, (40,) * 8, 10, (10,) * 8)
+        tier.add(140000, (0,) * 8, (0,) * 8, (0,) * 8, 1, (1,) * 8)
+        timestamp, count, means, mins, maxs = list(archive.query(2, 0, 0xFFFFFFFF))[-1]
+        assert count == 0xFFFF and tier.completed_count == 70010
+        assert means[0] == (10 * 70000 + 40 * 10) // 70010
+    for step, _ in tiers:
+        remove(f'{DIRECTORY}/test_{step}.bin')
+
+
+def test_range_query():
+    _purge()
+    with _archive() as archive:
+        for i in range(1000):
+            archive.append(_ticks(i), now=START + i)
+        records = list(archive.query(0, START + 950, START + 960))
+        assert len(records) == 11
+        assert records[0][0] == START + 950
+        assert records[-1][0] == START + 960
+        assert list(archive.query(0, START + 2000, START + 3000)) == []
+
+
+def test_reopen():
+    _purge()
+    with _archive() as archive:
+        for i in range(1000):
+            archive.append(_ticks(i), now=START + i)
+    with _archive() as archive:
+        for i in range(1000, 1010):
+            archive.append(_ticks(i), now=START + i)
+        seconds = list(archive.query(0, 0, 0xFFFFFFFF))
+        assert seconds[0][0] == START + 908
+        assert seconds[-1][0] == START + 1008
+    _purge()
+
+
+def run_all_tests():
+    test_consolidation()
+    test_partly_unknown()
+    test_long_steps()
+    test_range_query()
+    test_reopen()
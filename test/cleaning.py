@@ -0,0 +1,111 @@
+"""
+Fan cleaning scheduler tests, run on a host (CPython) or device without sensors attached
+    python -c "import runpy; runpy.run_path('test/cleaning.py')['run_all_tests']()"
+"""
+from sen5x.cleaning import CleaningScheduler
+from sen5x.clock import VirtualClock
+from sen5x.sen5x import SEN5x
+from sen5x.simulator import SimulatedSEN5x
+
+WEEK = 604800
+
+
+class FakeSEN5x:
+    """ Cleans for 10 s of the time set in now """
+    def __init__(self):
+        self.now = 0
+        self.auto_cleaning_interval = WEEK
+        self.cleaning_started = None
+        self.fail = False
+
+    @property
+    def fan_cleaning_active(self) -> bool:
+        return self.cleaning_started is not None and self.now - self.cleaning_started < 10
+
+    def start_fan_cleaning(self) -> None:
+        if self.fail:
+            raise SEN5x.InvalidMode('Must be in measurement mode')
+        self.cleaning_started = self.now
+
+
+def _run(scheduler: CleaningScheduler, start: int, end: int, step: int = 1) -> int:
+    """ Polls every step seconds, returns least number of units not cleaning seen """
+    least = len(scheduler.sensors)
+    for now in range(start, end, step):
+        for sen in scheduler.sensors:
+            sen.now = now
+        scheduler.poll(now=now)
+        least = min(least, len(scheduler.sensors) - scheduler.active)
+        assert sum(sen.fan_cleaning_active for sen in scheduler.sensors) <= scheduler.max_concurrent
+    return least
+
+
+def test_attach():
+    sensors = [FakeSEN5x() for _ in range(3)]
+    CleaningScheduler(sensors).attach()
+    assert [sen.auto_cleaning_interval for sen in sensors] == [0, 0, 0]
+
+
+def test_stagger():
+    sensors = [FakeSEN5x() for _ in range(4)]
+    scheduler = CleaningScheduler(sensors, interval=400, last_cleaned=[None, None, 50, None])
+    scheduler._stagger(1000)
+    assert scheduler.due == [1133, 1266, 450, 1400]
+
+
+def test_max_concurrent():
+    sensors = [FakeSEN5x() for _ in range(5)]
+    scheduler = CleaningScheduler(sensors, interval=100, max_concurrent=2, last_cleaned=[0] * 5)  # all due at once
+    assert _run(scheduler, 100, 1000, step=5) == 3
+    assert scheduler.cleanings >= 5 * 8
+    assert all(last is not None and last > 800 for last in scheduler.last_cleaned)
+
+
+def test_interval():
+    sensors = [FakeSEN5x() for _ in range(3)]
+    scheduler = CleaningScheduler(sensors, interval=300)
+    scheduler._stagger(0)
+    assert _run(scheduler, 0, 1000) == 2
+    assert scheduler.cleanings == 9  # each unit every 300 s from its staggered start
+    starts = sorted(scheduler.last_cleaned)
+    assert starts == [700, 800, 900]
+
+
+def test_start_error():
+    sensors = [FakeSEN5x() for _ in range(2)]
+    sensors[0].fail = True
+    scheduler = CleaningScheduler(sensors, interval=100, last_cleaned=[0, 0])
+    assert scheduler.poll(now=100) == [1]
+    assert scheduler.errors == 1
+    assert scheduler.cleaning == [False, True]
+
+
+def test_simulated_days():
+    """ 3 days of daily cleaning of 4 simulated units in virtual time """
+    clock = VirtualClock(epoch=800000000)
+    sensors = []
+    for address in range(0x69, 0x6D):
+        sen = SEN5x(SimulatedSEN5x(address=address, clock=clock), address=address, clock=clock)
+        sen.start_measurement()
+        sensors.append(sen)
+    scheduler = CleaningScheduler(sensors, interval=86400, max_concurrent=1, clock=clock)
+    scheduler.attach()
+    least = len(sensors)
+    for _ in range((3 * 86400 + 60) // 5):  # last unit is due at exactly 3 days
+        scheduler.poll()
+        cleaning = sum(sen.i2c.fan_cleaning_active for sen in sensors)
+        assert cleaning <= 1
+        least = min(least, len(sensors) - cleaning)
+        clock.advance(5000)
+    assert least == 3
+    assert scheduler.cleanings == 4 * 3
+    assert scheduler.errors == 0
+
+
+def run_all_tests():
+    test_attach()
+    test_stagger()
+    test_max_concurrent()
+    test_interval()
+    test_start_error()
+    test_simulated_days()
@@ -0,0 +1,116 @@
+"""
+Climate metrics tests, run on a host (CPython) or device without sensors attached
+Checks the tables and their interpolation against the exact formulas over the SEN5x working range
+    python -c "import runpy; runpy.run_path('test/climate.py')['run_all_tests']()"
+"""
+from math import exp, log, sqrt
+from sen5x import climate
+from sen5x.sen5x import SEN5x
+
+
+def _saturation_vapour_pressure(t: float) -> float:
+    """ Pa over water, Magnus formula with Sonntag constants """
+    return 611.2 * exp(17.62 * t / (243.12 + t))
+
+
+def _heat_index(rh: float, t: float) -> float:
+    """ °C per NWS (https://www.wpc.ncep.noaa.gov/html/heatindex_equation.shtml) """
+    f = t * 1.8 + 32
+    hi = 0.5 * (f + 61.0 + (f - 68.0) * 1.2 + rh * 0.094)
+    if (hi + f) / 2 >= 80:
+        hi = (-42.379 + 2.04901523 * f + 10.14333127 * rh - 0.22475541 * f * rh - 0.00683783 * f * f
+              - 0.05481717 * rh * rh + 0.00122874 * f * f * rh + 0.00085282 * f * rh * rh
+              - 0.00000199 * f * f * rh * rh)
+        if rh < 13 and 80 <= f <= 112:
+            hi -= (13 - rh) / 4 * sqrt((17 - abs(f - 95)) / 17)
+        elif rh > 85 and 80 <= f <= 87:
+            hi += (rh - 85) / 10 * (87 - f) / 5
+    return (hi - 32) / 1.8
+
+
+def _exact_dew_point(rh: float, t: float) -> float:
+    gamma = log(rh / 100) + 17.62 * t / (243.12 + t)
+    return 243.12 * gamma / (17.62 - gamma)
+
+
+def _exact_absolute_humidity(rh: float, t: float) -> float:
+    """ mg/m³ """
+    return 216.7 * rh / 100 * 6.112 * exp(17.62 * t / (243.12 + t)) / (273.15 + t) * 1000
+
+
+def _grid():
+    for t10 in range(-100, 501, 7):
+        for rh10 in range(50, 1001, 13):
+            yield rh10 / 10, t10 / 10, rh10 * 10, t10 * 20
+
+
+def test_tables():
+    """ Tables generated offline (3 & 2 bytes big endian per entry) match the formulas """
+    assert len(climate.ES_TABLE) == climate.ES_ENTRIES * 3
+    for i, t in enumerate(range(climate.ES_MIN, climate.ES_MAX + 1)):
+        assert climate._es(i) == round(_saturation_vapour_pressure(t) * 10), t
+    rows = climate.HI_MAX - climate.HI_MIN + 1
+    assert len(climate.HI_TABLE) == rows * climate.HI_COLUMNS * 2
+    for row in range(rows):
+        for column in range(climate.HI_COLUMNS):
+            rh = column * climate.HI_RH_STEP / climate.RH_SCALE
+            expected = round(_heat_index(rh, climate.HI_MIN + row) * climate.T_SCALE)
+            assert climate._hi(row * climate.HI_COLUMNS + column) == expected, (row, column)
+
+
+def test_dew_point():
+    for rh, t, rh_ticks, t_ticks in _grid():
+        exact = _exact_dew_point(rh, t)
+        if exact > -40:
+            assert abs(climate.dew_point(rh_ticks, t_ticks) / 200 - exact) < 0.05, (rh, t)
+    assert climate.dew_point(4550, 4700) == round(_exact_dew_point(45.5, 23.5) * 200)  # 11.1 °C
+    assert climate.dew_point(0, 4700) == -40 * 200
+
+
+def test_absolute_humidity():
+    for rh, t, rh_ticks, t_ticks in _grid():
+        exact = _exact_absolute_humidity(rh, t)
+        error = abs(climate.absolute_humidity(rh_ticks, t_ticks) - exact)
+        assert error < 25 and (exact > 1000 or error < exact / 100), (rh, t, error)
+    assert climate.absolute_humidity(10000, 20 * 200) // 100 == 172  # 17.2 g/m³ at 20 °C, 100 %RH (Magnus)
+
+
+def _regression(rh: float, t: float) -> bool:
+    """ NWS heat index uses the regression instead of the simple formula """
+    f = t * 1.8 + 32
+    return (0.5 * (f + 61.0 + (f - 68.0) * 1.2 + rh * 0.094) + f) / 2 >= 80
+
+
+def test_heat_index():
+    for t10 in range(200, 500, 3):
+        for rh10 in range(0, 1000, 7):
+            t, rh = t10 / 10, rh10 / 10
+            row, column = int(t), int(rh // 5)
+            corners = {_regression(r, x) for r in (column * 5, column * 5 + 5) for x in (row, row + 1)}
+            near_switch = len(corners) > 1 or column * 5 < 13 < column * 5 + 5 or column * 5 < 85 < column * 5 + 5
+            error = abs(climate.heat_index(rh10 * 10, t10 * 20) / 200 - _heat_index(rh, t))
+            assert error < (0.65 if near_switch else 0.2), (rh, t, error)
+    for t in (-10, 0, 10, 19.5):  # simple formula
+        assert abs(climate.heat_index(5000, int(t * 200)) / 200 - _heat_index(50, t)) < 0.01
+    assert round(climate.heat_index(7000, 35 * 200) / 200 * 1.8 + 32) == 123  # 95 °F 70 %RH -> 123 °F
+
+
+def test_unknown():
+    for f, unknown in ((climate.dew_point, climate.UNKNOWN),
+                       (climate.absolute_humidity, climate.AH_UNKNOWN),
+                       (climate.heat_index, climate.UNKNOWN)):
+        assert f(SEN5x.UNKNOWN_SIGNED, 4700) == unknown
+        assert f(4550, SEN5x.UNKNOWN_SIGNED) == unknown
+    for t in (30, 35, 50):  # valid absolute humidity above UNKNOWN, distinct from AH_UNKNOWN
+        value = climate.absolute_humidity(10000, t * 200)
+        assert value != climate.AH_UNKNOWN and value > 0
+        assert abs(value - _exact_absolute_humidity(100, t)) < 25
+    assert climate.absolute_humidity(10000, 35 * 200) > SEN5x.UNKNOWN_SIGNED
+
+
+def run_all_tests():
+    test_tables()
+    test_dew_point()
+    test_absolute_humidity()
+    test_heat_index()
+    test_unknown()
@@ -0,0 +1,97 @@
+"""
+Coalescing tests, run on a host (CPython) against a simulated sensor in virtual time
+    python -c "import runpy; runpy.run_path('test/coalesce.py')['run_all_tests']()"
+"""
+import _thread
+from time import sleep
+from sen5x.clock import VirtualClock
+from sen5x.coalesce import CoalescingSEN5x
+from sen5x.sen5x import SEN5x
+from sen5x.simulator import SimulatedSEN5x
+
+
+class SlowClock(VirtualClock):
+    """ Sleeps also yield to other threads so reads overlap """
+    def sleep_ms(self, ms: int) -> None:
+        super().sleep_ms(ms)
+        sleep(0.01)
+
+
+def _shared(clock: VirtualClock = None) -> CoalescingSEN5x:
+    clock = VirtualClock() if clock is None else clock
+    shared = CoalescingSEN5x(SEN5x(SimulatedSEN5x(clock=clock), clock=clock))
+    shared.start_measurement()
+    assert shared.sen.variant == 'SEN55'  # read once
+    return shared
+
+
+def test_ttl():
+    shared = _shared()
+    sim = shared.sen.i2c
+    commands = sim.commands
+    raw = shared.measured_values_raw
+    assert shared.measured_values_ticks == (52, 85, 102, 110, 4550, 4700, 1000, 10)
+    assert shared.measured_values == SEN5x._round_measured_values(*raw)
+    assert shared.measured_values_imperial[5] == 74
+    assert sim.commands == commands + 1  # one MEASURED_VALUES read for all forms
+    assert shared.status == 0 and shared.fan_cleaning_active is False
+    assert (shared.transactions, shared.avoided) == (2, 4)
+    shared.sen.clock.advance(1000)
+    shared.measured_values_raw
+    assert shared.transactions == 3
+
+
+def test_frame_cadence():
+    """ Measured values expire ttl_ms after their frame was first seen, not ttl_ms after the last read """
+    shared = _shared()
+    sen, sim, clock = shared.sen, shared.sen.i2c, shared.sen.clock
+    start = clock.ticks_ms()
+    assert shared.measured_values_ticks[0] == 52  # frame first seen
+    shared.call(lambda: sen.serial_number)  # invalidates
+    clock.advance(800)
+    assert shared.measured_values_ticks[0] == 52  # same frame read again
+    sim.ticks = (60,) + sim.ticks[1:]  # next frame
+    clock.advance(start + 999 - clock.ticks_ms())
+    assert shared.measured_values_ticks[0] == 52  # cached
+    transactions = shared.transactions
+    clock.advance(1)
+    assert shared.measured_values_ticks[0] == 60
+    assert shared.transactions == transactions + 1
+
+
+def test_invalidate():
+    shared = _shared()
+    assert shared.status == 0
+    shared.start_fan_cleaning()
+    assert shared.fan_cleaning_active is True  # not served from before the mode change
+    assert shared.call(lambda: shared.sen.serial_number) == '0123456789ABCDEF'
+    shared.stop_measurement()
+    assert shared.measured_values_ticks == SEN5x.UNKNOWN_TICKS
+
+
+def test_threads():
+    shared = _shared(SlowClock())
+    done = []
+    lock = _thread.allocate_lock()
+
+    def reader():
+        values = shared.measured_values_raw
+        with lock:
+            done.append(values)
+
+    for _ in range(5):
+        _thread.start_new_thread(reader, ())
+    for _ in range(200):
+        if len(done) == 5:
+            break
+        sleep(0.01)
+    assert len(done) == 5 and all(values is done[0] for values in done)
+    assert shared.transactions == 1
+    assert shared.avoided == 4 and shared.coalesced >= 1
+
+
+def run_all_tests():
+    test_ttl()
+    test_frame_cadence()
+    test_invalidate()
+    test_threads()
@@ -0,0 +1,115 @@
+"""
+Exporter tests, run on a host (CPython) against a simulated sensor
+    python -c "import runpy; runpy.run_path('test/exporter.py')['run_all_tests']()"
+"""
+import threading
+from urllib.request import urlopen
+from sen5x.exporter import Collector, MetricsServer, render
+from sen5x.sen5x import SEN5x
+from sen5x.simulator import SimulatedSEN5x
+
+
+def _collector(product_name: str = 'SEN55', address: int = SEN5x.DEFAULT_I2C_ADDR) -> Collector:
+    i2c = SimulatedSEN5x(product_name=product_name)
+    return Collector(SEN5x(i2c, address=address), bus='sim')
+
+
+def test_render_before_collect():
+    assert render([_collector()]) == '\n'
+
+
+def test_collect():
+    collector = _collector()
+    snapshot = collector.collect()
+    assert snapshot['up'] is True
+    assert snapshot['info'] == {'product': 'SEN55', 'serial': '0123456789ABCDEF', 'firmware': '1'}
+    assert snapshot['values'] == (5.2, 8.5, 10.2, 11.0, 45.5, 23.5, 100.0, 1.0)
+    assert snapshot['status'] == 0
+    assert snapshot['reads'] == 1
+    assert snapshot['errors'] == 0
+
+    text = render([collector])
+    print(text)
+    labels = 'bus="sim",address="0x69",serial="0123456789ABCDEF"'
+    assert f'sen5x_up{{{labels}}} 1' in text
+    assert f'sen5x_info{{{labels},product="SEN55",firmware="1"}} 1' in text
+    assert f'sen5x_pm2_5_micrograms_per_cubic_meter{{{labels}}} 8.5' in text
+    assert f'sen5x_temperature_celsius{{{labels}}} 23.5' in text
+    assert f'sen5x_status_bit{{{labels},bit="fan_speed_error"}} 0' in text
+    assert f'sen5x_read_duration_seconds_count{{{labels}}} 1' in text
+    assert text.count('# TYPE sen5x_pm2_5_micrograms_per_cubic_meter gauge') == 1
+
+
+def test_unknown_values_omitted():
+    collector = _collector(product_name='SEN54')
+    collector.collect()
+    text = render([collector])
+    assert 'sen5x_voc_index{' in text
+    assert 'sen5x_nox_index' not in text
+
+
+def test_read_error():
+    collector = _collector(address=0x6A)  # nothing at address
+    snapshot = collector.collect()
+    assert snapshot['up'] is False
+    assert snapshot['errors'] == 1
+    assert 'sen5x_up{bus="sim",address="0x6a",serial=""} 0' in render([collector])
+
+
+def test_unexpected_error():
+    collector = _collector()
+    collector.collect()
+
+    def readfrom_into(*args, **kwargs):
+        raise ValueError('e.g. invalid mode')
+
+    collector.sen.i2c.readfrom_into = readfrom_into  # not one of the read errors collect() expects
+    collector.interval = 0.01
+    collector.start()
+    try:
+        for _ in range(500):
+            if collector.snapshot['errors'] >= 2:
+                break
+            threading.Event().wait(0.01)
+        assert collector.is_alive() and collector.snapshot['errors'] >= 2  # loop survived
+    finally:
+        collector.stop()
+        collector.join()
+    snapshot = collector.snapshot
+    assert snapshot['up'] is False
+    assert snapshot['values'] is None and snapshot['status'] is None  # earlier read isn't current
+    text = render([collector])
+    assert 'sen5x_up{bus="sim",address="0x69",serial="0123456789ABCDEF"} 0' in text
+    assert 'sen5x_pm2_5' not in text and 'sen5x_status{' not in text
+
+
+def test_scrape():
+    collectors = [_collector(), _collector(product_name='SEN50')]
+    for collector in collectors:
+        collector.collect()
+    server = MetricsServer(('127.0.0.1', 0), collectors)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        with urlopen(f'{url}/metrics') as response:
+            assert response.status == 200
+            assert response.headers['Content-Type'].startswith('text/plain')
+            text = response.read().decode('utf-8')
+        assert text.count('sen5x_up{') == 2
+        commands = [collector.sen.i2c.commands for collector in collectors]
+        with urlopen(f'{url}/metrics') as response:
+            response.read()
+        assert [collector.sen.i2c.commands for collector in collectors] == commands  # no bus traffic
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run_all_tests():
+    test_render_before_collect()
+    test_collect()
+    test_unknown_values_omitted()
+    test_read_error()
+    test_unexpected_error()
+    test_scrape()
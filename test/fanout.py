@@ -0,0 +1,102 @@
+"""
+Fan-out tests, run on a host (CPython) or device without sensors attached
+    python -c "import runpy; runpy.run_path('test/fanout.py')['run_all_tests']()"
+"""
+from sen5x.fanout import FanOut
+
+
+def _sample(n: int) -> tuple:
+    return n, n + 1, n + 2, n + 3, 45.5, 23.5, 100, 1
+
+
+def test_shared():
+    fan = FanOut(depth=4)
+    a = fan.subscribe()
+    b = fan.subscribe(FanOut.LATEST)
+    sample = _sample(1)
+    assert fan.publish(sample, timestamp=1000)
+    assert a.pop() is sample and b.pop() is sample  # same object, not a copy
+    assert a.timestamp == b.timestamp == 1000
+    assert a.pop() is None and b.pop() is None
+
+
+def test_latest():
+    fan = FanOut(depth=4)
+    sub = fan.subscribe(FanOut.LATEST)
+    for n in range(10):
+        assert fan.publish(_sample(n), timestamp=n)
+    assert sub.available == 1
+    assert sub.pop() == _sample(9)
+    assert sub.dropped == 9
+    assert sub.pop() is None
+
+
+def test_queue():
+    fan = FanOut(depth=8)
+    sub = fan.subscribe(FanOut.QUEUE, limit=3)
+    for n in range(10):
+        assert fan.publish(_sample(n), timestamp=n)
+    assert [sub.pop()[0] for _ in range(3)] == [7, 8, 9]
+    assert sub.dropped == 7 and sub.received == 3
+    fan.publish(_sample(10))
+    assert sub.pop()[0] == 10
+
+
+def test_block():
+    fan = FanOut(depth=4)
+    slow = fan.subscribe(FanOut.BLOCK)
+    fast = fan.subscribe(FanOut.LATEST)
+    results = [fan.publish(_sample(n), timestamp=n) for n in range(5)]
+    assert results == [True, True, True, False, False]
+    assert fan.blocked == 2 and fan.published == 3
+    assert fast.pop()[0] == 2
+    assert slow.pop()[0] == 0
+    assert fan.publish(_sample(5))
+    assert [slow.pop()[0] for _ in range(3)] == [1, 2, 5]
+    assert slow.dropped == 0
+    fan.unsubscribe(slow)
+    assert all(fan.publish(_sample(n)) for n in range(10))
+
+
+def test_lapped():
+    """ Publishing while a subscriber reads (as from a scheduled callback) never returns a reused slot """
+    fan = FanOut(depth=4)
+    sub = fan.subscribe(FanOut.QUEUE)
+    for n in range(3):
+        fan.publish(_sample(n), timestamp=n)
+
+    class Interleaved(list):  # publishes 4 more samples the first time a slot is read
+        def __getitem__(self, i):
+            if fan.published == 3:
+                for n in range(3, 7):
+                    fan.publish(_sample(n), timestamp=n)
+            return list.__getitem__(self, i)
+
+    fan._samples = Interleaved(fan._samples)
+    sample = sub.pop()
+    assert sample[0] == sub.timestamp == 4
+    assert sub.dropped == 4
+
+
+def test_errors():
+    fan = FanOut(depth=4)
+    for policy, limit in ((3, None), (FanOut.QUEUE, 0), (FanOut.QUEUE, 4)):
+        try:
+            fan.subscribe(policy, limit=limit)
+            assert False, 'ValueError expected'
+        except ValueError:
+            pass
+    try:
+        FanOut(depth=1)
+        assert False, 'ValueError expected'
+    except ValueError:
+        pass
+
+
+def run_all_tests():
+    test_shared()
+    test_latest()
+    test_queue()
+    test_block()
+    test_lapped()
+    test_errors()
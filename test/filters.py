@@ -0,0 +1,74 @@
+from sen5x.filters import Hampel, RunningMedian
+from sen5x.sen5x import SEN5x
+
+STEADY = (52, 85, 102, 110, 4550, 4700, 1000, 10)
+
+
+def _with(ticks: tuple, channel: int, tick: int) -> tuple:
+    return ticks[:channel] + (tick,) + ticks[channel + 1:]
+
+
+def test_running_median():
+    f = RunningMedian(window=5, thresholds=(50, 50, 50, 50, 500, 200, None, None))
+    for tick in (80, 82, 84, 86):
+        assert f.update(_with(STEADY, 1, tick)) == 0
+    assert f.values[1] == 82  # lower middle of 4
+    flags = f.update(_with(STEADY, 1, 900))
+    assert flags == 1 << 1
+    assert f.values[1] == 84
+    assert f.flagged == 1
+    for tick in (90, 92, 94, 96, 98):  # spike leaves window
+        f.update(_with(STEADY, 1, tick))
+    assert f.values[1] == 94
+    assert list(f._sorted[5:10]) == [90, 92, 94, 96, 98]
+
+
+def test_hampel():
+    f = Hampel(window=7, k=3)
+    for i in range(6):
+        assert f.update(_with(STEADY, 4, 4550 + i % 3)) == 0
+    flags = f.update(_with(_with(STEADY, 4, 6000), 0, 53))
+    assert flags == 1 << 4  # 1 tick PM change within min_mad
+    assert f.values[4] == 4551  # replaced by median
+    assert f.values[0] == 53  # unflagged channels pass through
+    assert f.update(_with(STEADY, 4, 4552)) == 0
+    assert f.values[4] == 4552
+
+
+def test_mad():
+    f = Hampel(window=7)
+    for tick in (1, 2, 3, 4, 5, 6, 100):
+        f.update(_with(STEADY, 5, tick))
+    assert f._mad(5, f._median(5)) == 2  # deviations from 4: 0 1 1 2 2 3 96
+    f = Hampel(window=5)
+    for tick in (10, 10, 10, 10, 11):
+        f.update(_with(STEADY, 5, tick))
+    assert f._mad(5, f._median(5)) == 0
+
+
+def test_unknown():
+    f = Hampel(window=5)
+    for _ in range(5):
+        f.update(STEADY)
+    unknown = _with(STEADY, 7, SEN5x.UNKNOWN_SIGNED)
+    assert f.update(unknown) == 0
+    assert f.values[7] == SEN5x.UNKNOWN_SIGNED
+    assert f._counts[7] == 5
+
+
+def test_window_order():
+    f = RunningMedian(window=5)
+    ticks = (5, 3, 9, 1, 7, 2, 8, 2, 6, 4, 0, 9)
+    for i, tick in enumerate(ticks):
+        f.update(_with(STEADY, 2, tick))
+        window = sorted(ticks[max(0, i - 4):i + 1])
+        assert list(f._sorted[10:10 + len(window)]) == window
+        assert f.values[2] == window[(len(window) - 1) // 2]
+
+
+def run_all_tests():
+    test_running_median()
+    test_hampel()
+    test_mad()
+    test_unknown()
+    test_window_order()
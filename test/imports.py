@@ -0,0 +1,70 @@
+"""
+Import time and heap of sen5x.sen5x from source (.py), precompiled (.mpy) and frozen modules, run on device
+    mpremote mkdir :src + cp -r sen5x tools :src/   # source in /src
+    make deploy                                     # .mpy in /lib, see Makefile
+    mpremote run test/imports.py                    # compares all found, frozen if built with manifest.py
+Each is imported fresh (modules unloaded in between) with its directory first on sys.path
+Garbage collection is disabled while importing, so allocated is the peak heap needed to import,
+retained is what is left after collecting
+"""
+import gc
+import sys
+from time import ticks_diff, ticks_us
+
+DIRECTORIES = ('/src', '/lib', '.frozen')
+MODULE = 'sen5x.sen5x'
+
+
+def _unload() -> None:
+    for name in list(sys.modules):
+        if name == 'sen5x' or name.startswith('sen5x.') or name == 'tools' or name.startswith('tools.'):
+            del sys.modules[name]
+
+
+def _kind(directory: str) -> [str, None]:
+    """ .py, .mpy or frozen, None if MODULE isn't there """
+    from os import stat
+    if directory == '.frozen':
+        return 'frozen' if directory in sys.path else None
+    for kind in ('.mpy', '.py'):
+        try:
+            stat(f'{directory}/{MODULE.replace(".", "/")}{kind}')
+            return kind
+        except OSError:
+            pass
+    return None
+
+
+def measure(directory: str) -> tuple[int, int, int]:
+    """ Returns (import time µs, allocated bytes, retained bytes) of MODULE from directory """
+    _unload()
+    path = sys.path[:]
+    sys.path[:] = [directory] + path
+    gc.collect()
+    before = gc.mem_alloc()
+    gc.disable()
+    try:
+        start = ticks_us()
+        __import__(MODULE)
+        elapsed = ticks_diff(ticks_us(), start)
+        allocated = gc.mem_alloc() - before
+    finally:
+        gc.enable()
+        sys.path[:] = path
+    gc.collect()
+    return elapsed, allocated, gc.mem_alloc() - before
+
+
+def run_all_tests(directories: tuple = DIRECTORIES) -> None:
+    print(f'{MODULE:<12} {"kind":<7} {"time ms":>8} {"allocated":>10} {"retained":>9}')
+    for directory in directories:
+        kind = _kind(directory)
+        if kind is None:
+            continue
+        elapsed, allocated, retained = measure(directory)
+        print(f'{directory:<12} {kind:<7} {elapsed / 1000:>8.1f} {allocated:>10} {retained:>9}')
+    _unload()
+
+
+if __name__ == '__main__':
+    run_all_tests()
@@ -0,0 +1,114 @@
+"""
+Ingestion tests, run on a host (CPython) with NumPy installed
+    python -c "import runpy; runpy.run_path('test/ingest.py')['run_all_tests']()"
+"""
+import os
+import tempfile
+from struct import pack
+import numpy as np
+from sen5x import trace
+from sen5x.ingest import decode_file, ingest
+from sen5x.sen5x import SEN5x
+from sen5x.transport import crc8
+
+TICKS = (52, 85, 102, 110, 4550, -200, 1000, 10)
+
+
+def _words(values: tuple, fmt: str) -> bytes:
+    data = pack(fmt, *values)
+    return b''.join(bytes((data[i], data[i + 1], crc8(data[i], data[i + 1])))
+                    for i in range(0, len(data), 2))
+
+
+def _record(op: int, address: int, payload: bytes, delta_us: int = 1000) -> bytes:
+    return pack(trace.RECORD_FORMAT, op, address, 0, len(payload), delta_us) + payload
+
+
+def _read(address: int, cmd: int, response: bytes, padding: int = 0) -> bytes:
+    """ padding pads response with 0xFF to that length, as read before only the words needed were read """
+    return (_record(trace.WRITE, address, pack('>H', cmd)) +
+            _record(trace.READ, address, response + b'\xFF' * (padding - len(response)), delta_us=20000))
+
+
+def _trace(path: str, address: int, serial: [str, None], frames: list[bytes], padding: int = 48) -> None:
+    with open(path, 'wb') as f:
+        f.write(trace.MAGIC)
+        if serial is not None:
+            f.write(_read(address, SEN5x.SERIAL_NUMBER, _words(tuple(serial.encode()) + (0, 0), f'>{len(serial) + 2}B')))
+        for frame in frames:
+            f.write(_read(address, SEN5x.DATA_READY_FLAG, _words((0, 1), '>2B')))
+            f.write(_read(address, SEN5x.MEASURED_VALUES, frame, padding=padding))
+
+
+def _frame(i: int) -> bytes:
+    return _words((TICKS[0] + i,) + TICKS[1:], '>4H4h')
+
+
+def test_decode_file():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'a.trace')
+        corrupted = bytearray(_frame(2))
+        corrupted[22] ^= 0x01  # NOx word
+        _trace(path, 0x69, 'SERIAL01', [_frame(0), _frame(1), b'\xFF' * 24, bytes(corrupted), _frame(3)])
+        result = decode_file(path)
+        assert result['frames'] == 3
+        assert result['unavailable'] == 1
+        assert result['crc_errors'] == 1
+        times, ticks = result['sensors']['SERIAL01']
+        assert ticks.tolist()[0] == [52, 85, 102, 110, 4550, 65336, 1000, 10]
+        assert ticks[:, 0].tolist() == [52, 53, 55]
+        assert np.all(np.diff(times) > 0)
+
+
+def test_variant_frames():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sen50.trace')
+        _trace(path, 0x69, 'SERIAL50', [_words(TICKS[:4], '>4H'), _words(TICKS[:7], '>4H3h')], padding=0)
+        result = decode_file(path)
+        assert result['frames'] == 2
+        _, ticks = result['sensors']['SERIAL50']
+        assert ticks.tolist() == [
+            [52, 85, 102, 110, 0x7FFF, 0x7FFF, 0x7FFF, 0x7FFF],
+            [52, 85, 102, 110, 4550, 65336, 1000, 0x7FFF],
+        ]
+
+
+def test_not_a_trace():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bad.trace')
+        with open(path, 'wb') as f:
+            f.write(b'not a trace')
+        try:
+            decode_file(path)
+            assert False, 'ValueError expected'
+        except ValueError:
+            pass
+
+
+def test_ingest():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i, serial in enumerate(('SERIAL01', 'SERIAL02', 'SERIAL01', None)):
+            paths.append(os.path.join(directory, f'{i}.trace'))
+            _trace(paths[-1], 0x69, serial, [_frame(i * 10 + j) for j in range(5)])
+        output = os.path.join(directory, 'out')
+        totals = ingest(paths, output, workers=2, chunksize=1)
+        assert totals['frames'] == 20
+        assert totals['sensors'] == 3
+        assert totals['errors'] == 0
+        serial01 = os.path.join(output, 'SERIAL01')
+        assert np.load(os.path.join(serial01, 'file.npy')).tolist() == [0] * 5 + [2] * 5
+        assert np.load(os.path.join(serial01, 'pm1_0.npy')).tolist() == \
+               list(range(52, 57)) + list(range(72, 77))
+        t = np.load(os.path.join(serial01, 't.npy'))
+        assert t.dtype == np.int16 and t.tolist() == [-200] * 10
+        assert np.load(os.path.join(output, 'unknown_0x69', 'nox.npy')).tolist() == [10] * 5
+        with open(os.path.join(output, 'files.txt')) as f:
+            assert f.read().split() == paths
+
+
+def run_all_tests():
+    test_decode_file()
+    test_variant_frames()
+    test_not_a_trace()
+    test_ingest()
@@ -0,0 +1,82 @@
+from os import remove
+from sen5x.log import SampleLog
+from sen5x.sen5x import SEN5x
+
+DIRECTORY = SEN5x.DATA_DIR
+START = 800000000
+
+
+def _log() -> SampleLog:
+    return SampleLog(directory=DIRECTORY, name='test', block_records=8)
+
+
+def _purge():
+    for extension in ('bin', 'idx'):
+        try:
+            remove(f'{DIRECTORY}/test.{extension}')
+        except OSError:
+            pass
+
+
+def _fill(log: SampleLog, first: int, last: int):
+    for i in range(first, last):
+        log.append((i, 2 * i, 10, 10, 4500, -200, 1000, SEN5x.UNKNOWN_SIGNED), now=START + i * 10)
+
+
+def test_query():
+    _purge()
+    with _log() as log:
+        _fill(log, 0, 100)
+        assert log.records == 100
+        records = list(log.query(START + 305, START + 400))
+        assert [timestamp for timestamp, _ in records] == [START + i * 10 for i in range(31, 41)]
+        assert records[0][1] == (31, 62, 10, 10, 4500, -200, 1000, SEN5x.UNKNOWN_SIGNED)
+        assert list(log.query(START + 2000, START + 3000)) == []
+        assert len(list(log.query(0, START))) == 1
+
+
+def test_query_fields():
+    _purge()
+    with _log() as log:
+        _fill(log, 0, 100)
+        records = list(log.query(START + 500, START + 510, fields=('pm2_5', 't')))
+        assert records == [(START + 500, (100, -200)), (START + 510, (102, -200))]
+
+
+def test_reads_few_blocks():
+    _purge()
+    with _log() as log:
+        _fill(log, 0, 1000)
+        assert log._block_offset(START + 9000) == 896 * SampleLog.RECORD_SIZE  # block containing record 900
+        assert log._block_offset(START) == 0
+
+
+def test_equal_timestamps_across_blocks():
+    _purge()
+    with SampleLog(directory=DIRECTORY, name='test', block_records=4) as log:
+        for i, timestamp in enumerate((100, 101, 102, 103, 103, 104, 105, 106)):
+            log.append((i, 0, 0, 0, 0, 0, 0, 0), now=timestamp)
+        assert [values[0] for _, values in log.query(103, 103)] == [3, 4]
+        assert [values[0] for _, values in log.query(0, 100)] == [0]
+    _purge()
+
+
+def test_repair_index():
+    _purge()
+    with _log() as log:
+        _fill(log, 0, 20)
+    remove(f'{DIRECTORY}/test.idx')  # e.g. power loss before index written
+    with _log() as log:
+        assert log._index_entries == 3
+        _fill(log, 20, 30)
+        assert [timestamp for timestamp, _ in log.query(START + 150, START + 200)] == \
+               [START + i * 10 for i in range(15, 21)]
+    _purge()
+
+
+def run_all_tests():
+    test_query()
+    test_query_fields()
+    test_reads_few_blocks()
+    test_equal_timestamps_across_blocks()
+    test_repair_index()
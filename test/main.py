@@ -1,4 +1,8 @@
-from machine import I2C, Pin
+try:
+    from machine import I2C, Pin
+except ImportError:  # host (CPython), run against a simulated SEN5x in virtual time
+    I2C = Pin = None
+from sen5x.clock import Clock, VirtualClock
 from sen5x.sen5x import SEN5x
 
 ID = 0
@@ -7,12 +11,18 @@ SDA_PIN_NUM = 6
 FREQ = 50000  # see https://github.com/micropython/micropython/issues/7772
 ADDRESS = 0x69
 
-i2c = I2C(ID,
-          scl=Pin(SCL_PIN_NUM, pull=Pin.PULL_UP),
-          sda=Pin(SDA_PIN_NUM, pull=Pin.PULL_UP),
-          freq=FREQ
-          )
-sen = SEN5x(i2c, address=ADDRESS)
+if I2C is None:
+    from sen5x.simulator import SimulatedSEN5x
+    clock = VirtualClock()
+    i2c = SimulatedSEN5x(address=ADDRESS, clock=clock)
+else:
+    clock = Clock()
+    i2c = I2C(ID,
+              scl=Pin(SCL_PIN_NUM, pull=Pin.PULL_UP),
+              sda=Pin(SDA_PIN_NUM, pull=Pin.PULL_UP),
+              freq=FREQ
+              )
+sen = SEN5x(i2c, address=ADDRESS, clock=clock)  # all waits, including sleeps in these tests, use clock
 
 
 def test_str_repr():
@@ -39,6 +49,32 @@ def test_firmware_version():
     assert firmware_version == 1
 
 
+def test_variant():
+    variant = sen.variant
+    print('variant:', variant, 'measured values words:', sen.measured_values_words)
+    assert variant == sen.product_name
+    assert sen.measured_values_words == SEN5x.VARIANT_WORDS[variant]
+
+
+def test_not_supported():
+    """ commands the variant doesn't support are rejected without bus traffic """
+    print('not supported test')
+    variant = sen.variant
+    supported = {
+        'SEN50': (),
+        'SEN54': ('voc',),
+        'SEN55': ('voc', 'nox'),
+    }[variant]
+    for name, feature in (('voc_algorithm_state', 'voc'), ('nox_algorithm_tuning_params', 'nox')):
+        if feature in supported:
+            continue
+        try:
+            getattr(sen, name)
+            raise Exception(f'{name} supported by {variant}')
+        except SEN5x.NotSupportedError:
+            pass
+
+
 def test_data_ready(ready: bool = True):
     """ asserts data_ready == ready arg """
     data_ready = sen.data_ready
@@ -101,10 +137,14 @@ def _test_read_tuning_params(params):
 
 
 def test_rht_acceleration_mode():
-    mode = sen.rht_acceleration_mode
-    print('mode:', mode)
-    assert type(mode) is int
-    assert mode in (0, 1, 2)
+    product_name = sen.product_name
+    if product_name in ('SEN54', 'SEN55'):
+        mode = sen.rht_acceleration_mode
+        print('mode:', mode)
+        assert type(mode) is int
+        assert mode in (0, 1, 2)
+    else:
+        print('rht_acceleration_mode not supported')
 
 
 def test_voc_algorithm_state():
@@ -141,6 +181,41 @@ def test_check_i2c():
     sen.check_i2c()
 
 
+def test_bus_lock():
+    import _thread
+    print('bus lock')
+    lock = _thread.allocate_lock()
+    locked_sen = SEN5x(i2c, address=ADDRESS, lock=lock, clock=clock)
+    assert locked_sen.product_name in ['SEN50', 'SEN54', 'SEN55']
+    assert lock.locked() is False
+    assert locked_sen.lock_contentions == 0
+    assert locked_sen.lock_wait_us == 0
+
+
+def test_record_replay():
+    from os import remove
+    from sen5x.trace import RecordingI2C, ReplayI2C
+    print('record replay')
+    file_name = 'test.trace'
+    with open(file_name, 'wb') as f:
+        recording_sen = SEN5x(RecordingI2C(i2c, f, clock=clock), address=ADDRESS, clock=clock)
+        recording_sen.check_i2c()
+        product_name = recording_sen.product_name
+        serial_number = recording_sen.serial_number
+    with open(file_name, 'rb') as f:
+        replay = ReplayI2C(f, clock=clock)
+        replay_sen = SEN5x(replay, address=ADDRESS, clock=clock)
+        replay_sen.check_i2c()
+        assert replay_sen.product_name == product_name
+        assert replay_sen.serial_number == serial_number
+        assert replay.replayed == 5
+        try:
+            replay_sen.status
+        except ReplayI2C.EndOfTrace:
+            pass
+    remove(file_name)
+
+
 def test_check_for_errors():
     print('checking for errors')
     sen.check_for_errors()
@@ -153,11 +228,10 @@ def test_reset():
 
 
 def test_start_measurement_no_checks():
-    from time import sleep
     print('start measurement no checks')
     ready = sen.start_measurement(num_checks=0)
     assert ready is False
-    sleep(1)  # give it a chance to start (takes ~800 ms)
+    clock.sleep_ms(1000)  # give it a chance to start (takes ~800 ms)
 
 
 def test_start_measurement():
@@ -168,6 +242,10 @@ def test_start_measurement():
 
 def test_start_measurement_rht_gas_only():
     print('start measurement rht gas only')
+    if sen.variant == 'SEN50':
+        sen.start_measurement()  # keep start stop sequence
+        print('rht gas only mode not supported')
+        return
     ready = sen.start_measurement_rht_gas_only_mode(num_checks=99)
     assert ready is True
 
@@ -200,6 +278,45 @@ def test_measured_values_raw():
         raise Exception('Invalid product name')
 
 
+def test_measured_values_ticks():
+    ticks = sen.measured_values_ticks
+    print('ticks:', ticks)
+    assert len(ticks) == len(SEN5x.MEASURED_VALUES_SCALE_FACTORS)
+    for tick in ticks:
+        assert type(tick) is int
+    if sen.product_name != 'SEN55':
+        assert ticks[7] in (SEN5x.UNKNOWN_SIGNED, SEN5x.UNKNOWN_UNSIGNED)
+
+
+def test_tolerant():
+    """ requires measurement mode """
+    print('tolerant')
+    sen.tolerant = True
+    try:
+        values = sen.measured_values_raw
+    finally:
+        sen.tolerant = False
+    _print_measured_values(*values)
+    print('valid:', bin(sen.valid), 'crc_errors:', sen.crc_errors)
+    assert sen.valid | ((1 << sen.measured_values_words) - 1) == (1 << sen.measured_values_words) - 1
+
+
+def test_read_if_ready():
+    """ requires measurement mode """
+    print('read if ready')
+    for _ in range(30):  # new sample every second
+        values = sen.read_if_ready()
+        if values is not None:
+            break
+        clock.sleep_ms(100)
+    else:
+        raise Exception('No sample')
+    _print_measured_values(*values)
+    for value in values[:4]:
+        assert type(value) is float
+    assert sen.read_if_ready() is None  # repeat
+
+
 def test_measured_values_not_started():
     ppm1_0, ppm2_5, ppm4_0, ppm10_0, rh, t, voc, nox = sen.measured_values
     _print_measured_values(ppm1_0, ppm2_5, ppm4_0, ppm10_0, rh, t, voc, nox)
@@ -259,6 +376,36 @@ def test_measured_values_imperial():
         raise Exception('Invalid product name')
 
 
+def test_timer_acquisition():
+    """ requires measurement mode """
+    if I2C is None:
+        print('timer acquisition needs a hardware timer')
+        return
+    from machine import Timer
+    from time import sleep_ms
+    from sen5x.acquisition import TimerAcquisition
+    print('timer acquisition')
+    acq = TimerAcquisition(sen, Timer(0), depth=4)
+    acq.start(period_ms=1000)
+    sleep_ms(3500)  # responses are read one tick after command
+    acq.stop()
+    assert acq.available == 2
+    timestamp, values = acq.pop()
+    assert type(timestamp) is int
+    _print_measured_values(*values)
+    assert acq.available == 1
+    assert acq.overruns == 0
+    assert acq.errors == 0
+    assert acq.busy == 0
+    if sen.lock is not None:  # tick while application holds the bus is skipped instead of deadlocking
+        sen.transport.acquire()
+        try:
+            acq._tick(None)
+        finally:
+            sen.transport.release()
+        assert acq.busy == 1
+
+
 def _print_measured_values(ppm1_0, ppm2_5, ppm4_0, ppm10_0, rh, t, voc, nox):
     print('ppm1_0:', ppm1_0,
           'ppm2_5:', ppm2_5,
@@ -272,15 +419,37 @@ def _print_measured_values(ppm1_0, ppm2_5, ppm4_0, ppm10_0, rh, t, voc, nox):
 
 def test_start_fan_cleaning():
     """ requires measurement mode """
-    from time import sleep
     print('start fan cleaning')
     assert sen.fan_cleaning_active is False
     sen.start_fan_cleaning()
     assert sen.fan_cleaning_active is True
-    sleep(14)  # fan cleans for 10 seconds per datasheet, needs 14 here
+    clock.sleep_ms(14000)  # fan cleans for 10 seconds per datasheet, needs 14 here
     assert sen.fan_cleaning_active is False
 
 
+def test_health_monitor():
+    """ requires measurement mode """
+    from sen5x.health import HealthMonitor
+    print('health monitor')
+    health = HealthMonitor(sen, interval_ms=60000, cleaning_interval_ms=1000)
+    assert health.measured_values is not None
+    assert health.polls == 1
+    assert health.measured_values is not None
+    assert health.polls == 1  # not due yet
+    assert health.latched == 0
+    assert health.errors == []
+    for _ in range(20):  # start_fan_cleaning checks data_ready, cleared by reading measured values
+        if sen.data_ready:
+            break
+        clock.sleep_ms(100)
+    health.start_fan_cleaning()
+    assert health.cleaning is True
+    assert health.measured_values is None
+    clock.sleep_ms(14000)  # fan cleans for 10 seconds per datasheet, needs 14 here
+    assert health.measured_values is not None
+    assert health.cleaning is False
+
+
 def test_clear_status():
     print('clear status')
     sen.clear_status()
@@ -443,11 +612,11 @@ def test_invalid_mode():
     sen.start_measurement()
     try:
         sen.voc_algorithm_tuning_params
-    except SEN5x.InvalidMode:
+    except (SEN5x.InvalidMode, SEN5x.NotSupportedError):
         pass
     try:
         sen.nox_algorithm_tuning_params
-    except SEN5x.InvalidMode:
+    except (SEN5x.InvalidMode, SEN5x.NotSupportedError):
         pass
     test_stop_measurement()
 
@@ -457,35 +626,39 @@ def test_value_error():
     print('value error test')
     try:
         sen.temperature_compensation_params = (0, -5, 0)
-    except ValueError:
+    except (ValueError, SEN5x.NotSupportedError):
         pass
     try:
         sen.warm_start_param = -1
-    except ValueError:
+    except (ValueError, SEN5x.NotSupportedError):
         pass
     try:
         sen.voc_algorithm_tuning_params = (0, 0, 0, 0, 0, 0)
-    except ValueError:
+    except (ValueError, SEN5x.NotSupportedError):
         pass
     try:
         sen.nox_algorithm_tuning_params = (0, 0, 0, 0, 0, 0)
-    except ValueError:
+    except (ValueError, SEN5x.NotSupportedError):
         pass
     try:
         sen.rht_acceleration_mode = 3
-    except ValueError:
+    except (ValueError, SEN5x.NotSupportedError):
         pass
     try:
         sen.voc_algorithm_state = bytes(9)
-    except ValueError:
+    except (ValueError, SEN5x.NotSupportedError):
         pass
 
 
 def run_read_tests():
     test_reset()
     test_check_i2c()
+    test_bus_lock()
+    test_record_replay()
     test_check_for_errors()
     test_product_name()
+    test_variant()
+    test_not_supported()
     test_serial_number()
     test_str_repr()
     test_firmware_version()
@@ -527,6 +700,10 @@ def run_measurement_tests():
     test_measured_values()
     test_measured_values_imperial()
     test_measured_values_raw()
+    test_measured_values_ticks()
+    test_tolerant()
+    test_read_if_ready()
+    test_timer_acquisition()
     test_stop_measurement()
 
 
@@ -547,6 +724,7 @@ def run_set_tests():
     # start required
     test_start_measurement()
     test_start_fan_cleaning()
+    test_health_monitor()
     test_stop_measurement()
 
 
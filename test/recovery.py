@@ -0,0 +1,159 @@
+"""
+Bus recovery tests, run on a host (CPython) against a simulated sensor in virtual time
+    python -c "import runpy; runpy.run_path('test/recovery.py')['run_all_tests']()"
+"""
+from sen5x import recovery
+from sen5x.clock import VirtualClock
+from sen5x.recovery import BusRecovery
+from sen5x.sen5x import SEN5x
+from sen5x.simulator import SimulatedSEN5x
+
+
+def _sen() -> SEN5x:
+    clock = VirtualClock()
+    sen = SEN5x(SimulatedSEN5x(clock=clock), clock=clock)
+    sen.start_measurement()
+    return sen
+
+
+def test_warm():
+    sen = _sen()
+    bus = sen.i2c
+    start = bus._measurement_start
+
+    def bus_factory():
+        bus.hung = False  # cleared by re-creating the bus
+        return bus
+
+    rec = BusRecovery(bus_factory, [sen], budget_ms=5000)
+    assert rec.call(lambda: sen.measured_values_raw)[0] == 5.2
+    bus.hung = True
+    assert rec.call(lambda: sen.measured_values_raw)[0] == 5.2
+    assert (rec.errors, rec.recoveries, rec.warm, rec.cold) == (1, 1, 1, 0)
+    assert bus._measurement_start == start  # not restarted, VOC learning kept
+    assert rec.last_recovery_ms <= BusRecovery.SAMPLE_WAIT_MS
+
+
+def test_counted_once():
+    """ Sensors attached in a failed attempt aren't counted again when it is retried """
+    sen = _sen()
+    other = SEN5x(sen.transport)  # second driver on the bus
+    check_i2c = other.check_i2c
+    failures = [SEN5x.NotFoundError('Not found')]
+
+    def flaky_check_i2c():
+        if failures:
+            raise failures.pop()
+        check_i2c()
+
+    other.check_i2c = flaky_check_i2c
+    rec = BusRecovery(lambda: sen.i2c, [sen, other], budget_ms=5000)
+    rec.recover()
+    assert (rec.recoveries, rec.warm, rec.cold) == (1, 2, 0)
+
+
+def test_cold():
+    sen = _sen()
+    sen.i2c.hung = True
+    buses = []
+
+    def bus_factory():  # sensor was reset, bus object replaced
+        buses.append(SimulatedSEN5x(clock=sen.clock))
+        return buses[-1]
+
+    rec = BusRecovery(bus_factory, [sen], budget_ms=5000)
+    assert rec.call(lambda: sen.measured_values_raw)[0] == 5.2
+    assert sen.i2c is buses[-1]
+    assert sen.i2c.mode == SimulatedSEN5x.MEASUREMENT
+    assert (rec.recoveries, rec.warm, rec.cold) == (1, 0, 1)
+    assert rec.last_recovery_ms <= 5000
+
+
+def test_budget():
+    sen = _sen()
+    sen.i2c.hung = True
+    factories = []
+
+    def bus_factory():
+        factories.append(sen.i2c)
+        return sen.i2c  # stays hung
+
+    rec = BusRecovery(bus_factory, [sen], budget_ms=2000)
+    start = sen.clock.ticks_ms()
+    try:
+        rec.call(lambda: sen.measured_values_raw)
+        assert False, 'RecoveryError expected'
+    except BusRecovery.RecoveryError:
+        pass
+    assert sen.clock.ticks_ms() - start <= 2000
+    assert len(factories) > 1  # retried
+    assert (rec.recoveries, rec.failures) == (0, 1)
+
+
+class NeverReady(SimulatedSEN5x):
+    """ Answers but never has data ready, e.g. sensor stuck after reset """
+    def _execute(self, cmd: int):
+        if cmd == SEN5x.DATA_READY_FLAG:
+            return b'\x00\x00'
+        return super()._execute(cmd)
+
+
+def test_budget_never_ready():
+    """ Time of command executions counts against the budget, not only the waits between them """
+    sen = _sen()
+    sen.i2c.hung = True
+    rec = BusRecovery(lambda: NeverReady(clock=sen.clock), [sen], budget_ms=5000)
+    start = sen.clock.ticks_ms()
+    try:
+        rec.recover()
+        assert False, 'RecoveryError expected'
+    except BusRecovery.RecoveryError:
+        pass
+    assert sen.clock.ticks_ms() - start <= 5000
+    assert (rec.recoveries, rec.failures, rec.warm, rec.cold) == (0, 1, 0, 0)
+
+
+class FakePin:
+    """ SDA held low by a slave for a number of SCL pulses """
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    sda_low_pulses = 3
+    pulses = 0
+
+    def __init__(self, pin_id: int, mode: int, pull: int, value: int = 1):
+        self.pin_id = pin_id
+        self._value = value
+
+    def value(self, value: int = None):
+        if value is None:
+            return 0 if self.pin_id == 'sda' and FakePin.pulses < FakePin.sda_low_pulses else self._value
+        if self.pin_id == 'scl' and value == 1 and self._value == 0:
+            FakePin.pulses += 1
+        self._value = value
+
+
+def test_clear_bus():
+    sen = _sen()
+    pin = recovery.Pin
+    recovery.Pin = FakePin
+    try:
+        rec = BusRecovery(lambda: sen.i2c, [sen], scl='scl', sda='sda')
+        rec.recover()
+    finally:
+        recovery.Pin = pin
+    assert FakePin.pulses == FakePin.sda_low_pulses + 1  # until released, then STOP
+    assert rec.bus_clears == 1
+    try:
+        BusRecovery(lambda: sen.i2c, [sen], scl=1)
+        assert False, 'ValueError expected'
+    except ValueError:
+        pass
+
+
+def run_all_tests():
+    test_warm()
+    test_counted_once()
+    test_cold()
+    test_budget()
+    test_budget_never_ready()
+    test_clear_bus()
@@ -0,0 +1,167 @@
+"""
+Driver tests without hardware, run on a host (CPython) against a simulated sensor
+    python -c "import runpy; runpy.run_path('test/simulated.py')['run_all_tests']()"
+"""
+from sen5x.clock import VirtualClock
+from sen5x.sen5x import SEN5x
+from sen5x.simulator import SimulatedSEN5x
+
+
+def _sen(product_name: str = 'SEN55') -> SEN5x:
+    clock = VirtualClock()
+    sen = SEN5x(SimulatedSEN5x(product_name=product_name, clock=clock), clock=clock)
+    sen.start_measurement()
+    assert sen.variant == product_name  # read once
+    return sen
+
+
+def test_variant():
+    for product_name, words in (('SEN50', 4), ('SEN54', 7), ('SEN55', 8)):
+        sen = _sen(product_name)
+        assert sen.variant == product_name
+        assert sen.measured_values_words == words
+        values = sen.measured_values_raw
+        assert values[:words] == (5.2, 8.5, 10.2, 11.0, 45.5, 23.5, 100.0, 1.0)[:words]
+        assert values[words:] == (None,) * (8 - words)
+        assert sen.measured_values_ticks[words:] == SEN5x.UNKNOWN_TICKS[words:]
+
+
+def test_not_supported():
+    sen = _sen('SEN50')
+    commands = sen.i2c.commands
+    for name in ('temperature_compensation_params', 'rht_acceleration_mode', 'voc_algorithm_tuning_params',
+                 'voc_algorithm_state', 'nox_algorithm_tuning_params'):
+        try:
+            getattr(sen, name)
+            assert False, 'NotSupportedError expected'
+        except SEN5x.NotSupportedError:
+            pass
+    assert sen.i2c.commands == commands  # rejected without bus traffic
+    sen = _sen('SEN54')
+    sen.voc_algorithm_state = bytes(8)
+    try:
+        sen.nox_algorithm_tuning_params = (1, 12, 12, 720, 50, 230)
+        assert False, 'NotSupportedError expected'
+    except SEN5x.NotSupportedError:
+        pass
+
+
+def test_strict_crc():
+    sen = _sen()
+    sen.i2c.corrupt_words = 1 << 7
+    try:
+        sen.measured_values_raw
+        assert False, 'CRCError expected'
+    except SEN5x.CRCError:
+        pass
+
+
+def test_tolerant_crc():
+    sen = _sen()
+    sen.tolerant = True
+    sen.i2c.corrupt_words = (1 << 7) | (1 << 4)  # NOx & RH
+    values = sen.measured_values_raw
+    assert values == (5.2, 8.5, 10.2, 11.0, None, 23.5, 100.0, None)
+    assert sen.valid == 0b01101111
+    assert sen.crc_errors == 2
+    assert sen.measured_values_ticks[4] == SEN5x.UNKNOWN_SIGNED
+    sen.i2c.corrupt_words = 0
+    sen.measured_values_raw
+    assert sen.valid == 0xFF
+    sen.tolerant = False
+    sen = _sen('SEN54')
+    sen.measured_values_raw
+    assert sen.valid == 0b01111111
+
+
+def test_virtual_clock():
+    clock = VirtualClock(epoch=800000000)
+    sen = SEN5x(SimulatedSEN5x(clock=clock), clock=clock)
+    assert sen.start_measurement() is True
+    assert 1000 <= clock.ticks_ms() <= 1200  # polled until first sample, without waiting
+    sen.start_fan_cleaning()
+    assert sen.fan_cleaning_active is True
+    clock.advance(10000)
+    assert sen.fan_cleaning_active is False
+    assert clock.time() == 800000000 + clock.ticks_ms() // 1000
+
+
+def test_health_clear():
+    """ clear() re-reads status, cached error & cleaning bits don't outlive it """
+    from sen5x.health import HealthMonitor
+    sen = _sen()
+    health = HealthMonitor(sen, interval_ms=60000)
+    sen.i2c.status_errors = SEN5x.STATUS_ERRORS[0][0]
+    assert health.poll(force=True) is True
+    assert health.status == health.latched == SEN5x.STATUS_ERRORS[0][0]
+    sen.start_fan_cleaning()
+    assert health.poll(force=True) is True
+    assert health.cleaning is True
+    sen.clock.advance(10000)  # cleaning done, not polled yet
+    assert health.cleaning is True
+    health.clear()
+    assert health.status == 0
+    assert health.latched == 0
+    assert health.cleaning is False
+    assert health.measured_values is not None
+
+
+def test_replay_error():
+    """ Strict replay checks the command of an operation that raised, then raises the recorded OSError """
+    from io import BytesIO
+    from sen5x.trace import RecordingI2C, ReplayI2C
+    clock = VirtualClock()
+    sim = SimulatedSEN5x(clock=clock)
+    stream = BytesIO()
+    words = b'\x00\x00\x81\x00\x00\x81'
+    sim.hung = True
+    try:
+        RecordingI2C(sim, stream, clock=clock).writeto_mem(SEN5x.DEFAULT_I2C_ADDR, SEN5x.AUTO_CLEANING_INTERVAL, words)
+        assert False, 'OSError expected'
+    except OSError:
+        pass
+    for memaddr, error in ((SEN5x.AUTO_CLEANING_INTERVAL, OSError),
+                           (SEN5x.VOC_ALGORITHM_STATE, ReplayI2C.MismatchError)):
+        replay = ReplayI2C(BytesIO(stream.getvalue()), clock=clock)
+        try:
+            replay.writeto_mem(SEN5x.DEFAULT_I2C_ADDR, memaddr, words)
+            assert False, 'error expected'
+        except error:
+            pass
+
+
+def test_record_error_without_errno():
+    """ OSErrors without a 16 bit errno are recorded as errno 0 and re-raised unchanged """
+    from io import BytesIO
+    from sen5x.trace import RecordingI2C, ReplayI2C
+
+    class FailingI2C:
+        def __init__(self, error: OSError):
+            self.error = error
+
+        def writeto(self, addr: int, buf, stop: bool = True) -> int:
+            raise self.error
+
+    for error in (OSError('bus error'), OSError(-1), OSError()):
+        stream = BytesIO()
+        try:
+            RecordingI2C(FailingI2C(error), stream, clock=VirtualClock()).writeto(SEN5x.DEFAULT_I2C_ADDR, b'\x00')
+            assert False, 'OSError expected'
+        except OSError as e:
+            assert e is error
+        try:
+            ReplayI2C(BytesIO(stream.getvalue())).writeto(SEN5x.DEFAULT_I2C_ADDR, b'\x00')
+            assert False, 'OSError expected'
+        except OSError as e:
+            assert e.args == (0,)
+
+
+def run_all_tests():
+    test_variant()
+    test_not_supported()
+    test_strict_crc()
+    test_tolerant_crc()
+    test_virtual_clock()
+    test_health_clear()
+    test_replay_error()
+    test_record_error_without_errno()
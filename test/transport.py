@@ -0,0 +1,109 @@
+"""
+Sensirion transport tests, run on a host (CPython) against a simulated sensor in virtual time
+    python -c "import runpy; runpy.run_path('test/transport.py')['run_all_tests']()"
+"""
+from sen5x.clock import VirtualClock
+from sen5x.sen5x import SEN5x
+from sen5x.simulator import SimulatedSEN5x
+from sen5x.transport import SensirionI2C, crc8
+
+
+def _bus() -> SensirionI2C:
+    clock = VirtualClock()
+    return SensirionI2C(SimulatedSEN5x(clock=clock), clock=clock)
+
+
+def test_crc():
+    assert crc8(0xBE, 0xEF) == 0x92  # datasheet example
+    bus = SensirionI2C(RecordingBus(), clock=VirtualClock())
+    bus.i2c.writeto_mem = lambda addr, memaddr, buf, addrsize=8: bus.i2c.written.append(bytes(buf))
+    bus.write(0x69, 0x6004, b'\xBE\xEF', exe_time_ms=0)  # checksums added by write() & checked by collect()
+    assert bus.i2c.written == [b'\xBE\xEF\x92']
+    data = bytearray(2)
+    assert bus.collect(0x69, 1, data) == 0b1 and data == b'\xBE\xEF'
+
+
+def test_read_write():
+    bus = _bus()
+    data = bytearray(4)
+    bus.write(SEN5x.DEFAULT_I2C_ADDR, SEN5x.AUTO_CLEANING_INTERVAL, b'\x00\x01\x02\x03', exe_time_ms=20)
+    valid = bus.read(SEN5x.DEFAULT_I2C_ADDR, SEN5x.AUTO_CLEANING_INTERVAL, 2, data, exe_time_ms=20)
+    assert valid == 0b11 and data == b'\x00\x01\x02\x03'
+    assert bus.transactions == 3  # write, command, read
+    assert bus.clock.slept_us == 40000
+    bus.execute(SEN5x.DEFAULT_I2C_ADDR, SEN5x.START_MEASUREMENT, exe_time_ms=50)
+    assert bus.read(SEN5x.DEFAULT_I2C_ADDR, SEN5x.MEASURED_VALUES, 2, data, exe_time_ms=20) is None  # no sample yet
+    for words in (b'', bytes(34)):
+        try:
+            bus.write(SEN5x.DEFAULT_I2C_ADDR, SEN5x.AUTO_CLEANING_INTERVAL, words, exe_time_ms=20)
+            assert False, 'ValueError expected'
+        except ValueError:
+            pass
+
+
+def test_checksum():
+    bus = _bus()
+    bus.i2c.corrupt_words = 0b10
+    data = bytearray(4)
+    try:
+        bus.read(SEN5x.DEFAULT_I2C_ADDR, SEN5x.DEVICE_STATUS, 2, data, exe_time_ms=20)
+        assert False, 'CRCError expected'
+    except SEN5x.CRCError:  # same class as SensirionI2C.CRCError
+        pass
+    assert bus.read(SEN5x.DEFAULT_I2C_ADDR, SEN5x.DEVICE_STATUS, 2, data, exe_time_ms=20, strict=False) == 0b01
+
+
+def test_shared():
+    bus = _bus()
+    sen = SEN5x(bus)
+    other = SEN5x(bus, address=SEN5x.DEFAULT_I2C_ADDR)  # e.g. another Sensirion driver on the bus
+    assert sen.clock is bus.clock and sen.i2c is bus.i2c
+    assert sen.start_measurement() is True
+    assert other.measured_values_raw[0] == 5.2
+    sen.i2c = SimulatedSEN5x(clock=bus.clock)  # e.g. bus re-created, for all drivers on the transport
+    assert other.i2c is sen.i2c
+    try:
+        SEN5x(bus, clock=VirtualClock())
+        assert False, 'ValueError expected'
+    except ValueError:
+        pass
+
+
+class RecordingBus:
+    def __init__(self):
+        self.written = []
+        self.buffers = []
+
+    def readfrom_into(self, addr: int, buf) -> None:
+        self.buffers.append(buf)
+        buf[:] = b'\xBE\xEF\x92' * (len(buf) // 3)
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        self.written.append(bytes(buf))
+        return len(buf)
+
+
+def test_cmd_size():
+    bus = SensirionI2C(RecordingBus(), clock=VirtualClock())
+    bus.execute(0x44, 0xFD, exe_time_ms=10, cmd_size=1)  # SHT4x measure high precision
+    bus.execute(0x62, 0x21B1, exe_time_ms=0)  # SCD4x start periodic measurement
+    assert bus.i2c.written == [b'\xFD', b'\x21\xB1']
+
+
+def test_preallocated_views():
+    """ Reads transfer slices of the framing buffer made once, not per call (no allocation in scheduled ticks) """
+    bus = SensirionI2C(RecordingBus(), clock=VirtualClock())
+    data = bytearray(32)
+    for num_words in (2, 2, 16):
+        assert bus.collect(0x69, num_words, data) == (1 << num_words) - 1
+    first, second, longest = bus.i2c.buffers
+    assert first is second and len(first) == 6 and len(longest) == SensirionI2C.BUFFER_SIZE
+
+
+def run_all_tests():
+    test_crc()
+    test_read_write()
+    test_checksum()
+    test_shared()
+    test_cmd_size()
+    test_preallocated_views()